@@ -0,0 +1,32 @@
+"""Index files left pending for the job reconciler
+
+Revision ID: 2b7e9f4c5a18
+Revises: 9d4f2a6c1b83
+Create Date: 2026-10-18 19:41:55.268034
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b7e9f4c5a18'
+down_revision: Union[str, None] = '9d4f2a6c1b83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_files_pending_updated_at', 'files', ['updated_at'], unique=False,
+            postgresql_where=sa.text("processing_status = 'PENDING'"), postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_files_pending_updated_at', table_name='files', postgresql_concurrently=True)
@@ -0,0 +1,33 @@
+"""Add the embedding_cache table
+
+Revision ID: 3f9d2b7c8e14
+Revises: e8a4c1f06b37
+Create Date: 2026-10-18 14:38:17.215904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9d2b7c8e14'
+down_revision: Union[str, None] = 'e8a4c1f06b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('embedding_cache',
+    sa.Column('embedding_model', sa.String(length=100), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('embedding', Vector(1536), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('embedding_model', 'content_hash')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('embedding_cache')
@@ -0,0 +1,84 @@
+"""Add content-addressed blobs referenced by files
+
+Revision ID: 5c1e7a9d2f60
+Revises: 3f9d2b7c8e14
+Create Date: 2026-10-18 16:12:40.508317
+
+blobs.ref_count is kept by triggers on files, so deletes that cascade from
+users inside Postgres are counted too. Existing files keep their per-upload
+paths and a null blob_sha256.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a9d2f60'
+down_revision: Union[str, None] = '3f9d2b7c8e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('mime_type', sa.String(length=255), nullable=False),
+    sa.Column('storage_path', sa.String(length=1000), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('unreferenced_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('processing_status', postgresql.ENUM('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED', name='fileprocessingstatus', create_type=False), nullable=False),
+    sa.Column('extracted_text', sa.Text(), nullable=True),
+    sa.Column('transcription', sa.Text(), nullable=True),
+    sa.Column('meta', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index('ix_blobs_unreferenced_at', 'blobs', ['unreferenced_at'], unique=False, postgresql_where=sa.text('ref_count = 0'))
+
+    op.add_column('files', sa.Column('blob_sha256', sa.String(length=64), nullable=True))
+    op.create_foreign_key('fk_files_blob_sha256', 'files', 'blobs', ['blob_sha256'], ['sha256'])
+    op.create_index('ix_files_blob_sha256', 'files', ['blob_sha256'], unique=False)
+
+    op.execute("""
+        CREATE FUNCTION blobs_adjust_ref_count(blob text, delta integer) RETURNS void AS $$
+            UPDATE blobs
+            SET ref_count = ref_count + delta,
+                unreferenced_at = CASE WHEN ref_count + delta = 0 THEN now() END
+            WHERE sha256 = blob
+        $$ LANGUAGE sql
+    """)
+    op.execute("""
+        CREATE FUNCTION files_blob_ref_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.blob_sha256 IS NOT NULL THEN
+                PERFORM blobs_adjust_ref_count(OLD.blob_sha256, -1);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.blob_sha256 IS NOT NULL THEN
+                PERFORM blobs_adjust_ref_count(NEW.blob_sha256, 1);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER files_blob_ref_count
+        AFTER INSERT OR DELETE OR UPDATE OF blob_sha256 ON files
+        FOR EACH ROW EXECUTE FUNCTION files_blob_ref_count()
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS files_blob_ref_count ON files')
+    op.execute('DROP FUNCTION IF EXISTS files_blob_ref_count()')
+    op.execute('DROP FUNCTION IF EXISTS blobs_adjust_ref_count(text, integer)')
+    op.drop_index('ix_files_blob_sha256', table_name='files')
+    op.drop_constraint('fk_files_blob_sha256', 'files', type_='foreignkey')
+    op.drop_column('files', 'blob_sha256')
+    op.drop_index('ix_blobs_unreferenced_at', table_name='blobs', postgresql_where=sa.text('ref_count = 0'))
+    op.drop_table('blobs')
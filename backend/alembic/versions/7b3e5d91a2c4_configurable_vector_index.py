@@ -0,0 +1,43 @@
+"""Replace the vector_chunks ivfflat index with HNSW
+
+Revision ID: 7b3e5d91a2c4
+Revises: dc24823cb976
+Create Date: 2026-10-18 13:21:08.402117
+
+Builds a fixed HNSW index (m = 16, ef_construction = 64, cosine) and needs
+pgvector >= 0.5.0. The DDL is frozen here so the migration does the same
+thing in every environment; VECTOR_INDEX_TYPE, VECTOR_INDEX_PRECISION and
+the index parameters are applied with scripts/rebuild_vector_index.py.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e5d91a2c4'
+down_revision: Union[str, None] = 'dc24823cb976'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build the replacement concurrently, then swap it in
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_vector_chunks_embedding_new')
+        op.execute(
+            'CREATE INDEX CONCURRENTLY idx_vector_chunks_embedding_new ON vector_chunks '
+            'USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)'
+        )
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_vector_chunks_embedding')
+        op.execute('ALTER INDEX idx_vector_chunks_embedding_new RENAME TO idx_vector_chunks_embedding')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_vector_chunks_embedding')
+        op.execute(
+            'CREATE INDEX CONCURRENTLY idx_vector_chunks_embedding ON vector_chunks '
+            'USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)'
+        )
@@ -0,0 +1,29 @@
+"""Add a chunk version counter to vector_stores
+
+Revision ID: 9d4f2a6c1b83
+Revises: 5c1e7a9d2f60
+Create Date: 2026-10-18 19:04:27.913652
+
+Bumped whenever a store's chunks change; in-process search matrices are
+cached per version.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f2a6c1b83'
+down_revision: Union[str, None] = '5c1e7a9d2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('vector_stores', sa.Column('chunk_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('vector_stores', 'chunk_version')
@@ -0,0 +1,65 @@
+"""Add per-session message sequence counter and unique sequences
+
+Revision ID: c2b98e7d55b6
+Revises: 4746c4d2cfde
+Create Date: 2026-10-18 09:12:41.318604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2b98e7d55b6'
+down_revision: Union[str, None] = '4746c4d2cfde'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sessions', sa.Column('last_sequence', sa.Integer(), server_default=sa.text('-1'), nullable=False))
+
+    # Renumber each session densely (keeping order) so earlier races that
+    # produced duplicate sequences don't block the unique constraint
+    op.execute("""
+        UPDATE messages AS m
+        SET sequence = ordered.new_sequence
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY session_id ORDER BY sequence, created_at, id
+            ) - 1 AS new_sequence
+            FROM messages
+        ) AS ordered
+        WHERE m.id = ordered.id AND m.sequence <> ordered.new_sequence
+    """)
+    op.execute("""
+        UPDATE sessions AS s
+        SET last_sequence = counts.max_sequence
+        FROM (
+            SELECT session_id, max(sequence) AS max_sequence
+            FROM messages
+            GROUP BY session_id
+        ) AS counts
+        WHERE s.id = counts.session_id
+    """)
+
+    # Build the index without blocking writes, then attach it as the constraint
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_messages_session_id_sequence',
+            'messages',
+            ['session_id', 'sequence'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+    op.execute(
+        'ALTER TABLE messages ADD CONSTRAINT uq_messages_session_id_sequence '
+        'UNIQUE USING INDEX uq_messages_session_id_sequence'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_messages_session_id_sequence', 'messages', type_='unique')
+    op.drop_column('sessions', 'last_sequence')
@@ -0,0 +1,43 @@
+"""Add composite indexes for service list and lookup queries
+
+Revision ID: dc24823cb976
+Revises: c2b98e7d55b6
+Create Date: 2026-10-18 10:03:27.551920
+
+messages(session_id, sequence) is already covered by the unique
+constraint added in c2b98e7d55b6.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dc24823cb976'
+down_revision: Union[str, None] = 'c2b98e7d55b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_sessions_user_id_updated_at', 'sessions', ['user_id', 'updated_at']),
+    ('ix_sessions_project_id', 'sessions', ['project_id']),
+    ('ix_projects_user_id_updated_at', 'projects', ['user_id', 'updated_at']),
+    ('ix_files_user_id_in_library_created_at', 'files', ['user_id', 'in_library', 'created_at']),
+    ('ix_vector_chunks_vector_store_id_chunk_index', 'vector_chunks', ['vector_store_id', 'chunk_index']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
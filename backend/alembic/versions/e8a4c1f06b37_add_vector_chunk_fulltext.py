@@ -0,0 +1,39 @@
+"""Add a full-text search column and GIN index to vector_chunks
+
+Revision ID: e8a4c1f06b37
+Revises: 7b3e5d91a2c4
+Create Date: 2026-10-18 14:02:51.736480
+
+Adding a stored generated column rewrites vector_chunks under an ACCESS
+EXCLUSIVE lock; run it in a maintenance window on large tables. The GIN
+index is then built concurrently.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a4c1f06b37'
+down_revision: Union[str, None] = '7b3e5d91a2c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        'ALTER TABLE vector_chunks ADD COLUMN content_tsv tsvector '
+        "GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vector_chunks_content_tsv '
+            'ON vector_chunks USING gin (content_tsv)'
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_vector_chunks_content_tsv')
+    op.drop_column('vector_chunks', 'content_tsv')
@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, List, Optional
+
+
+from app.providers import ChatMessage
+
+
+
+
+@dataclass
+class AgentEvent:
+    """
+    An event emitted while an agent runs.
+    `type` is "token" for streamed text or "member_done" when a contributor finishes.
+    """
+    type: str
+    agent_name: str
+    content: str = ""
+    result: Optional[Any] = None
+
+
+
+
+class BaseAgent(ABC):
+    """Base class for agents that turn a prompt into a stream of events"""
+    
+    name: str = "agent"
+    
+    @abstractmethod
+    def run(self, prompt: List[ChatMessage]) -> AsyncIterator[AgentEvent]:
+        """Run the agent, yielding events as they are produced"""
\ No newline at end of file
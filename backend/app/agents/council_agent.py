@@ -0,0 +1,245 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Dict, List, Optional
+import asyncio
+import contextlib
+import math
+
+
+from app.agents.base_agent import AgentEvent, BaseAgent
+from app.config import settings
+from app.core.streaming import TokenStream
+from app.providers import ChatMessage, get_provider_for_model
+
+
+
+
+@dataclass
+class CouncilMember:
+    """One council seat: the agent name shown to users and the model behind it"""
+    name: str
+    model: str
+    hedge_model: Optional[str] = None
+
+
+
+
+@dataclass
+class MemberResult:
+    """Outcome of one member's turn"""
+    member: CouncilMember
+    content: str
+    model: str
+    status: str  # "completed", "timeout" or "error"
+    latency_ms: int
+    hedged: bool = False
+    error: Optional[str] = None
+
+
+
+
+@dataclass
+class LatencyTracker:
+    """Rolling window of time-to-first-token samples per model"""
+    window: int = 200
+    _samples: Dict[str, Deque[float]] = field(default_factory=dict)
+    
+    def record(self, model: str, seconds: float):
+        self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+    
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        """Latency at the given percentile, or None until enough samples exist"""
+        samples = self._samples.get(model)
+        if not samples or len(samples) < settings.COUNCIL_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)
+        return ordered[max(index, 0)]
+
+
+
+
+# Shared across requests so hedging thresholds reflect recent traffic
+latency_tracker = LatencyTracker()
+
+
+
+
+async def _close_stream(stream: AsyncIterator[str]):
+    """Close a provider stream so its connection is released immediately"""
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        with contextlib.suppress(Exception):
+            await aclose()
+
+
+
+
+async def _cancel(task: asyncio.Task):
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError, Exception):
+        await task
+
+
+
+
+class CouncilAgent(BaseAgent):
+    """
+    Fans a prompt out to every council member at once.
+    
+    Members stream concurrently, so the council takes as long as its slowest
+    member rather than the sum of all of them. Each member has its own
+    deadline; a member that misses it is cancelled and its provider stream is
+    closed. With hedging enabled, a member whose first token is later than the
+    configured latency percentile gets a duplicate request on its hedge model,
+    and whichever answers first wins while the other is cancelled.
+    """
+    
+    name = "council"
+    
+    def __init__(
+        self,
+        members: List[CouncilMember],
+        deadline: float = settings.COUNCIL_MEMBER_DEADLINE_S,
+        hedge: bool = settings.COUNCIL_HEDGE_ENABLED,
+        hedge_percentile: float = settings.COUNCIL_HEDGE_PERCENTILE
+    ):
+        self.members = members
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+    
+    @classmethod
+    def from_settings(cls, models: Optional[List[str]] = None) -> "CouncilAgent":
+        """Build a council from the given models, defaulting to application settings"""
+        members = [
+            CouncilMember(name=model, model=model, hedge_model=settings.COUNCIL_HEDGE_MODEL)
+            for model in models or settings.COUNCIL_MODELS
+        ]
+        return cls(members)
+    
+    async def _hedged_stream(
+        self,
+        member: CouncilMember,
+        prompt: List[ChatMessage],
+        state: Dict[str, object]
+    ) -> AsyncIterator[str]:
+        """Stream a member's reply, hedging on its first token when it runs slow"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        primary = get_provider_for_model(member.model).stream_chat(prompt, member.model)
+        streams = {member.model: primary}
+        threshold = None
+        if self.hedge and member.hedge_model and member.hedge_model != member.model:
+            threshold = latency_tracker.percentile(member.model, self.hedge_percentile)
+        
+        pending = {asyncio.ensure_future(primary.__anext__()): member.model}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=threshold)
+            if not done:
+                # Primary missed its latency percentile: race a duplicate request
+                backup = get_provider_for_model(member.hedge_model).stream_chat(prompt, member.hedge_model)
+                streams[member.hedge_model] = backup
+                pending[asyncio.ensure_future(backup.__anext__())] = member.hedge_model
+                state["hedged"] = True
+            
+            first_token = None
+            winner = None
+            errors: List[BaseException] = []
+            while pending and winner is None:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    model = pending.pop(task)
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                    elif winner is None:
+                        winner, first_token = model, task.result()
+            
+            for task, model in pending.items():
+                await _cancel(task)
+                await _close_stream(streams.pop(model))
+            if winner is None:
+                # No candidate produced a token: empty replies end quietly, failures propagate
+                failures = [e for e in errors if not isinstance(e, StopAsyncIteration)]
+                if failures:
+                    raise failures[0]
+                return
+            
+            latency_tracker.record(winner, loop.time() - started)
+            state["model"] = winner
+            yield first_token
+            async for token in streams[winner]:
+                yield token
+        finally:
+            for task in pending:
+                await _cancel(task)
+            for stream in streams.values():
+                await _close_stream(stream)
+    
+    async def _run_member(
+        self,
+        member: CouncilMember,
+        prompt: List[ChatMessage],
+        queue: asyncio.Queue
+    ):
+        """
+        Run one member under its deadline, forwarding batched tokens to the shared queue.
+        Only time spent waiting on the provider counts against the deadline; time
+        blocked on a full shared queue (a slow client) does not.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        state: Dict[str, object] = {"model": member.model, "hedged": False}
+        stream = TokenStream(self._hedged_stream(member, prompt, state))
+        batches = stream.batches()
+        
+        status, error = "completed", None
+        budget = self.deadline
+        try:
+            while True:
+                waiting = loop.time()
+                try:
+                    batch = await asyncio.wait_for(batches.__anext__(), timeout=max(budget, 0))
+                except StopAsyncIteration:
+                    break
+                budget -= loop.time() - waiting
+                await queue.put(AgentEvent(type="token", agent_name=member.name, content=batch))
+            if stream.error is not None:
+                raise stream.error
+        except asyncio.TimeoutError:
+            status = "timeout"
+        except Exception as exc:
+            # Any member failure is reported, never allowed to stall the council
+            status, error = "error", str(exc)
+        finally:
+            await batches.aclose()
+        
+        result = MemberResult(
+            member=member,
+            content=stream.text,
+            model=state["model"],
+            status=status,
+            latency_ms=int((loop.time() - started) * 1000),
+            hedged=bool(state["hedged"]),
+            error=error,
+        )
+        await queue.put(AgentEvent(type="member_done", agent_name=member.name, result=result))
+    
+    async def run(self, prompt: List[ChatMessage]) -> AsyncIterator[AgentEvent]:
+        """Yield token and member_done events from all members as they arrive"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.STREAM_QUEUE_SIZE)
+        tasks = [
+            asyncio.create_task(self._run_member(member, prompt, queue))
+            for member in self.members
+        ]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                event = await queue.get()
+                if event.type == "member_done":
+                    remaining -= 1
+                yield event
+        finally:
+            for task in tasks:
+                if not task.done():
+                    await _cancel(task)
\ No newline at end of file
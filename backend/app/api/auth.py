@@ -3,10 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from app.database import get_db
-from app.schemas.auth import UserCreate, UserLogin, Token, UserResponse
+from app.schemas.auth import UserCreate, UserLogin, Token, UserResponse, UserPrincipal
 from app.services.auth_service import AuthService
 from app.dependencies import get_current_user
-from app.models.user import User
 
 
 router = APIRouter()
@@ -51,12 +50,19 @@ async def login(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get current authenticated user information
     """
-    return UserResponse.model_validate(current_user)
+    user = await AuthService.get_user_by_id(current_user.id, db)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return UserResponse.model_validate(user)
 
 
 
@@ -4,10 +4,12 @@ from typing import List, Optional
 import uuid
 
 
+from app.config import settings
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.schemas.auth import UserPrincipal
 from app.models.message import MessageRole
+from app.models.session import SessionMode
 from app.schemas.chat import (
     SessionCreate,
     SessionUpdate,
@@ -18,6 +20,12 @@ from app.schemas.chat import (
 )
 from app.services.session_service import SessionService
 from app.services.message_service import MessageService
+from app.services.chat_service import ChatService
+from app.agents.council_agent import CouncilAgent
+from app.core.streaming import sse_response
+from app.core.context import ContextBuilder, context_budget, estimate_tokens
+from app.core.pagination import PageParams, page_params
+from app.providers import ProviderError, get_provider_for_model
 
 
 router = APIRouter()
@@ -28,7 +36,7 @@ router = APIRouter()
 @router.post("/sessions", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_session(
     session_data: SessionCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new chat session"""
@@ -40,11 +48,17 @@ async def create_session(
 @router.get("/sessions", response_model=List[SessionResponse])
 async def list_sessions(
     project_id: Optional[uuid.UUID] = None,
-    current_user: User = Depends(get_current_user),
+    page: PageParams = Depends(page_params),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all sessions for the current user, optionally filtered by project"""
-    return await SessionService.get_user_sessions(current_user.id, project_id, db)
+    """
+    List sessions for the current user, most recently updated first, optionally filtered by project
+    
+    Pass the `X-Next-Cursor` response header back as `cursor` to get the next page.
+    """
+    result = await SessionService.get_user_sessions(current_user.id, project_id, db, page.limit, page.cursor)
+    return result.to_response()
 
 
 
@@ -52,17 +66,11 @@ async def list_sessions(
 @router.get("/sessions/{session_id}", response_model=SessionResponse)
 async def get_session(
     session_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get a specific session"""
-    session = await SessionService.get_session_by_id(session_id, current_user.id, db)
-    if not session:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Session not found"
-        )
-    return SessionResponse.model_validate(session)
+    return await SessionService.get_session_cached(session_id, current_user.id, db)
 
 
 
@@ -71,7 +79,7 @@ async def get_session(
 async def update_session(
     session_id: uuid.UUID,
     session_data: SessionUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Update a session"""
@@ -84,7 +92,7 @@ async def update_session(
 async def rename_session(
     session_id: uuid.UUID,
     rename_data: SessionRename,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Rename a session"""
@@ -97,7 +105,7 @@ async def rename_session(
 @router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_session(
     session_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a session"""
@@ -110,12 +118,18 @@ async def delete_session(
 @router.get("/sessions/{session_id}/messages", response_model=List[MessageResponse])
 async def get_session_messages(
     session_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    page: PageParams = Depends(page_params),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all messages for a session"""
-    messages = await MessageService.get_session_messages(session_id, current_user.id, db)
-    return [MessageResponse.model_validate(m) for m in messages]
+    """
+    Get messages for a session in chronological order
+    
+    The first page holds the newest messages; pass the `X-Next-Cursor`
+    response header back as `cursor` to load older ones.
+    """
+    result = await MessageService.get_session_messages(session_id, current_user.id, db, page.limit, page.cursor)
+    return result.to_response()
 
 
 
@@ -123,12 +137,17 @@ async def get_session_messages(
 @router.post("/messages", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
 async def send_message(
     chat_request: ChatRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Send a message (basic version - will be enhanced with LLM integration)
-    For now, just stores the user message
+    Send a message and generate the assistant reply
+    
+    - **stream**: When true (default) the reply is streamed as Server-Sent Events
+      (`start`, `token`, `done`); otherwise the finished assistant message is returned.
+      The user and assistant messages are stored together once the reply is complete
+    - **mode**: Taken from the session. In `council` sessions every member answers;
+      tokens are tagged with `agent_name` and each reply is announced with `member_done`
     """
     if not chat_request.session_id:
         raise HTTPException(
@@ -136,24 +155,77 @@ async def send_message(
             detail="session_id is required"
         )
     
-    # Create user message
-    user_message = await MessageService.create_message(
-        session_id=chat_request.session_id,
-        content=chat_request.message,
-        role=MessageRole.USER,
-        user_id=current_user.id,
-        db=db
-    )
+    header = await ContextBuilder.load_header(chat_request.session_id, current_user.id, db)
+    llm_model = chat_request.llm_model or header.llm_model or settings.LLM_DEFAULT_MODEL
+    council = None
+    if header.mode == SessionMode.COUNCIL:
+        council = CouncilAgent.from_settings(header.settings.get("council_models"))
+        if not chat_request.stream:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Council mode requires streaming"
+            )
+    
+    models = [m.model for m in council.members] if council else [llm_model]
+    try:
+        for model in models:
+            get_provider_for_model(model)
+    except ProviderError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    
+    # Prompt is assembled before the new message is stored, so history excludes it
+    budget = min(context_budget(model) for model in models)
+    window = await ContextBuilder.build(header, chat_request.message, budget, db)
+    
+    # End the read transaction so the pooled connection goes back to the pool
+    # before any generation starts
+    await db.commit()
+    
+    if council:
+        # Council replies are saved per member as they finish, so the user
+        # message is stored up front
+        user_message = await MessageService.create_message(
+            session_id=chat_request.session_id,
+            content=chat_request.message,
+            role=MessageRole.USER,
+            user_id=current_user.id,
+            db=db,
+            prompt_tokens=estimate_tokens(chat_request.message)
+        )
+        return sse_response(ChatService.stream_council_reply(
+            session_id=chat_request.session_id,
+            user_id=current_user.id,
+            user_message=user_message,
+            window=window,
+            council=council
+        ))
+    
+    if chat_request.stream:
+        return sse_response(ChatService.stream_reply(
+            session_id=chat_request.session_id,
+            user_id=current_user.id,
+            user_content=chat_request.message,
+            window=window,
+            llm_model=llm_model
+        ))
+    
+    try:
+        reply = await ChatService.complete_reply(window.messages, llm_model)
+    except ProviderError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=str(exc)
+        )
     
-    # TODO: In next step, we'll add LLM integration here
-    # For now, create a simple echo response
-    assistant_message = await MessageService.create_message(
-        session_id=chat_request.session_id,
-        content=f"Echo: {chat_request.message}",
-        role=MessageRole.ASSISTANT,
-        user_id=current_user.id,
-        db=db,
-        llm_model="echo-bot"
+    # User and assistant messages are written together in one transaction
+    _, assistant_message = await MessageService.create_messages(
+        chat_request.session_id,
+        current_user.id,
+        ChatService.build_exchange(chat_request.message, reply, llm_model, window),
+        db
     )
     
     return MessageResponse.model_validate(assistant_message)
@@ -164,7 +236,7 @@ async def send_message(
 @router.delete("/messages/{message_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_message(
     message_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a message"""
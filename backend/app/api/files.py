@@ -1,6 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+import uuid
+
+
+from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.schemas.auth import UserPrincipal
+from app.schemas.file import FileResponse, FileUploadResponse, UploadCreate, UploadStatus
+from app.services.file_service import FileService
 
 
 router = APIRouter()
@@ -8,7 +16,97 @@ router = APIRouter()
 
 
 
-@router.post("/upload")
-async def upload_file(current_user: User = Depends(get_current_user)):
-    """Upload a file"""
-    return {"message": "File upload endpoint - coming soon"}
\ No newline at end of file
+@router.post("/upload", response_model=FileUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_file(
+    request: Request,
+    filename: str = Query(..., max_length=500),
+    in_library: bool = True,
+    vector_store_id: Optional[uuid.UUID] = None,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload a file
+    
+    Send the raw file as the request body with its name in `filename`; the
+    body is streamed to storage rather than parsed as a multipart form.
+    With `vector_store_id` the file is indexed into that store once its
+    content has been extracted.
+    """
+    content_length = request.headers.get("content-length")
+    new_file = await FileService.save_upload(
+        request.stream(),
+        filename,
+        request.headers.get("content-type"),
+        current_user.id,
+        db,
+        content_length=int(content_length) if content_length and content_length.isdigit() else None,
+        in_library=in_library,
+        vector_store_id=vector_store_id
+    )
+    return FileUploadResponse(file=FileResponse.model_validate(new_file))
+
+
+
+@router.post("/uploads", response_model=UploadStatus, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload_data: UploadCreate,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Start a resumable upload
+    
+    Send the file as one or more PATCH requests, in any order and in
+    parallel, then complete it. Check the status to resume after a failure.
+    """
+    return await FileService.create_upload(upload_data, current_user.id, db)
+
+
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadStatus)
+async def get_upload_status(
+    upload_id: uuid.UUID,
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Get the received offset and missing byte ranges of an upload"""
+    return await FileService.get_upload_status(upload_id, current_user.id)
+
+
+
+
+@router.patch("/uploads/{upload_id}", response_model=UploadStatus)
+async def upload_part(
+    upload_id: uuid.UUID,
+    request: Request,
+    upload_offset: int = Header(..., ge=0),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Write the raw request body at the byte offset in the `Upload-Offset` header"""
+    return await FileService.write_upload_part(upload_id, upload_offset, request.stream(), current_user.id)
+
+
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=FileUploadResponse, status_code=status.HTTP_201_CREATED)
+async def complete_upload(
+    upload_id: uuid.UUID,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Finish an upload once every byte has been received"""
+    new_file = await FileService.complete_upload(upload_id, current_user.id, db)
+    return FileUploadResponse(file=FileResponse.model_validate(new_file))
+
+
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_upload(
+    upload_id: uuid.UUID,
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """Abort an upload and discard its data"""
+    await FileService.cancel_upload(upload_id, current_user.id)
+    return None
\ No newline at end of file
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.schemas.auth import UserPrincipal
 
 
 router = APIRouter()
@@ -9,6 +9,6 @@ router = APIRouter()
 
 
 @router.get("/")
-async def list_library(current_user: User = Depends(get_current_user)):
+async def list_library(current_user: UserPrincipal = Depends(get_current_user)):
     """List all files in library"""
     return {"message": "Library endpoint - coming soon"}
\ No newline at end of file
@@ -4,9 +4,10 @@ from typing import List
 import uuid
 
 
+from app.core.pagination import PageParams, page_params
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.schemas.auth import UserPrincipal
 from app.schemas.project import (
     ProjectCreate,
     ProjectUpdate,
@@ -24,7 +25,7 @@ router = APIRouter()
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
     project_data: ProjectCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new project"""
@@ -35,11 +36,17 @@ async def create_project(
 
 @router.get("/", response_model=List[ProjectResponse])
 async def list_projects(
-    current_user: User = Depends(get_current_user),
+    page: PageParams = Depends(page_params),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all projects for the current user"""
-    return await ProjectService.get_user_projects(current_user.id, db)
+    """
+    List projects for the current user, most recently updated first
+    
+    Pass the `X-Next-Cursor` response header back as `cursor` to get the next page.
+    """
+    result = await ProjectService.get_user_projects(current_user.id, db, page.limit, page.cursor)
+    return result.to_response()
 
 
 
@@ -47,17 +54,11 @@ async def list_projects(
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get a specific project"""
-    project = await ProjectService.get_project_by_id(project_id, current_user.id, db)
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    return ProjectResponse.model_validate(project)
+    return await ProjectService.get_project_cached(project_id, current_user.id, db)
 
 
 
@@ -66,7 +67,7 @@ async def get_project(
 async def update_project(
     project_id: uuid.UUID,
     project_data: ProjectUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Update a project"""
@@ -79,7 +80,7 @@ async def update_project(
 async def rename_project(
     project_id: uuid.UUID,
     rename_data: ProjectRename,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Rename a project"""
@@ -92,7 +93,7 @@ async def rename_project(
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(
     project_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a project"""
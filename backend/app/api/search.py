@@ -1,6 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+import uuid
+
+
+from app.config import settings
+from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.schemas.auth import UserPrincipal
+from app.schemas.search import DocumentHit
+from app.services.project_service import ProjectService
+from app.services.rag_service import RAGService
 
 
 router = APIRouter()
@@ -9,6 +19,30 @@ router = APIRouter()
 
 
 @router.get("/")
-async def search_web(current_user: User = Depends(get_current_user)):
+async def search_web(current_user: UserPrincipal = Depends(get_current_user)):
     """Search the web"""
-    return {"message": "Web search endpoint - coming soon"}
\ No newline at end of file
+    return {"message": "Web search endpoint - coming soon"}
+
+
+
+
+@router.get("/documents", response_model=List[DocumentHit])
+async def search_documents(
+    project_id: uuid.UUID,
+    q: str = Query(..., min_length=1, max_length=1000),
+    top_k: int = Query(settings.RAG_TOP_K, ge=1, le=50),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search a project's documents
+    
+    Full-text and semantic matches across the project's vector stores,
+    merged with reciprocal rank fusion, best first. `q` accepts web search
+    syntax for the full-text side: quoted phrases, OR and -exclusions.
+    """
+    await ProjectService.get_project_cached(project_id, current_user.id, db)
+    vector_store_ids = await RAGService.project_vector_store_ids(project_id, db)
+    if not vector_store_ids:
+        return []
+    return await RAGService.hybrid_search(q, vector_store_ids, db, top_k=top_k)
\ No newline at end of file
@@ -1,23 +1,127 @@
 import redis.asyncio as redis
-from typing import Optional, Any
-import json
+from redis.exceptions import RedisError
+from collections import OrderedDict
+import asyncio
+import itertools
+from datetime import date, datetime
+from typing import Optional, Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+import orjson
+import time
+import uuid
 from app.config import settings
 
+try:
+    import msgpack
+except ImportError:  # optional, only needed for CACHE_SERIALIZER=msgpack
+    msgpack = None
+
 
 _redis_client: Optional[redis.Redis] = None
 
+# A namespace is a (scope, id) pair such as ("user", user_id). Its version
+# counter is embedded in every key stored under it, so bumping the counter
+# invalidates them all at once. Counters outlive any cached value, so a
+# counter never expires and restarts from 0 while old entries are still live.
+Namespace = Tuple[str, Any]
+NAMESPACE_VERSION_TTL = 7 * 24 * 3600
+
+# Namespace invalidations are broadcast here so every worker drops its
+# in-process copies (see cache_read_through_local)
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry.
+    Sits in front of Redis for hot keys; entries are per worker process.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get a live value, or None if missing or expired"""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full"""
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def delete(self, key: str):
+        """Remove a value if present"""
+        self._data.pop(key, None)
+    
+    def clear(self):
+        """Remove all values"""
+        self._data.clear()
+
+
+
+
+def _msgpack_default(value: Any) -> Any:
+    # Same representation orjson uses, so both serializers return equal values
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+
+
+def _select_serializer(name: str) -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    if name == "json":
+        return orjson.dumps, orjson.loads
+    if name == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("CACHE_SERIALIZER=msgpack requires the msgpack package")
+        return (
+            lambda value: msgpack.packb(value, default=_msgpack_default, use_bin_type=True),
+            lambda raw: msgpack.unpackb(raw, raw=False),
+        )
+    raise ValueError(f"Unknown CACHE_SERIALIZER: {name}")
+
+
+# Values are stored as bytes; switching serializers needs a cache flush
+_dumps, _loads = _select_serializer(settings.CACHE_SERIALIZER)
+
 
 
 
 async def get_redis() -> redis.Redis:
-    """Get Redis client instance"""
+    """
+    Get Redis client instance.
+    Responses are not decoded so values can be binary (msgpack); the pool
+    blocks for up to REDIS_POOL_TIMEOUT when all connections are busy
+    instead of failing immediately.
+    """
     global _redis_client
     if _redis_client is None:
-        _redis_client = redis.from_url(
+        pool = redis.BlockingConnectionPool.from_url(
             settings.REDIS_URL,
-            encoding="utf-8",
-            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            decode_responses=False,
         )
+        _redis_client = redis.Redis(connection_pool=pool)
     return _redis_client
 
 
@@ -28,21 +132,45 @@ async def cache_get(key: str) -> Optional[Any]:
     client = await get_redis()
     value = await client.get(key)
     if value:
-        return json.loads(value)
+        return _loads(value)
     return None
 
 
 
 
 async def cache_set(key: str, value: Any, ttl: int = settings.REDIS_CACHE_TTL) -> bool:
-    """Set value in cache with TTL"""
+    """Set value in cache with TTL (UUIDs, datetimes and enums are stored as strings)"""
     client = await get_redis()
-    serialized = json.dumps(value)
+    serialized = _dumps(value)
     return await client.setex(key, ttl, serialized)
 
 
 
 
+async def cache_get_many(keys: Sequence[str]) -> List[Optional[Any]]:
+    """Get several values in one MGET round trip; missing keys come back as None"""
+    if not keys:
+        return []
+    client = await get_redis()
+    values = await client.mget(keys)
+    return [_loads(value) if value else None for value in values]
+
+
+
+
+async def cache_set_many(items: Dict[str, Any], ttl: int = settings.REDIS_CACHE_TTL):
+    """Set several values with TTL in one pipelined round trip"""
+    if not items:
+        return
+    client = await get_redis()
+    async with client.pipeline(transaction=False) as pipe:
+        for key, value in items.items():
+            pipe.setex(key, ttl, _dumps(value))
+        await pipe.execute()
+
+
+
+
 async def cache_delete(key: str) -> bool:
     """Delete value from cache"""
     client = await get_redis()
@@ -51,13 +179,221 @@ async def cache_delete(key: str) -> bool:
 
 
 
-async def cache_clear_pattern(pattern: str) -> int:
-    """Clear all keys matching pattern"""
+async def cache_clear_pattern(pattern: str, batch_size: int = 500) -> int:
+    """
+    Clear all keys matching pattern.
+    Walks the keyspace with incremental SCAN and frees memory with UNLINK, so
+    Redis keeps serving other clients; prefer namespace invalidation, this is
+    for one-off sweeps.
+    """
     client = await get_redis()
-    keys = await client.keys(pattern)
-    if keys:
-        return await client.delete(*keys)
-    return 0
+    removed = 0
+    batch = []
+    async for key in client.scan_iter(match=pattern, count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            removed += await client.unlink(*batch)
+            batch = []
+    if batch:
+        removed += await client.unlink(*batch)
+    return removed
+
+
+
+
+# Per-worker tier of the read-through cache. Local keys embed a per-namespace
+# generation that an invalidation replaces, which drops the whole namespace
+# in O(1); orphaned entries age out of the LRU. If a generation record is
+# evicted or a broadcast is missed, entries still expire after LOCAL_CACHE_TTL.
+_local_cache = LocalCache(maxsize=settings.LOCAL_CACHE_SIZE, ttl=settings.LOCAL_CACHE_TTL)
+_local_generations = LocalCache(maxsize=settings.LOCAL_CACHE_SIZE, ttl=settings.LOCAL_CACHE_TTL)
+_generation_counter = itertools.count(1)
+_listener_task: Optional[asyncio.Task] = None
+
+
+
+
+def _namespace_id(namespace: Namespace) -> str:
+    scope, scope_id = namespace
+    return f"{scope}:{scope_id}"
+
+
+
+
+def _namespace_version_key(namespace: Namespace) -> str:
+    return f"ns:{_namespace_id(namespace)}"
+
+
+
+
+def _local_key(namespace: Namespace, key: str) -> str:
+    namespace_id = _namespace_id(namespace)
+    return f"{namespace_id}:g{_local_generations.get(namespace_id) or 0}:{key}"
+
+
+
+
+def _expire_local_namespace(namespace_id: str):
+    _local_generations.set(namespace_id, next(_generation_counter))
+
+
+
+
+async def cache_namespace_key(namespace: Namespace, key: str) -> str:
+    """Full cache key for `key` under the current version of a namespace"""
+    client = await get_redis()
+    version = await client.get(_namespace_version_key(namespace))
+    scope, scope_id = namespace
+    return f"{scope}:{scope_id}:v{int(version or 0)}:{key}"
+
+
+
+
+async def cache_invalidate_namespaces(*namespaces: Namespace):
+    """
+    Invalidate every key under the given namespaces with one INCR each, and
+    tell every worker to drop its in-process copies.
+    Stale entries are never read again and expire by their own TTL. Redis
+    errors are swallowed: entries then live until their TTL instead.
+    """
+    for namespace in namespaces:
+        _expire_local_namespace(_namespace_id(namespace))
+    try:
+        client = await get_redis()
+        async with client.pipeline(transaction=False) as pipe:
+            for namespace in namespaces:
+                version_key = _namespace_version_key(namespace)
+                pipe.incr(version_key)
+                pipe.expire(version_key, NAMESPACE_VERSION_TTL)
+                pipe.publish(INVALIDATION_CHANNEL, _namespace_id(namespace))
+            await pipe.execute()
+    except RedisError:
+        pass
+
+
+
+
+async def cache_read_through(
+    namespace: Namespace,
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: int = settings.REDIS_CACHE_TTL,
+) -> Any:
+    """
+    Return the cached value for `key` in a namespace, or load, cache and return it.
+    The loader's result must be JSON-serializable; if Redis is unavailable
+    the loader is called directly.
+    """
+    try:
+        full_key = await cache_namespace_key(namespace, key)
+        cached = await cache_get(full_key)
+    except RedisError:
+        return await loader()
+    if cached is not None:
+        return cached
+    
+    value = await loader()
+    if value is None:
+        return None
+    try:
+        await cache_set(full_key, value, ttl)
+    except RedisError:
+        pass
+    return value
+
+
+
+
+async def cache_read_through_local(
+    namespace: Namespace,
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: int = settings.REDIS_CACHE_TTL,
+) -> Any:
+    """
+    Two-tier read-through: this worker's LRU, then Redis, then the loader.
+    For hot, rarely-changing objects. Values are shared between callers and
+    must not be mutated.
+    """
+    # Resolved before awaiting, so a value loaded while an invalidation
+    # arrives is stored under the old generation and never served
+    local_key = _local_key(namespace, key)
+    value = _local_cache.get(local_key)
+    if value is not None:
+        return value
+    
+    value = await cache_read_through(namespace, key, loader, ttl)
+    if value is not None:
+        _local_cache.set(local_key, value)
+    return value
+
+
+
+
+def _subscriber_client() -> redis.Redis:
+    """
+    Dedicated client for the invalidation subscription.
+    A quiet channel is normal, so reads have no socket timeout; the health
+    check pings the connection instead, so a dead link still surfaces.
+    """
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        socket_timeout=None,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        decode_responses=False,
+    )
+
+
+
+
+async def _listen_for_invalidations():
+    delay = 1.0
+    while True:
+        try:
+            client = _subscriber_client()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Broadcasts sent while we were not subscribed are lost
+                _local_cache.clear()
+                delay = 1.0
+                while True:
+                    # None means the channel was idle for the whole wait
+                    message = await pubsub.get_message(timeout=settings.REDIS_HEALTH_CHECK_INTERVAL)
+                    if message is not None:
+                        _expire_local_namespace(message["data"].decode())
+            finally:
+                await pubsub.close()
+                await client.close()
+        except RedisError:
+            # Only a broken subscription gets here; idle waits return None above
+            _local_cache.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+
+
+async def start_cache_invalidation_listener():
+    """Subscribe this worker to namespace invalidations from all workers"""
+    global _listener_task
+    if _listener_task is None:
+        _listener_task = asyncio.create_task(_listen_for_invalidations())
+
+
+
+
+async def stop_cache_invalidation_listener():
+    """Stop the invalidation subscriber"""
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
 
 
 
@@ -66,4 +402,5 @@ async def close_redis():
     """Close Redis connection"""
     global _redis_client
     if _redis_client:
-        await _redis_client.close()
\ No newline at end of file
+        await _redis_client.close(close_connection_pool=True)
+        _redis_client = None
\ No newline at end of file
@@ -19,12 +19,31 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_CACHE_TTL: int = 3600
+    REDIS_MAX_CONNECTIONS: int = 50  # per worker process
+    REDIS_POOL_TIMEOUT: float = 5.0  # wait for a free connection before erroring
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    CACHE_SERIALIZER: str = "json"  # "json" (orjson) or "msgpack" (requires msgpack)
+    
+    # In-process tier of the read-through cache (invalidated via Redis pub/sub)
+    LOCAL_CACHE_SIZE: int = 10000
+    LOCAL_CACHE_TTL: int = 30  # upper bound on staleness if an invalidation is missed
+    LIST_CACHE_TTL: int = 300  # cached session/project list pages (invalidated on write)
     
     # JWT Authentication
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     
+    # Password hashing (bcrypt on a bounded thread pool)
+    BCRYPT_ROUNDS: int = 12  # changing this rehashes passwords on next login
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # queued hashes beyond this get a 503
+    
+    # Authenticated-user cache (in-process LRU in front of Redis)
+    AUTH_CACHE_TTL: int = 300  # Redis tier, seconds
+    
     # LLM Providers - Azure OpenAI
     AZURE_OPENAI_ENDPOINT: Optional[str] = None
     AZURE_OPENAI_API_KEY: Optional[str] = None
@@ -33,18 +52,107 @@ class Settings(BaseSettings):
     # Azure AI Foundry (for Deepseek & Grok)
     AZURE_AI_FOUNDRY_ENDPOINT: Optional[str] = None
     AZURE_AI_FOUNDRY_API_KEY: Optional[str] = None
+    AZURE_AI_FOUNDRY_API_VERSION: str = "2024-05-01-preview"
     
     # AWS Bedrock (for Claude)
     AWS_REGION: str = "us-east-1"
     AWS_ACCESS_KEY_ID: Optional[str] = None
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
     
+    # LLM provider clients (one pooled client per provider per process)
+    LLM_DEFAULT_MODEL: str = "gpt-4o"
+    PROVIDER_HTTP2: bool = False  # requires httpx[http2]
+    PROVIDER_MAX_CONNECTIONS: int = 100
+    PROVIDER_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    PROVIDER_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    PROVIDER_CONNECT_TIMEOUT: float = 5.0
+    PROVIDER_READ_TIMEOUT: float = 120.0
+    
+    # Mock provider (offline development and benchmarks only; never in production,
+    # where it would answer every request with canned text)
+    MOCK_PROVIDER_ENABLED: bool = False
+    MOCK_PROVIDER_LATENCY_MS: int = 200  # time to first token
+    MOCK_PROVIDER_TOKENS_PER_SECOND: float = 50.0
+    MOCK_PROVIDER_REPLY_TOKENS: int = 64
+    
+    # Prompt context assembly
+    CONTEXT_RESPONSE_RESERVE_TOKENS: int = 2048  # kept free for the model's reply
+    CONTEXT_MAX_MESSAGES: int = 500  # hard cap on history rows read per prompt
+    
+    # Council mode
+    COUNCIL_MODELS: list[str] = ["gpt-4o", "anthropic.claude-3-5-sonnet-20240620-v1:0", "deepseek-chat"]
+    COUNCIL_MEMBER_DEADLINE_S: float = 60.0
+    COUNCIL_HEDGE_ENABLED: bool = False
+    COUNCIL_HEDGE_MODEL: Optional[str] = None  # duplicate target for slow members
+    COUNCIL_HEDGE_PERCENTILE: float = 95.0  # time-to-first-token percentile that triggers a hedge
+    COUNCIL_HEDGE_MIN_SAMPLES: int = 20
+    
     # File Storage
     UPLOAD_DIR: str = "./uploads"
     MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024  # 100MB
+    UPLOAD_WRITE_BLOCK_BYTES: int = 1024 * 1024  # upload data buffered per disk write
+    UPLOAD_SESSION_TTL: int = 24 * 3600  # resumable uploads expire this long after their last part
+    UPLOAD_COMPLETE_WAIT_S: float = 30.0  # completing waits this long for in-flight parts
+    UPLOAD_MAX_OPEN_PER_USER: int = 20  # resumable uploads a user may have in progress
+    UPLOAD_SWEEP_INTERVAL_S: int = 3600  # abandoned .part files are removed this often
+    BLOB_ORPHAN_GRACE_S: int = 3600  # unreferenced blobs are kept this long before sweeping
+    BLOB_SWEEP_INTERVAL_S: int = 900
+    BLOB_SWEEP_BATCH_SIZE: int = 500
+    
+    # Background jobs (python -m app.worker)
+    JOB_STREAM_MAXLEN: int = 100_000
+    JOB_VISIBILITY_TIMEOUT_S: int = 300  # a job not extended for this long is redelivered
+    JOB_MAX_ATTEMPTS: int = 3  # then the job goes to the dead-letter stream
+    JOB_READ_BLOCK_MS: int = 2000  # keep below REDIS_SOCKET_TIMEOUT
+    JOB_WORKER_CONCURRENCY: int = 8  # jobs in flight per worker
+    JOB_WORKER_PROCESSES: Optional[int] = None  # CPU-bound pool size; defaults to the CPU count
+    JOB_RECONCILE_INTERVAL_S: int = 300  # how often workers look for files stuck in PENDING
+    JOB_RECONCILE_AFTER_S: int = 900  # a file PENDING this long without a job is requeued
+    JOB_RECONCILE_BATCH_SIZE: int = 500
+    JOB_MARKER_TTL_S: int = 86400  # how long enqueued and running jobs stay recorded for deduplication
+    
+    # OCR (tesseract and poppler-utils on the worker hosts)
+    OCR_LANGUAGE: str = "eng"  # tesseract language, e.g. "eng+deu"
+    OCR_DPI: int = 300
+    OCR_PAGE_TIMEOUT_S: int = 300
+    OCR_CACHE_DIR: str = "./ocr_cache"  # page texts by rendered-page hash
+    OCR_CACHE_TTL_S: int = 24 * 3600  # page entries unused for this long are removed
+    OCR_CACHE_SWEEP_INTERVAL_S: int = 3600
+    OCR_PROGRESS_PAGES: int = 10  # the recognised prefix is saved every this many pages
+    
+    # Streaming
+    STREAM_FLUSH_INTERVAL_MS: int = 50  # max time a token waits before being flushed
+    STREAM_MAX_BATCH_CHARS: int = 512
+    STREAM_QUEUE_SIZE: int = 256  # tokens buffered ahead of a slow client
+    
+    # List pagination
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 200
     
     # Vector Store
     VECTOR_DIMENSION: int = 1536  # OpenAI embeddings default
+    VECTOR_INDEX_TYPE: str = "hnsw"  # "hnsw" (pgvector >= 0.5) or "ivfflat"; see scripts/rebuild_vector_index.py
+    VECTOR_INDEX_PRECISION: str = "full"  # "full", "half" (halfvec) or "binary" (bit); half/binary need pgvector >= 0.7
+    VECTOR_RESCORE_MULTIPLIER: int = 4  # half/binary: candidates rescored at full precision per result; ~10 for binary
+    VECTOR_HNSW_M: int = 16
+    VECTOR_HNSW_EF_CONSTRUCTION: int = 64
+    VECTOR_HNSW_EF_SEARCH: int = 40  # default candidate list per search; higher = better recall, slower
+    VECTOR_IVFFLAT_LISTS: Optional[int] = None  # derived from row count when unset
+    VECTOR_IVFFLAT_PROBES: int = 10  # default lists scanned per search
+    RAG_TOP_K: int = 8
+    RAG_HYBRID_CANDIDATES: int = 40  # per-retriever candidates before rank fusion
+    RAG_RRF_K: int = 60  # reciprocal rank fusion constant
+    VECTOR_LOCAL_SEARCH_MAX_CHUNKS: int = 5000  # exact in-process search at or below this; see scripts/bench_vector_engine.py
+    VECTOR_MATRIX_CACHE_DIR: str = "./vector_cache"
+    VECTOR_LOCAL_MATRICES: int = 64  # matrices each worker keeps open (LRU)
+    VECTOR_MATRIX_GRACE_S: int = 300  # superseded matrix files are kept this long for readers still on them
+    
+    # Document ingestion
+    INGEST_READ_BLOCK_BYTES: int = 1024 * 1024
+    INGEST_CHUNK_CHARS: int = 2000  # ~500 tokens
+    INGEST_CHUNK_OVERLAP_CHARS: int = 200
+    INGEST_EMBED_BATCH_SIZE: int = 64  # chunks per embedding request and per INSERT
+    EMBEDDING_CACHE_TTL: int = 7 * 24 * 3600  # Redis front of the embedding_cache table
     
     # API Settings
     CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:3000"]
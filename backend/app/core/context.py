@@ -0,0 +1,236 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from fastapi import HTTPException, status
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import uuid
+
+
+from app.config import settings
+from app.models.message import Message
+from app.models.project import Project
+from app.models.session import Session, SessionMode
+from app.providers import ChatMessage
+
+
+# Context window sizes by model name prefix (longest matching prefix wins)
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4o": 128000,
+    "gpt-4.1": 1000000,
+    "gpt-4": 8192,
+    "gpt-35": 16385,
+    "o1": 128000,
+    "o3": 200000,
+    "o4": 200000,
+    "claude": 200000,
+    "anthropic.": 200000,
+    "us.anthropic.": 200000,
+    "deepseek": 64000,
+    "grok": 131072,
+    "mistral": 32000,
+    "llama": 128000,
+    "phi": 128000,
+    "mock": 8192,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Rough per-message framing overhead (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Cheap token estimate (~4 characters per token) plus message framing"""
+    return len(text or "") // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+
+
+def context_budget(llm_model: str) -> int:
+    """Prompt tokens available for a model after reserving room for the reply"""
+    model = llm_model.lower()
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+    window = MODEL_CONTEXT_WINDOWS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+    return max(window - settings.CONTEXT_RESPONSE_RESERVE_TOKENS, 0)
+
+
+
+
+# Stored size of a message. Assistant rows record their own length in
+# completion_tokens; user rows record their own length in prompt_tokens.
+# Rows written before counts were stored fall back to the estimate above.
+message_tokens = func.coalesce(
+    Message.completion_tokens,
+    Message.prompt_tokens,
+    func.length(Message.content) / 4 + MESSAGE_OVERHEAD_TOKENS,
+)
+
+
+
+
+@dataclass
+class SessionContextHeader:
+    """Session metadata needed to assemble a prompt"""
+    session_id: uuid.UUID
+    mode: SessionMode
+    llm_model: Optional[str]
+    system_prompt: Optional[str]
+    settings: Dict[str, Any]
+    context_summary: Optional[str]
+    summary_sequence: Optional[int]
+    summary_content: Optional[str]
+
+
+
+
+@dataclass
+class ContextWindow:
+    """Prompt messages that fit the budget, oldest first"""
+    messages: List[ChatMessage] = field(default_factory=list)
+    token_count: int = 0
+    # True when older history (after the latest summary) was left out
+    truncated: bool = False
+
+
+
+
+def _summary_message(summary: str) -> ChatMessage:
+    return ChatMessage(role="system", content=f"Summary of the earlier conversation:\n{summary}")
+
+
+
+
+class ContextBuilder:
+    """
+    Assembles prompts from the newest messages that fit a token budget.
+    
+    History is read newest-first with a running token total computed in SQL,
+    so only the rows that fit are transferred and cost stays flat as a
+    session grows. Anything older than the latest summary is represented by
+    the summary instead of being read at all.
+    """
+    
+    @staticmethod
+    async def load_header(
+        session_id: uuid.UUID,
+        user_id: uuid.UUID,
+        db: AsyncSession
+    ) -> SessionContextHeader:
+        """Load session settings, project defaults and the latest summary in one query"""
+        latest_summary = (
+            select(Message.sequence, Message.content)
+            .where(Message.session_id == Session.id, Message.is_summary.is_(True))
+            .order_by(Message.sequence.desc())
+            .limit(1)
+            .correlate(Session)
+        )
+        result = await db.execute(
+            select(
+                Session.id,
+                Session.mode,
+                func.coalesce(Session.llm_model, Project.default_llm_model).label("llm_model"),
+                func.coalesce(Session.system_prompt, Project.default_system_prompt).label("system_prompt"),
+                Session.settings,
+                Session.context_summary,
+                latest_summary.with_only_columns(Message.sequence).scalar_subquery().label("summary_sequence"),
+                latest_summary.with_only_columns(Message.content).scalar_subquery().label("summary_content"),
+            )
+            .outerjoin(Project, Project.id == Session.project_id)
+            .where(Session.id == session_id, Session.user_id == user_id)
+        )
+        row = result.one_or_none()
+        
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        
+        return SessionContextHeader(
+            session_id=row.id,
+            mode=row.mode,
+            llm_model=row.llm_model,
+            system_prompt=row.system_prompt,
+            settings=row.settings or {},
+            context_summary=row.context_summary,
+            summary_sequence=row.summary_sequence,
+            summary_content=row.summary_content,
+        )
+    
+    @staticmethod
+    async def build(
+        header: SessionContextHeader,
+        new_message: str,
+        budget: int,
+        db: AsyncSession
+    ) -> ContextWindow:
+        """Build the prompt for a new user message within the token budget"""
+        window = ContextWindow()
+        prefix: List[ChatMessage] = []
+        
+        if header.system_prompt:
+            prefix.append(ChatMessage(role="system", content=header.system_prompt))
+        
+        # The latest summary message stands in for everything before it.
+        # Session.context_summary records no sequence boundary, so it is only
+        # used when older history had to be left out; its tokens are reserved
+        # up front and handed back if the whole history fits.
+        fallback_summary = None
+        if header.summary_sequence is not None and header.summary_content:
+            prefix.append(_summary_message(header.summary_content))
+        elif header.context_summary:
+            fallback_summary = _summary_message(header.context_summary)
+        
+        current = ChatMessage(role="user", content=new_message)
+        reserved = estimate_tokens(fallback_summary.content) if fallback_summary else 0
+        window.token_count = sum(estimate_tokens(m.content) for m in prefix + [current])
+        remaining = budget - window.token_count - reserved
+        
+        history: List[ChatMessage] = []
+        if remaining > 0:
+            floor = header.summary_sequence if header.summary_sequence is not None else -1
+            # One row past the message cap tells a capped window from a complete one
+            running = func.sum(message_tokens).over(
+                order_by=Message.sequence.desc(),
+                rows=(None, 0),
+            )
+            recent = (
+                select(
+                    Message.role,
+                    Message.content,
+                    Message.sequence,
+                    message_tokens.label("tokens"),
+                    running.label("running_tokens"),
+                )
+                .where(
+                    Message.session_id == header.session_id,
+                    Message.sequence > floor,
+                    Message.is_summary.is_(False),
+                )
+                .order_by(Message.sequence.desc())
+                .limit(settings.CONTEXT_MAX_MESSAGES + 1)
+                .subquery()
+            )
+            # Also fetch the first row that overflows, so truncation is known exactly
+            result = await db.execute(
+                select(recent)
+                .where(recent.c.running_tokens - recent.c.tokens <= remaining)
+                .order_by(recent.c.sequence.desc())
+            )
+            rows = result.all()
+            if len(rows) > settings.CONTEXT_MAX_MESSAGES or (rows and rows[-1].running_tokens > remaining):
+                rows.pop()
+                window.truncated = True
+            
+            for row in reversed(rows):
+                history.append(ChatMessage(role=row.role.value, content=row.content))
+            if rows:
+                window.token_count += int(rows[-1].running_tokens)
+        
+        if fallback_summary is not None and window.truncated:
+            prefix.append(fallback_summary)
+            window.token_count += reserved
+        
+        window.messages = prefix + history + [current]
+        return window
\ No newline at end of file
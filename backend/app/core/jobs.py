@@ -0,0 +1,215 @@
+from redis.exceptions import ResponseError, WatchError
+from dataclasses import dataclass
+from typing import Any, Dict, List
+import orjson
+
+
+from app.cache import get_redis
+from app.config import settings
+
+
+# One stream, one consumer group: every worker process reads from the group,
+# so throughput scales with the number of workers
+JOB_STREAM = "jobs:files"
+JOB_GROUP = "file-workers"
+DEAD_LETTER_STREAM = "jobs:files:dead"
+
+
+
+
+@dataclass
+class Job:
+    """A job delivered to this consumer"""
+    id: str  # stream entry id
+    kind: str
+    payload: Dict[str, Any]
+    attempt: int  # 1 for the first run, +1 per retry or redelivery
+
+
+
+
+def _queued_key(kind: str, payload: Dict[str, Any]) -> str:
+    return f"{JOB_STREAM}:queued:{kind}:{orjson.dumps(payload, option=orjson.OPT_SORT_KEYS).decode()}"
+
+
+
+
+def _owner_key(work: str) -> str:
+    return f"{JOB_STREAM}:owner:{work}"
+
+
+
+
+async def enqueue_job(kind: str, payload: Dict[str, Any], attempt: int = 1) -> str:
+    """
+    Add a job to the stream and return its entry id. The id is also
+    recorded under the job's kind and payload for `job_queued`.
+    """
+    client = await get_redis()
+    entry_id = await client.xadd(
+        JOB_STREAM,
+        {"kind": kind, "payload": orjson.dumps(payload), "attempt": attempt},
+        maxlen=settings.JOB_STREAM_MAXLEN,
+        approximate=True
+    )
+    await client.set(_queued_key(kind, payload), entry_id, ex=settings.JOB_MARKER_TTL_S)
+    return entry_id.decode()
+
+
+
+
+async def job_queued(kind: str, payload: Dict[str, Any]) -> bool:
+    """
+    Whether the last job enqueued with this kind and payload is still in
+    the stream, waiting or running. Finished jobs are deleted from the
+    stream when acked, so a missing entry means the job is gone.
+    """
+    client = await get_redis()
+    entry_id = await client.get(_queued_key(kind, payload))
+    if entry_id is None:
+        return False
+    return bool(await client.xrange(JOB_STREAM, min=entry_id, max=entry_id, count=1))
+
+
+
+
+async def _job_running(client, entry_id: str) -> bool:
+    """Whether a job is delivered and was extended within the visibility timeout"""
+    pending = await client.xpending_range(JOB_STREAM, JOB_GROUP, min=entry_id, max=entry_id, count=1)
+    return bool(pending) and pending[0]["time_since_delivered"] < settings.JOB_VISIBILITY_TIMEOUT_S * 1000
+
+
+
+
+async def claim_work(work: str, job: Job) -> bool:
+    """
+    Record `job` as the owner of the work identified by `work`, unless
+    another job that is still running owns it; False means this job is a
+    duplicate and should stop. A redelivered job finds itself as the owner
+    and carries on, and a dead owner's work can be claimed at once.
+    """
+    client = await get_redis()
+    key = _owner_key(work)
+    async with client.pipeline(transaction=True) as pipe:
+        await pipe.watch(key)
+        owner = await pipe.get(key)
+        if owner is not None and owner.decode() != job.id and await _job_running(client, owner.decode()):
+            return False
+        pipe.multi()
+        pipe.set(key, job.id, ex=settings.JOB_MARKER_TTL_S)
+        try:
+            await pipe.execute()
+        except WatchError:
+            # Claimed by a concurrent job
+            return False
+    return True
+
+
+
+
+def _job(entry_id: bytes, fields: Dict[bytes, bytes], redeliveries: int = 0) -> Job:
+    return Job(
+        id=entry_id.decode(),
+        kind=fields[b"kind"].decode(),
+        payload=orjson.loads(fields[b"payload"]),
+        attempt=int(fields[b"attempt"]) + redeliveries
+    )
+
+
+
+
+class JobConsumer:
+    """
+    One consumer in the job group.
+    
+    A job stays pending until it is acked. If its consumer dies, or stops
+    extending it, for JOB_VISIBILITY_TIMEOUT_S it is claimed by another
+    consumer; each such redelivery counts as an attempt, so a job that
+    crashes its worker still ends up in the dead-letter stream.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    async def setup(self):
+        """Create the stream and group if they do not exist yet"""
+        client = await get_redis()
+        try:
+            await client.xgroup_create(JOB_STREAM, JOB_GROUP, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+    
+    async def read(self, count: int) -> List[Job]:
+        """
+        Up to `count` jobs: timed-out jobs from other consumers first, then
+        new ones, waiting up to JOB_READ_BLOCK_MS for the latter. A job may
+        come back with an attempt past JOB_MAX_ATTEMPTS; dead-letter it.
+        """
+        client = await get_redis()
+        jobs: List[Job] = []
+        _, claimed, *_ = await client.xautoclaim(
+            JOB_STREAM,
+            JOB_GROUP,
+            self.name,
+            min_idle_time=settings.JOB_VISIBILITY_TIMEOUT_S * 1000,
+            start_id="0-0",
+            count=count
+        )
+        for entry_id, fields in claimed:
+            if fields is None:
+                # Trimmed from the stream while pending
+                await client.xack(JOB_STREAM, JOB_GROUP, entry_id)
+                continue
+            pending = await client.xpending_range(
+                JOB_STREAM, JOB_GROUP, min=entry_id, max=entry_id, count=1
+            )
+            deliveries = pending[0]["times_delivered"] if pending else 1
+            jobs.append(_job(entry_id, fields, redeliveries=deliveries - 1))
+        
+        if len(jobs) < count:
+            response = await client.xreadgroup(
+                JOB_GROUP,
+                self.name,
+                {JOB_STREAM: ">"},
+                count=count - len(jobs),
+                block=settings.JOB_READ_BLOCK_MS
+            )
+            for _, entries in response or []:
+                jobs.extend(_job(entry_id, fields) for entry_id, fields in entries)
+        return jobs
+    
+    async def extend(self, job: Job):
+        """Reset a running job's idle time so it is not claimed by another consumer"""
+        client = await get_redis()
+        await client.xclaim(JOB_STREAM, JOB_GROUP, self.name, 0, [job.id], justid=True)
+    
+    async def ack(self, job: Job):
+        """Mark a job done and drop it from the stream"""
+        client = await get_redis()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.xack(JOB_STREAM, JOB_GROUP, job.id)
+            pipe.xdel(JOB_STREAM, job.id)
+            await pipe.execute()
+    
+    async def retry(self, job: Job):
+        """Requeue a failed job as a new entry with the next attempt number"""
+        await enqueue_job(job.kind, job.payload, job.attempt + 1)
+        await self.ack(job)
+    
+    async def dead_letter(self, job: Job, error: str):
+        """Move a job that will not succeed to the dead-letter stream"""
+        client = await get_redis()
+        await client.xadd(
+            DEAD_LETTER_STREAM,
+            {
+                "kind": job.kind,
+                "payload": orjson.dumps(job.payload),
+                "attempt": job.attempt,
+                "error": error[:2000],
+                "job_id": job.id,
+            },
+            maxlen=settings.JOB_STREAM_MAXLEN,
+            approximate=True
+        )
+        await self.ack(job)
\ No newline at end of file
@@ -0,0 +1,115 @@
+from fastapi import HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import and_, or_
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+import base64
+import json
+import uuid
+
+
+from app.config import settings
+
+
+T = TypeVar("T")
+
+# Response header carrying the cursor for the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+
+
+@dataclass
+class PageParams:
+    """Page size and opaque cursor taken from the query string"""
+    limit: int
+    cursor: Optional[str]
+
+
+
+
+def page_params(
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+) -> PageParams:
+    """Dependency for paginated list endpoints"""
+    return PageParams(limit=limit, cursor=cursor)
+
+
+
+
+@dataclass
+class Page(Generic[T]):
+    """One page of results and the cursor for the next one"""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+    def to_response(self) -> ORJSONResponse:
+        """Encode the items in one pass, with the next cursor as a response header"""
+        headers = {NEXT_CURSOR_HEADER: self.next_cursor} if self.next_cursor else None
+        return ORJSONResponse(content=self.items, headers=headers)
+
+
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row on a page as an opaque token"""
+    raw = json.dumps([_to_json(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+
+
+def decode_cursor(cursor: Optional[str], *types: type) -> Optional[Tuple[Any, ...]]:
+    """Decode a cursor back into typed values; malformed cursors are a 400"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor shape mismatch")
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else uuid.UUID(v) if t is uuid.UUID else t(v)
+            for v, t in zip(values, types)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+
+
+def before_keyset(sort_column, id_column, cursor: Tuple[datetime, uuid.UUID]):
+    """
+    Rows strictly after the cursor in (sort_column DESC, id DESC) order.
+    
+    The redundant `sort_column <= value` bound lets the planner use an
+    index on the sort column alone as the range condition.
+    """
+    value, last_id = cursor
+    return and_(
+        sort_column <= value,
+        or_(sort_column < value, id_column < last_id),
+    )
+
+
+
+
+def split_page(rows: List[T], limit: int) -> Tuple[List[T], bool]:
+    """Trim the look-ahead row fetched to detect whether another page exists"""
+    return rows[:limit], len(rows) > limit
\ No newline at end of file
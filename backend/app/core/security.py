@@ -1,13 +1,38 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import asyncio
 import hashlib
 import base64
 from app.config import settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max pinned to the configured cost so hashes made with any other cost
+# are flagged for rehash on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+# bcrypt releases the GIL, so a small dedicated pool keeps hashing off the
+# event loop without letting it starve the default executor
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_hash_in_flight = 0
+
+
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password hashes are already running or queued"""
 
 
 
@@ -41,6 +66,47 @@ def get_password_hash(password: str) -> str:
 
 
 
+async def _run_hash(fn, *args):
+    """Run a hashing call on the bounded pool, rejecting work beyond the queue limit"""
+    global _hash_in_flight
+    if _hash_in_flight >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHasherBusy()
+    _hash_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_in_flight -= 1
+
+
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password without blocking the event loop.
+    Returns (valid, new_hash); new_hash is set when the stored hash used
+    outdated cost parameters and should be replaced.
+    """
+    normalized = _normalize_password(plain_password)
+    return await _run_hash(pwd_context.verify_and_update, normalized, hashed_password)
+
+
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await _run_hash(get_password_hash, password)
+
+
+
+
+def shutdown_password_hasher():
+    """Stop the hashing pool (called on application shutdown)"""
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
+
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
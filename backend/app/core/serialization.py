@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+from typing import Any, Dict, Iterable, List, Type
+
+
+
+
+def response_columns(model, schema: Type[BaseModel]) -> list:
+    """Columns of `model` named by the fields of a response schema, in field order"""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+
+
+def row_dicts(rows: Iterable[Row]) -> List[Dict[str, Any]]:
+    """
+    Plain dicts straight from result rows
+    
+    Used by list endpoints that select exactly a response schema's columns:
+    the rows are already in response shape, so they are encoded once by
+    ORJSONResponse instead of being validated into models and serialized
+    again against `response_model`.
+    """
+    return [dict(row._mapping) for row in rows]
\ No newline at end of file
@@ -0,0 +1,142 @@
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Coroutine, Optional, Set
+import asyncio
+import contextlib
+import json
+from app.config import settings
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # stop nginx from buffering the event stream
+}
+
+
+_DONE = object()
+_background_tasks: Set[asyncio.Task] = set()
+
+
+
+
+def format_sse(data: Any, event: Optional[str] = None) -> str:
+    """Format a payload as a single Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data, default=str)}\n\n"
+
+
+
+
+def sse_response(frames: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap an iterator of SSE frames in a streaming response"""
+    return StreamingResponse(frames, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+
+
+def run_in_background(coro: Coroutine) -> asyncio.Task:
+    """
+    Run a coroutine detached from the current request.
+    Used for work that must finish even if the client disconnects mid-stream.
+    """
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+
+
+class TokenStream:
+    """
+    Bridges a token producer and a (possibly slow) HTTP consumer.
+    
+    The producer runs in its own task and fills a bounded queue, so a slow
+    client pauses the producer instead of growing memory. Tokens are
+    coalesced into batches that flush when the time window elapses or the
+    batch grows past its size limit. The first token is flushed immediately
+    to keep time-to-first-byte low.
+    """
+    
+    def __init__(
+        self,
+        source: AsyncIterator[str],
+        flush_interval: float = settings.STREAM_FLUSH_INTERVAL_MS / 1000,
+        max_batch_chars: int = settings.STREAM_MAX_BATCH_CHARS,
+        queue_size: int = settings.STREAM_QUEUE_SIZE,
+    ):
+        self.source = source
+        self.flush_interval = flush_interval
+        self.max_batch_chars = max_batch_chars
+        self.error: Optional[BaseException] = None
+        self.completed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._parts: list[str] = []
+    
+    @property
+    def text(self) -> str:
+        """Everything flushed to the client so far"""
+        return "".join(self._parts)
+    
+    async def _produce(self):
+        try:
+            async for token in self.source:
+                if token:
+                    await self._queue.put(token)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self.error = exc
+        finally:
+            # Closing the source promptly releases the upstream connection
+            aclose = getattr(self.source, "aclose", None)
+            if aclose is not None:
+                with contextlib.suppress(Exception):
+                    await aclose()
+        await self._queue.put(_DONE)
+    
+    async def _next_batch(self, first: bool) -> tuple[str, bool]:
+        """Collect one batch; returns (text, source_finished)"""
+        token = await self._queue.get()
+        if token is _DONE:
+            return "", True
+        buffer = [token]
+        size = len(token)
+        if first:
+            return token, False
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while size < self.max_batch_chars:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                token = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if token is _DONE:
+                return "".join(buffer), True
+            buffer.append(token)
+            size += len(token)
+        return "".join(buffer), False
+    
+    async def batches(self) -> AsyncIterator[str]:
+        """Yield batched text until the source is exhausted"""
+        producer = asyncio.create_task(self._produce())
+        try:
+            first = True
+            while True:
+                batch, finished = await self._next_batch(first)
+                first = False
+                if batch:
+                    self._parts.append(batch)
+                    yield batch
+                if finished:
+                    self.completed = self.error is None
+                    break
+        finally:
+            if not producer.done():
+                producer.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await producer
\ No newline at end of file
@@ -1,15 +1,12 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from typing import Optional
 import uuid
 
 
-from app.database import get_db
 from app.core.security import decode_access_token
-from app.models.user import User
-from app.schemas.auth import TokenData
+from app.schemas.auth import UserPrincipal
+from app.services.auth_service import AuthService
 
 
 security = HTTPBearer()
@@ -18,11 +15,13 @@ security = HTTPBearer()
 
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> UserPrincipal:
     """
     Dependency to get the current authenticated user from JWT token
+    
+    The principal comes from the two-tier user cache, so cache hits reach the
+    handler without a database round trip.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,11 +43,8 @@ async def get_current_user(
     except ValueError:
         raise credentials_exception
     
-    # Get user from database
-    result = await db.execute(
-        select(User).where(User.id == user_uuid)
-    )
-    user = result.scalar_one_or_none()
+    # Resolve the user principal (cached)
+    user = await AuthService.get_principal(user_uuid)
     
     if user is None:
         raise credentials_exception
@@ -65,8 +61,8 @@ async def get_current_user(
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """
     Dependency to ensure user is active
     """
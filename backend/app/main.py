@@ -1,12 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 
 from app.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.api import api_router
 from app.database import engine
-from app.cache import close_redis
+from app.cache import close_redis, start_cache_invalidation_listener, stop_cache_invalidation_listener
+from app.providers import init_providers, close_providers
+from app.services.blob_service import start_blob_sweeper, stop_blob_sweeper
+from app.services.file_service import start_upload_sweeper, stop_upload_sweeper
+from app.core.security import shutdown_password_hasher
 
 
 
@@ -20,13 +26,25 @@ async def lifespan(app: FastAPI):
     print(f"🚀 Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     print(f"📊 Database: Connected")
     print(f"🔴 Redis: Connected")
+    await init_providers()
+    print(f"🤖 LLM providers: Ready")
+    if settings.MOCK_PROVIDER_ENABLED:
+        print(f"⚠️  Mock LLM provider enabled: replies are canned text")
+    await start_cache_invalidation_listener()
+    await start_blob_sweeper()
+    await start_upload_sweeper()
     
     yield
     
     # Shutdown
     print("🛑 Shutting down...")
+    await stop_upload_sweeper()
+    await stop_blob_sweeper()
+    await stop_cache_invalidation_listener()
+    await close_providers()
     await engine.dispose()
     await close_redis()
+    shutdown_password_hasher()
     print("✅ Cleanup complete")
 
 
@@ -35,6 +53,7 @@ async def lifespan(app: FastAPI):
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -46,6 +65,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
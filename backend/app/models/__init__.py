@@ -19,7 +19,8 @@ from app.models.project import Project
 from app.models.session import Session, SessionMode
 from app.models.message import Message, MessageRole, MessageAttachment
 from app.models.file import File, FileType, FileProcessingStatus
-from app.models.vector_store import VectorStore, VectorChunk
+from app.models.blob import Blob
+from app.models.vector_store import VectorStore, VectorChunk, EmbeddingCache
 
 
 
@@ -36,6 +37,8 @@ __all__ = [
     "File",
     "FileType",
     "FileProcessingStatus",
+    "Blob",
     "VectorStore",
     "VectorChunk",
+    "EmbeddingCache",
 ]
\ No newline at end of file
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, String, Text, Integer, BigInteger, Enum, JSON, DateTime, Index, text
+from sqlalchemy.orm import relationship
+from app.database import Base
+from app.models import TimestampMixin
+from app.models.file import FileProcessingStatus
+
+
+
+
+class Blob(Base, TimestampMixin):
+    """
+    Stored file content, addressed by its SHA-256 and shared by every `File`
+    with the same bytes. Processing results live here so each distinct
+    content is extracted once.
+    
+    `ref_count` is maintained by triggers on `files` (see migration
+    5c1e7a9d2f60), so it stays right for cascade deletes that never reach
+    the ORM. Blobs unreferenced for BLOB_ORPHAN_GRACE_S are swept.
+    """
+    __tablename__ = "blobs"
+    __table_args__ = (
+        Index(
+            "ix_blobs_unreferenced_at",
+            "unreferenced_at",
+            postgresql_where=text("ref_count = 0")
+        ),
+    )
+
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    mime_type = Column(String(255), nullable=False)
+    storage_path = Column(String(1000), nullable=False)
+    
+    ref_count = Column(Integer, default=0, nullable=False)
+    unreferenced_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Processing results shared by every referencing file
+    processing_status = Column(Enum(FileProcessingStatus), default=FileProcessingStatus.PENDING, nullable=False)
+    extracted_text = Column(Text, nullable=True)
+    transcription = Column(Text, nullable=True)
+    meta = Column(JSON, default=dict, nullable=False)
+    
+    # Relationships
+    files = relationship("File", back_populates="blob", passive_deletes=True)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Integer, Enum, JSON, Boolean
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, Enum, JSON, Boolean, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -32,6 +32,15 @@ class FileProcessingStatus(str, enum.Enum):
 
 class File(Base, TimestampMixin):
     __tablename__ = "files"
+    __table_args__ = (
+        Index("ix_files_user_id_in_library_created_at", "user_id", "in_library", "created_at"),
+        Index("ix_files_blob_sha256", "blob_sha256"),
+        Index(
+            "ix_files_pending_updated_at",
+            "updated_at",
+            postgresql_where=text("processing_status = 'PENDING'")
+        ),
+    )
 
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -41,6 +50,9 @@ class File(Base, TimestampMixin):
     original_filename = Column(String(500), nullable=False)
     file_path = Column(String(1000), nullable=False)
     
+    # Content-addressed storage; null for files uploaded before blobs existed
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=True)
+    
     file_type = Column(Enum(FileType), nullable=False)
     mime_type = Column(String(255), nullable=False)
     file_size = Column(Integer, nullable=False)  # in bytes
@@ -63,5 +75,6 @@ class File(Base, TimestampMixin):
     
     # Relationships
     user = relationship("User", back_populates="files")
+    blob = relationship("Blob", back_populates="files")
     message_attachments = relationship("MessageAttachment", back_populates="file", cascade="all, delete-orphan")
     vector_chunks = relationship("VectorChunk", back_populates="file", cascade="all, delete-orphan")
\ No newline at end of file
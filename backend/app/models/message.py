@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, JSON, Enum, Integer, Boolean
+from sqlalchemy import Column, String, Text, ForeignKey, JSON, Enum, Integer, Boolean, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -20,6 +20,11 @@ class MessageRole(str, enum.Enum):
 
 class Message(Base, TimestampMixin):
     __tablename__ = "messages"
+    __table_args__ = (
+        UniqueConstraint("session_id", "sequence", name="uq_messages_session_id_sequence"),
+    )
+    # Fetch server defaults (timestamps) via INSERT ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
 
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -50,7 +55,7 @@ class Message(Base, TimestampMixin):
     
     # Relationships
     session = relationship("Session", back_populates="messages")
-    attachments = relationship("MessageAttachment", back_populates="message", cascade="all, delete-orphan")
+    attachments = relationship("MessageAttachment", back_populates="message", cascade="all, delete-orphan", passive_deletes=True)
 
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, ForeignKey, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import relationship
 import uuid
@@ -10,6 +10,9 @@ from app.models import TimestampMixin
 
 class Project(Base, TimestampMixin):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_user_id_updated_at", "user_id", "updated_at"),
+    )
 
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, JSON, Enum
+from sqlalchemy import Column, String, Text, ForeignKey, JSON, Enum, Integer, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -22,6 +22,10 @@ class SessionMode(str, enum.Enum):
 
 class Session(Base, TimestampMixin):
     __tablename__ = "sessions"
+    __table_args__ = (
+        Index("ix_sessions_user_id_updated_at", "user_id", "updated_at"),
+        Index("ix_sessions_project_id", "project_id"),
+    )
 
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -41,7 +45,10 @@ class Session(Base, TimestampMixin):
     # Context management
     context_summary = Column(Text, nullable=True)
     
+    # Highest message sequence allocated so far (see MessageService.allocate_sequences)
+    last_sequence = Column(Integer, default=-1, server_default=text("-1"), nullable=False)
+    
     # Relationships
     user = relationship("User", back_populates="sessions")
     project = relationship("Project", back_populates="sessions")
-    messages = relationship("Message", back_populates="session", cascade="all, delete-orphan", order_by="Message.created_at")
\ No newline at end of file
+    messages = relationship("Message", back_populates="session", cascade="all, delete-orphan", passive_deletes=True, order_by="Message.sequence")
\ No newline at end of file
@@ -1,11 +1,13 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Integer, JSON, Index
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, JSON, Index, Computed, DateTime
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from pgvector.sqlalchemy import Vector
 import uuid
 from app.database import Base
 from app.models import TimestampMixin
 from app.config import settings
+from app.utils.vector_utils import TEXT_SEARCH_CONFIG, VECTOR_INDEX_NAME, vector_index_params, vector_index_target
 
 
 
@@ -27,6 +29,9 @@ class VectorStore(Base, TimestampMixin):
     # Embedding model used
     embedding_model = Column(String(100), nullable=False, default="text-embedding-ada-002")
     
+    # Bumped whenever the store's chunks change; keys in-process search matrices
+    chunk_version = Column(Integer, nullable=False, default=0, server_default="0")
+    
     # Metadata for filtering - renamed to 'meta'
     meta = Column(JSON, default=dict, nullable=False)
     
@@ -39,6 +44,10 @@ class VectorStore(Base, TimestampMixin):
 
 class VectorChunk(Base, TimestampMixin):
     __tablename__ = "vector_chunks"
+    __table_args__ = (
+        Index("ix_vector_chunks_vector_store_id_chunk_index", "vector_store_id", "chunk_index"),
+        Index("ix_vector_chunks_content_tsv", "content_tsv", postgresql_using="gin"),
+    )
 
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -48,6 +57,9 @@ class VectorChunk(Base, TimestampMixin):
     # Content
     content = Column(Text, nullable=False)
     
+    # Full-text search vector, maintained by Postgres from `content`
+    content_tsv = Column(TSVECTOR, Computed(f"to_tsvector('{TEXT_SEARCH_CONFIG}', content)", persisted=True))
+    
     # Vector embedding
     embedding = Column(Vector(settings.VECTOR_DIMENSION), nullable=False)
     
@@ -65,11 +77,31 @@ class VectorChunk(Base, TimestampMixin):
 
 
 
-# Create index for vector similarity search
+class EmbeddingCache(Base):
+    """
+    Embeddings by content, shared by every store and project.
+    Keyed by the model and the SHA-256 of the normalized text, so identical
+    chunks are embedded once per model however often they are ingested.
+    """
+    __tablename__ = "embedding_cache"
+
+
+    embedding_model = Column(String(100), primary_key=True)
+    content_hash = Column(String(64), primary_key=True)
+    embedding = Column(Vector(settings.VECTOR_DIMENSION), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+
+
+# ANN index for vector similarity search. The type and precision are chosen
+# per deployment (VECTOR_INDEX_TYPE, VECTOR_INDEX_PRECISION); live databases
+# size and build it with scripts/rebuild_vector_index.py
+_ann_expression, _ann_ops = vector_index_target(VectorChunk.embedding)
 Index(
-    'idx_vector_chunks_embedding',
-    VectorChunk.embedding,
-    postgresql_using='ivfflat',
-    postgresql_with={'lists': 100},
-    postgresql_ops={'embedding': 'vector_cosine_ops'}
+    VECTOR_INDEX_NAME,
+    _ann_expression,
+    postgresql_using=settings.VECTOR_INDEX_TYPE,
+    postgresql_with=vector_index_params(),
+    postgresql_ops=_ann_ops
 )
\ No newline at end of file
@@ -0,0 +1,76 @@
+from typing import Dict, List, Optional
+
+
+from app.config import settings
+from app.providers.base_provider import BaseProvider, ChatMessage, ProviderError
+
+
+_providers: Dict[str, BaseProvider] = {}
+
+
+
+
+def _configured_providers() -> List[BaseProvider]:
+    """Instantiate every provider whose credentials are configured"""
+    providers: List[BaseProvider] = []
+    if settings.AZURE_OPENAI_ENDPOINT and settings.AZURE_OPENAI_API_KEY:
+        from app.providers.azure_openai import AzureOpenAIProvider
+        providers.append(AzureOpenAIProvider())
+    if settings.AZURE_AI_FOUNDRY_ENDPOINT and settings.AZURE_AI_FOUNDRY_API_KEY:
+        from app.providers.azure_ai_foundry import AzureAIFoundryProvider
+        providers.append(AzureAIFoundryProvider())
+    if settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
+        from app.providers.aws_bedrock import AWSBedrockProvider
+        providers.append(AWSBedrockProvider())
+    if settings.MOCK_PROVIDER_ENABLED:
+        from app.providers.mock_provider import MockProvider
+        providers.append(MockProvider())
+    return providers
+
+
+
+
+async def init_providers():
+    """Open one long-lived client per configured provider (called from lifespan)"""
+    for provider in _configured_providers():
+        await provider.startup()
+        _providers[provider.name] = provider
+
+
+
+
+async def close_providers():
+    """Close all provider clients"""
+    for provider in list(_providers.values()):
+        await provider.shutdown()
+    _providers.clear()
+
+
+
+
+def get_provider(name: str) -> Optional[BaseProvider]:
+    """Get a started provider by name"""
+    return _providers.get(name)
+
+
+
+
+def get_provider_for_model(model: str) -> BaseProvider:
+    """Resolve the started provider that serves a model"""
+    for provider in _providers.values():
+        if provider.supports(model):
+            return provider
+    raise ProviderError(f"No configured provider serves model '{model}'")
+
+
+
+
+__all__ = [
+    "BaseProvider",
+    "ChatMessage",
+    "ProviderError",
+    "init_providers",
+    "close_providers",
+    "get_provider",
+    "get_provider_for_model",
+]
\ No newline at end of file
@@ -0,0 +1,126 @@
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import boto3
+import functools
+import json
+
+
+from app.config import settings
+from app.providers.base_provider import BaseProvider, ChatMessage, ProviderError
+
+
+_END = object()
+
+
+
+
+class AWSBedrockProvider(BaseProvider):
+    """
+    Claude on AWS Bedrock.
+    
+    boto3 is synchronous, so calls run on a dedicated thread pool sized to the
+    client's connection pool; the client itself is created once at startup
+    and reuses its keep-alive connections across requests.
+    """
+    
+    name = "aws_bedrock"
+    model_prefixes = ("anthropic.", "us.anthropic.", "eu.anthropic.", "claude")
+    
+    def __init__(self):
+        self._client = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    async def startup(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.PROVIDER_MAX_CONNECTIONS,
+            thread_name_prefix="bedrock",
+        )
+        self._client = boto3.client(
+            "bedrock-runtime",
+            region_name=settings.AWS_REGION,
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            config=Config(
+                max_pool_connections=settings.PROVIDER_MAX_CONNECTIONS,
+                connect_timeout=settings.PROVIDER_CONNECT_TIMEOUT,
+                read_timeout=settings.PROVIDER_READ_TIMEOUT,
+                tcp_keepalive=True,
+                retries={"max_attempts": 2, "mode": "standard"},
+            ),
+        )
+    
+    async def shutdown(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    @staticmethod
+    def _build_body(messages: List[ChatMessage], params: Dict[str, Any]) -> Dict[str, Any]:
+        system = "\n\n".join(m.content for m in messages if m.role == "system")
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": params.pop("max_tokens", 4096),
+            "messages": [m.to_dict() for m in messages if m.role != "system"],
+            **params,
+        }
+        if system:
+            body["system"] = system
+        return body
+    
+    async def stream_chat(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        **params
+    ) -> AsyncIterator[str]:
+        """Stream completion text from the Bedrock response event stream"""
+        loop = asyncio.get_running_loop()
+        body = json.dumps(self._build_body(messages, dict(params)))
+        try:
+            response = await loop.run_in_executor(
+                self._executor,
+                functools.partial(
+                    self._client.invoke_model_with_response_stream,
+                    modelId=model,
+                    body=body,
+                ),
+            )
+        except (BotoCoreError, ClientError) as exc:
+            raise ProviderError(f"Bedrock request failed: {exc}") from exc
+        
+        event_stream = response["body"]
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        def pump():
+            # Runs on the executor; hands decoded events back to the loop
+            try:
+                for event in event_stream:
+                    chunk = event.get("chunk")
+                    if chunk:
+                        loop.call_soon_threadsafe(queue.put_nowait, json.loads(chunk["bytes"]))
+            except Exception as exc:
+                loop.call_soon_threadsafe(queue.put_nowait, exc)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _END)
+        
+        loop.run_in_executor(self._executor, pump)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise ProviderError(f"Bedrock stream failed: {item}") from item
+                if item.get("type") == "content_block_delta":
+                    text = item.get("delta", {}).get("text")
+                    if text:
+                        yield text
+        finally:
+            # Closing the event stream ends the pump thread and frees the socket
+            event_stream.close()
\ No newline at end of file
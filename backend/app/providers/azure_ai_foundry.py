@@ -0,0 +1,76 @@
+from typing import AsyncIterator, List, Optional
+import httpx
+import json
+
+
+from app.config import settings
+from app.providers.base_provider import BaseProvider, ChatMessage, ProviderError, create_http_client
+
+
+
+
+class AzureAIFoundryProvider(BaseProvider):
+    """
+    Azure AI Foundry serverless models (Deepseek, Grok, ...) through the
+    OpenAI-compatible chat completions endpoint
+    """
+    
+    name = "azure_ai_foundry"
+    model_prefixes = ("deepseek", "grok", "mistral", "llama", "phi")
+    
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    async def startup(self) -> None:
+        self._client = create_http_client(
+            base_url=settings.AZURE_AI_FOUNDRY_ENDPOINT.rstrip("/"),
+            headers={
+                "api-key": settings.AZURE_AI_FOUNDRY_API_KEY,
+                "Authorization": f"Bearer {settings.AZURE_AI_FOUNDRY_API_KEY}",
+            },
+        )
+    
+    async def shutdown(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def stream_chat(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        **params
+    ) -> AsyncIterator[str]:
+        """Stream completion text, parsing the SSE response line by line"""
+        payload = {
+            "model": model,
+            "messages": [m.to_dict() for m in messages],
+            "stream": True,
+            **params,
+        }
+        try:
+            async with self._client.stream(
+                "POST",
+                "/chat/completions",
+                params={"api-version": settings.AZURE_AI_FOUNDRY_API_VERSION},
+                json=payload,
+            ) as response:
+                if response.status_code >= 400:
+                    body = await response.aread()
+                    raise ProviderError(
+                        f"Azure AI Foundry returned {response.status_code}: {body[:500]!r}"
+                    )
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    choices = chunk.get("choices") or []
+                    if choices:
+                        content = (choices[0].get("delta") or {}).get("content")
+                        if content:
+                            yield content
+        except httpx.HTTPError as exc:
+            raise ProviderError(f"Azure AI Foundry request failed: {exc}") from exc
\ No newline at end of file
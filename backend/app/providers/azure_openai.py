@@ -0,0 +1,66 @@
+from openai import AsyncAzureOpenAI, OpenAIError
+from typing import AsyncIterator, List, Optional
+
+
+from app.config import settings
+from app.providers.base_provider import BaseProvider, ChatMessage, ProviderError, create_http_client
+
+
+
+
+class AzureOpenAIProvider(BaseProvider):
+    """Azure OpenAI chat completions over a shared keep-alive client"""
+    
+    name = "azure_openai"
+    model_prefixes = ("gpt-", "o1", "o3", "o4", "text-embedding")
+    
+    def __init__(self):
+        self._client: Optional[AsyncAzureOpenAI] = None
+    
+    async def startup(self) -> None:
+        self._client = AsyncAzureOpenAI(
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            api_key=settings.AZURE_OPENAI_API_KEY,
+            api_version=settings.AZURE_OPENAI_API_VERSION,
+            http_client=create_http_client(),
+        )
+    
+    async def shutdown(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+    
+    async def stream_chat(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        **params
+    ) -> AsyncIterator[str]:
+        """Stream completion text from an Azure OpenAI deployment"""
+        try:
+            stream = await self._client.chat.completions.create(
+                model=model,
+                messages=[m.to_dict() for m in messages],
+                stream=True,
+                **params
+            )
+        except OpenAIError as exc:
+            raise ProviderError(f"Azure OpenAI request failed: {exc}") from exc
+        
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except OpenAIError as exc:
+            raise ProviderError(f"Azure OpenAI stream failed: {exc}") from exc
+        finally:
+            # Release the pooled connection even when the caller stops early
+            await stream.response.aclose()
+    
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        """Embed a batch of texts with one request"""
+        try:
+            response = await self._client.embeddings.create(model=model, input=texts)
+        except OpenAIError as exc:
+            raise ProviderError(f"Azure OpenAI embedding request failed: {exc}") from exc
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
\ No newline at end of file
@@ -0,0 +1,100 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import httpx
+from app.config import settings
+
+
+
+
+@dataclass
+class ChatMessage:
+    """A single prompt message in provider-neutral form"""
+    role: str
+    content: str
+    
+    def to_dict(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+
+
+
+class ProviderError(Exception):
+    """Raised when an upstream LLM provider call fails"""
+
+
+
+
+def create_http_client(
+    base_url: str = "",
+    headers: Optional[Dict[str, str]] = None
+) -> httpx.AsyncClient:
+    """
+    Create the long-lived, keep-alive HTTP client a provider holds for the
+    life of the process. HTTP/2 requires the `h2` package (httpx[http2]).
+    """
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        http2=settings.PROVIDER_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.PROVIDER_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.PROVIDER_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.PROVIDER_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.PROVIDER_READ_TIMEOUT,
+            connect=settings.PROVIDER_CONNECT_TIMEOUT,
+        ),
+    )
+
+
+
+
+class BaseProvider(ABC):
+    """
+    Common async interface for LLM providers.
+    
+    A provider owns one client per process: `startup` opens it from the
+    application lifespan hook and `shutdown` closes it. Request methods must
+    never create their own clients.
+    """
+    
+    name: str = "base"
+    # Model name prefixes this provider serves (e.g. "gpt-", "claude")
+    model_prefixes: Tuple[str, ...] = ()
+    
+    async def startup(self) -> None:
+        """Open long-lived clients"""
+    
+    async def shutdown(self) -> None:
+        """Close long-lived clients"""
+    
+    def supports(self, model: str) -> bool:
+        """Whether this provider serves the given model"""
+        return model.lower().startswith(self.model_prefixes)
+    
+    @abstractmethod
+    def stream_chat(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        **params
+    ) -> AsyncIterator[str]:
+        """
+        Stream completion text for a chat prompt.
+        Closing the iterator early must release the upstream connection.
+        """
+    
+    async def complete_chat(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        **params
+    ) -> str:
+        """Return the full completion for a chat prompt"""
+        return "".join([token async for token in self.stream_chat(messages, model, **params)])
+    
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        """Return one embedding per input text, in input order"""
+        raise ProviderError(f"Provider '{self.name}' does not support embeddings")
\ No newline at end of file
@@ -0,0 +1,76 @@
+from typing import AsyncIterator, List
+import asyncio
+import hashlib
+import math
+import random
+
+
+from app.config import settings
+from app.providers.base_provider import BaseProvider, ChatMessage
+
+
+_VOCABULARY = (
+    "the", "model", "reply", "context", "token", "stream", "session", "project",
+    "answer", "result", "data", "value", "system", "request", "latency", "cache",
+)
+
+
+
+
+class MockProvider(BaseProvider):
+    """
+    Deterministic in-process provider for offline development and benchmarks.
+    
+    The same prompt always yields the same reply. Replies start after a fixed
+    latency and are then paced at a fixed token rate, so the chat path can be
+    load-tested without network access or API keys.
+    """
+    
+    name = "mock"
+    model_prefixes = ("mock",)
+    
+    def __init__(
+        self,
+        latency_ms: int = settings.MOCK_PROVIDER_LATENCY_MS,
+        tokens_per_second: float = settings.MOCK_PROVIDER_TOKENS_PER_SECOND,
+        reply_tokens: int = settings.MOCK_PROVIDER_REPLY_TOKENS
+    ):
+        self.latency = latency_ms / 1000
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+    
+    def _reply_tokens(self, messages: List[ChatMessage], model: str) -> List[str]:
+        prompt = "\n".join(f"{m.role}:{m.content}" for m in messages)
+        seed = hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).digest()
+        rng = random.Random(seed)
+        words = [rng.choice(_VOCABULARY) for _ in range(self.reply_tokens)]
+        return [w if i == 0 else f" {w}" for i, w in enumerate(words)]
+    
+    async def stream_chat(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        **params
+    ) -> AsyncIterator[str]:
+        """Stream a deterministic reply at the configured latency and rate"""
+        tokens = self._reply_tokens(messages, model)
+        loop = asyncio.get_running_loop()
+        start = loop.time() + self.latency
+        interval = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        
+        for i, token in enumerate(tokens):
+            # Pace against an absolute schedule so sleeps don't accumulate drift
+            delay = start + i * interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield token
+    
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        """Deterministic unit vectors seeded by each text"""
+        vectors = []
+        for text in texts:
+            rng = random.Random(hashlib.sha256(f"{model}\n{text}".encode("utf-8")).digest())
+            vector = [rng.gauss(0.0, 1.0) for _ in range(settings.VECTOR_DIMENSION)]
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            vectors.append([v / norm for v in vector])
+        return vectors
\ No newline at end of file
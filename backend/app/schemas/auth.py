@@ -47,5 +47,14 @@ class Token(BaseModel):
 
 
 
+class UserPrincipal(BaseModel):
+    """Minimal authenticated identity resolved for every request (cacheable)"""
+    id: uuid.UUID
+    username: str
+    is_active: bool
+
+
+
+
 class TokenData(BaseModel):
     user_id: Optional[uuid.UUID] = None
\ No newline at end of file
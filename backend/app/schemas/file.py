@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 import uuid
 from app.models.file import FileType, FileProcessingStatus
@@ -34,4 +34,25 @@ class FileResponse(BaseModel):
 
 class FileUploadResponse(BaseModel):
     file: FileResponse
-    message: str = "File uploaded successfully"
\ No newline at end of file
+    message: str = "File uploaded successfully"
+
+
+
+
+class UploadCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=500)
+    size: int = Field(..., gt=0)
+    mime_type: Optional[str] = Field(None, max_length=255)
+    in_library: bool = True
+    vector_store_id: Optional[uuid.UUID] = None  # index into this store once processed
+
+
+
+
+class UploadStatus(BaseModel):
+    id: uuid.UUID
+    filename: str
+    size: int
+    offset: int  # bytes received contiguously from the start
+    received: int  # bytes received in total, including parts past gaps
+    missing: List[List[int]]  # [start, end) ranges still to send
\ No newline at end of file
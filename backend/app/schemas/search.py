@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+import uuid
+
+
+
+
+class DocumentHit(BaseModel):
+    id: uuid.UUID
+    vector_store_id: uuid.UUID
+    file_id: Optional[uuid.UUID]
+    content: str
+    chunk_index: int
+    meta: Dict[str, Any]
+    score: float
+
+
+    class Config:
+        from_attributes = True
\ No newline at end of file
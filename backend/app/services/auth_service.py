@@ -6,14 +6,39 @@ from typing import Optional
 import uuid
 
 
+from app.cache import cache_invalidate_namespaces, cache_read_through_local
+from app.database import AsyncSessionLocal
 from app.models.user import User
-from app.schemas.auth import UserCreate, UserLogin, Token, UserResponse
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.schemas.auth import UserCreate, UserLogin, Token, UserResponse, UserPrincipal
+from app.core.security import (
+    verify_password_async,
+    get_password_hash_async,
+    create_access_token,
+    PasswordHasherBusy,
+)
 from app.config import settings
 
 
 
 
+def _principal_namespace(user_id: uuid.UUID):
+    # A scope of its own, so the frequent ("user", id) invalidations from
+    # session and message writes do not evict the principal
+    return ("principal", user_id)
+
+
+
+
+def _hasher_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is temporarily overloaded, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
+
+
 class AuthService:
     """Service for handling authentication operations"""
     
@@ -42,8 +67,14 @@ class AuthService:
                 detail="Username already taken"
             )
         
+        # Hand the pooled connection back while bcrypt runs
+        await db.commit()
+        
         # Create new user
-        hashed_password = get_password_hash(user_data.password)
+        try:
+            hashed_password = await get_password_hash_async(user_data.password)
+        except PasswordHasherBusy:
+            raise _hasher_busy_exception()
         new_user = User(
             email=user_data.email,
             username=user_data.username,
@@ -82,7 +113,17 @@ class AuthService:
         )
         user = result.scalar_one_or_none()
         
-        if not user or not verify_password(credentials.password, user.hashed_password):
+        # Hand the pooled connection back while bcrypt runs
+        await db.commit()
+        
+        valid, new_hash = False, None
+        if user:
+            try:
+                valid, new_hash = await verify_password_async(credentials.password, user.hashed_password)
+            except PasswordHasherBusy:
+                raise _hasher_busy_exception()
+        
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect credentials",
@@ -95,6 +136,12 @@ class AuthService:
                 detail="Inactive user"
             )
         
+        # Upgrade hashes created with outdated cost parameters
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+            await db.refresh(user)
+        
         # Create access token
         access_token = create_access_token(
             data={"sub": str(user.id)}
@@ -114,4 +161,51 @@ class AuthService:
         result = await db.execute(
             select(User).where(User.id == user_id)
         )
-        return result.scalar_one_or_none()
\ No newline at end of file
+        return result.scalar_one_or_none()
+    
+    @staticmethod
+    async def get_principal(user_id: uuid.UUID) -> Optional[UserPrincipal]:
+        """
+        Resolve the authenticated principal for a user id.
+        Checks the in-process cache, then Redis, and only then Postgres.
+        """
+        async def load():
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(User.id, User.username, User.is_active).where(User.id == user_id)
+                )
+                row = result.one_or_none()
+            if row is None:
+                return None
+            return UserPrincipal(id=row.id, username=row.username, is_active=row.is_active).model_dump(mode="json")
+        
+        cached = await cache_read_through_local(
+            _principal_namespace(user_id), "principal", load, ttl=settings.AUTH_CACHE_TTL
+        )
+        return UserPrincipal.model_validate(cached) if cached is not None else None
+    
+    @staticmethod
+    async def invalidate_principal(user_id: uuid.UUID):
+        """
+        Drop a cached principal after the user changes.
+        The namespace bump is broadcast, so every worker drops its in-process copy.
+        """
+        await cache_invalidate_namespaces(_principal_namespace(user_id))
+    
+    @staticmethod
+    async def set_user_active(user_id: uuid.UUID, is_active: bool, db: AsyncSession) -> User:
+        """
+        Activate or deactivate a user and invalidate their cached principal
+        """
+        user = await AuthService.get_user_by_id(user_id, db)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        user.is_active = is_active
+        await db.commit()
+        await AuthService.invalidate_principal(user_id)
+        
+        return user
\ No newline at end of file
@@ -0,0 +1,196 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from fastapi import HTTPException, status
+from typing import List, Optional
+import asyncio
+import os
+
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.blob import Blob
+from app.models.file import File, FileProcessingStatus
+from app.utils.file_utils import file_sha256, fsync_directory
+
+
+_sweeper_task: Optional[asyncio.Task] = None
+
+
+
+
+def blob_path(sha256: str) -> str:
+    """Storage path of a blob, fanned out over two directory levels"""
+    return os.path.join(settings.UPLOAD_DIR, "blobs", sha256[:2], sha256[2:4], sha256)
+
+
+
+
+def _link_into_place(source: str, target: str, sha256: str):
+    # A hard link, not a copy: the data is written once and `source` stays
+    # valid until the caller's transaction commits. The linked inode is
+    # shared with `source`, so it is checked against its address once linked.
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        return
+    if file_sha256(target) != sha256:
+        os.remove(target)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload data changed while it was being stored"
+        )
+    fsync_directory(os.path.dirname(target))
+
+
+
+
+def _unlink_all(paths: List[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+
+
+class BlobService:
+    """Content-addressed file storage shared between `File` rows"""
+    
+    @staticmethod
+    async def adopt(
+        source_path: str,
+        sha256: str,
+        size: int,
+        mime_type: str,
+        db: AsyncSession
+    ) -> Blob:
+        """
+        Get or create the blob for content already durable at `source_path`.
+        The caller must have sealed `source_path` (read-only, with no open
+        writers), since new content shares its inode.
+        
+        The upsert locks the blob row until the caller commits, so the
+        sweeper cannot delete it before the new `File` row references it.
+        New content is hard-linked into the blob store and its hash verified
+        there; a mismatch is refused with 409. For known content
+        `source_path` is simply left for the caller to remove. Either way the
+        caller removes `source_path` after committing.
+        """
+        path = blob_path(sha256)
+        result = await db.execute(
+            insert(Blob)
+            .values(
+                sha256=sha256,
+                size=size,
+                mime_type=mime_type,
+                storage_path=path,
+                ref_count=0,
+                unreferenced_at=func.now(),
+                processing_status=FileProcessingStatus.PENDING,
+                meta={}
+            )
+            .on_conflict_do_update(
+                index_elements=[Blob.sha256],
+                set_={"unreferenced_at": Blob.unreferenced_at}
+            )
+            .returning(Blob)
+        )
+        blob = result.scalar_one()
+        # Also restores data whose blob row survived a sweep that crashed
+        # between unlinking and committing
+        if not await asyncio.to_thread(os.path.exists, path):
+            await asyncio.to_thread(_link_into_place, source_path, path, sha256)
+        return blob
+    
+    @staticmethod
+    async def record_results(
+        sha256: str,
+        db: AsyncSession,
+        processing_status: FileProcessingStatus,
+        extracted_text: Optional[str] = None,
+        transcription: Optional[str] = None
+    ):
+        """
+        Store a blob's processing results and copy them to every file that
+        references it, in the caller's transaction
+        """
+        values = {"processing_status": processing_status}
+        if extracted_text is not None:
+            values["extracted_text"] = extracted_text
+        if transcription is not None:
+            values["transcription"] = transcription
+        await db.execute(update(Blob).where(Blob.sha256 == sha256).values(**values))
+        await db.execute(update(File).where(File.blob_sha256 == sha256).values(**values))
+    
+    @staticmethod
+    async def sweep_orphans(
+        db: AsyncSession,
+        grace_seconds: int = settings.BLOB_ORPHAN_GRACE_S,
+        batch_size: int = settings.BLOB_SWEEP_BATCH_SIZE
+    ) -> int:
+        """
+        Delete up to `batch_size` blobs unreferenced for `grace_seconds` and
+        their data, and return how many were removed.
+        
+        Rows are locked with SKIP LOCKED, so concurrent sweepers split the
+        work and a blob being adopted by an upload is skipped. The data is
+        unlinked before the deletion commits: an upload of the same content
+        waits for the commit and then stores it afresh.
+        """
+        orphans = (
+            select(Blob.sha256)
+            .where(
+                Blob.ref_count == 0,
+                Blob.unreferenced_at < func.now() - text(f"interval '{int(grace_seconds)} seconds'")
+            )
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            delete(Blob).where(Blob.sha256.in_(orphans)).returning(Blob.storage_path)
+        )
+        paths = list(result.scalars())
+        await asyncio.to_thread(_unlink_all, paths)
+        await db.commit()
+        return len(paths)
+
+
+
+
+async def _sweep_periodically():
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                while await BlobService.sweep_orphans(db) >= settings.BLOB_SWEEP_BATCH_SIZE:
+                    pass
+        except (SQLAlchemyError, OSError):
+            # Retried on the next round; orphans only cost disk until then
+            pass
+        await asyncio.sleep(settings.BLOB_SWEEP_INTERVAL_S)
+
+
+
+
+async def start_blob_sweeper():
+    """Start removing orphaned blobs every BLOB_SWEEP_INTERVAL_S"""
+    global _sweeper_task
+    if _sweeper_task is None:
+        _sweeper_task = asyncio.create_task(_sweep_periodically())
+
+
+
+
+async def stop_blob_sweeper():
+    """Stop the orphan sweeper"""
+    global _sweeper_task
+    if _sweeper_task is not None:
+        _sweeper_task.cancel()
+        try:
+            await _sweeper_task
+        except asyncio.CancelledError:
+            pass
+        _sweeper_task = None
\ No newline at end of file
@@ -0,0 +1,231 @@
+from typing import Any, AsyncIterator, Dict, List
+import asyncio
+import uuid
+
+
+from app.agents.council_agent import CouncilAgent, MemberResult
+from app.core.context import ContextWindow, estimate_tokens
+from app.core.streaming import TokenStream, format_sse, run_in_background
+from app.database import AsyncSessionLocal
+from app.models.message import Message, MessageRole
+from app.providers import ChatMessage, get_provider_for_model
+from app.schemas.chat import MessageResponse
+from app.services.message_service import MessageService
+
+
+
+
+class ChatService:
+    """Service for generating assistant replies"""
+    
+    @staticmethod
+    def generate_reply(messages: List[ChatMessage], llm_model: str) -> AsyncIterator[str]:
+        """Stream the assistant reply from the provider serving the model"""
+        provider = get_provider_for_model(llm_model)
+        return provider.stream_chat(messages, llm_model)
+    
+    @staticmethod
+    async def complete_reply(messages: List[ChatMessage], llm_model: str) -> str:
+        """Generate the full assistant reply without streaming"""
+        provider = get_provider_for_model(llm_model)
+        return await provider.complete_chat(messages, llm_model)
+    
+    @staticmethod
+    async def save_assistant_message(
+        session_id: uuid.UUID,
+        user_id: uuid.UUID,
+        content: str,
+        llm_model: str,
+        meta: dict = None,
+        agent_name: str = None,
+        prompt_tokens: int = None
+    ) -> Message:
+        """
+        Persist a finished assistant reply in its own short transaction.
+        Opens a fresh session so no pooled connection is held while generating.
+        """
+        async with AsyncSessionLocal() as db:
+            return await MessageService.create_message(
+                session_id=session_id,
+                content=content,
+                role=MessageRole.ASSISTANT,
+                user_id=user_id,
+                db=db,
+                llm_model=llm_model,
+                meta=meta,
+                agent_name=agent_name,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=estimate_tokens(content)
+            )
+    
+    @staticmethod
+    def build_exchange(
+        user_content: str,
+        reply: str,
+        llm_model: str,
+        window: ContextWindow,
+        meta: dict = None
+    ) -> List[Message]:
+        """Build the unsaved user and assistant messages for one chat turn"""
+        return [
+            Message(
+                role=MessageRole.USER,
+                content=user_content,
+                prompt_tokens=estimate_tokens(user_content)
+            ),
+            Message(
+                role=MessageRole.ASSISTANT,
+                content=reply,
+                llm_model=llm_model,
+                meta=meta or {},
+                prompt_tokens=window.token_count,
+                completion_tokens=estimate_tokens(reply)
+            ),
+        ]
+    
+    @staticmethod
+    async def save_exchange(
+        session_id: uuid.UUID,
+        user_id: uuid.UUID,
+        messages: List[Message]
+    ) -> List[Message]:
+        """
+        Persist a chat turn in one short transaction on a fresh session,
+        so no pooled connection is held while generating.
+        """
+        async with AsyncSessionLocal() as db:
+            return await MessageService.create_messages(session_id, user_id, messages, db)
+    
+    @staticmethod
+    async def stream_reply(
+        session_id: uuid.UUID,
+        user_id: uuid.UUID,
+        user_content: str,
+        window: ContextWindow,
+        llm_model: str
+    ) -> AsyncIterator[str]:
+        """
+        Stream the assistant reply as Server-Sent Events.
+        
+        Emits `start`, `token` events with batched text, and a `done` event
+        carrying the user and assistant messages, which are saved together at
+        the end. If the client goes away mid-stream the partial turn is still saved.
+        """
+        yield format_sse({"session_id": str(session_id), "llm_model": llm_model}, event="start")
+        
+        stream = TokenStream(ChatService.generate_reply(window.messages, llm_model))
+        finished = False
+        try:
+            async for batch in stream.batches():
+                yield format_sse({"content": batch}, event="token")
+            finished = True
+        finally:
+            if not finished:
+                run_in_background(ChatService.save_exchange(
+                    session_id, user_id,
+                    ChatService.build_exchange(
+                        user_content, stream.text, llm_model, window,
+                        meta={"finish_reason": "client_disconnected"}
+                    )
+                ))
+        
+        if stream.error is not None:
+            yield format_sse({"detail": "Generation failed"}, event="error")
+        
+        finish_reason = "stop" if stream.completed else "error"
+        user_message, assistant_message = await ChatService.save_exchange(
+            session_id, user_id,
+            ChatService.build_exchange(
+                user_content, stream.text, llm_model, window,
+                meta={"finish_reason": finish_reason}
+            )
+        )
+        yield format_sse(
+            {
+                "user_message": MessageResponse.model_validate(user_message).model_dump(mode="json"),
+                "message": MessageResponse.model_validate(assistant_message).model_dump(mode="json"),
+            },
+            event="done"
+        )
+    
+    @staticmethod
+    async def save_member_message(
+        session_id: uuid.UUID,
+        user_id: uuid.UUID,
+        result: MemberResult,
+        prompt_tokens: int = None
+    ) -> Message:
+        """Persist one council member's reply, tagged with its agent name"""
+        return await ChatService.save_assistant_message(
+            session_id, user_id, result.content, result.model,
+            meta={
+                "finish_reason": result.status,
+                "latency_ms": result.latency_ms,
+                "hedged": result.hedged,
+                "error": result.error,
+            },
+            agent_name=result.member.name,
+            prompt_tokens=prompt_tokens
+        )
+    
+    @staticmethod
+    async def stream_council_reply(
+        session_id: uuid.UUID,
+        user_id: uuid.UUID,
+        user_message: Message,
+        window: ContextWindow,
+        council: CouncilAgent
+    ) -> AsyncIterator[str]:
+        """
+        Stream a council turn as Server-Sent Events.
+        
+        `token` events carry the member's `agent_name`; each member's reply is
+        saved as its own assistant message as soon as that member finishes and
+        announced with a `member_done` event. `done` follows the last member.
+        Members still running when the client disconnects or the council
+        fails are saved with what they produced, tagged with the reason.
+        """
+        yield format_sse(
+            {"message": MessageResponse.model_validate(user_message).model_dump(mode="json")},
+            event="start"
+        )
+        
+        saved = set()
+        partial = {member.name: [] for member in council.members}
+        
+        def save_unfinished(meta: Dict[str, Any]):
+            for member in council.members:
+                if member.name not in saved:
+                    run_in_background(ChatService.save_assistant_message(
+                        session_id, user_id, "".join(partial[member.name]), member.model,
+                        meta=meta,
+                        agent_name=member.name,
+                        prompt_tokens=window.token_count
+                    ))
+        
+        try:
+            async for event in council.run(window.messages):
+                if event.type == "token":
+                    partial[event.agent_name].append(event.content)
+                    yield format_sse(
+                        {"agent_name": event.agent_name, "content": event.content},
+                        event="token"
+                    )
+                    continue
+                message = await ChatService.save_member_message(
+                    session_id, user_id, event.result, prompt_tokens=window.token_count
+                )
+                saved.add(event.agent_name)
+                yield format_sse(
+                    {"message": MessageResponse.model_validate(message).model_dump(mode="json")},
+                    event="member_done"
+                )
+        except (GeneratorExit, asyncio.CancelledError):
+            # Client went away: keep what each unfinished member produced so far
+            save_unfinished({"finish_reason": "client_disconnected"})
+            raise
+        except Exception as exc:
+            save_unfinished({"finish_reason": "error", "error": f"{type(exc).__name__}: {exc}"})
+            yield format_sse({"detail": "Generation failed"}, event="error")
+        
+        yield format_sse({"agent_names": sorted(saved)}, event="done")
\ No newline at end of file
@@ -0,0 +1,94 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from redis.exceptions import RedisError
+from typing import Dict, List, Sequence
+
+
+from app.cache import cache_get_many, cache_set_many
+from app.config import settings
+from app.models.vector_store import EmbeddingCache
+from app.providers import get_provider_for_model
+from app.utils.vector_utils import content_hash
+
+
+
+
+def _cache_key(embedding_model: str, digest: str) -> str:
+    return f"embedding:{embedding_model}:{digest}"
+
+
+
+
+class EmbeddingService:
+    """
+    Embeddings through a content-hash cache.
+    
+    Lookups go Redis -> `embedding_cache` table -> provider, each tier
+    asked once per batch for everything the tier above missed. Texts that
+    normalize to the same content are embedded once, within a batch and
+    across ingests, stores and projects.
+    """
+    
+    @staticmethod
+    async def embed(
+        texts: Sequence[str],
+        embedding_model: str,
+        db: AsyncSession
+    ) -> List[List[float]]:
+        """
+        Embed texts, calling the provider only for content not seen before.
+        New rows are added to `db`'s transaction and become visible to other
+        ingests when the caller commits.
+        """
+        digests = [content_hash(text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(digests))
+        
+        try:
+            cached = await cache_get_many([_cache_key(embedding_model, digest) for digest in unique])
+            found.update((digest, value) for digest, value in zip(unique, cached) if value is not None)
+        except RedisError:
+            pass
+        
+        missing = [digest for digest in unique if digest not in found]
+        from_db: Dict[str, List[float]] = {}
+        if missing:
+            result = await db.execute(
+                select(EmbeddingCache.content_hash, EmbeddingCache.embedding).where(
+                    tuple_(EmbeddingCache.embedding_model, EmbeddingCache.content_hash).in_(
+                        [(embedding_model, digest) for digest in missing]
+                    )
+                )
+            )
+            from_db = {row.content_hash: [float(x) for x in row.embedding] for row in result}
+            found.update(from_db)
+        
+        texts_by_digest = dict(zip(digests, texts))
+        missing = [digest for digest in missing if digest not in found]
+        embedded: Dict[str, List[float]] = {}
+        if missing:
+            provider = get_provider_for_model(embedding_model)
+            embeddings = await provider.embed([texts_by_digest[digest] for digest in missing], embedding_model)
+            embedded = dict(zip(missing, embeddings))
+            found.update(embedded)
+            await db.execute(
+                insert(EmbeddingCache)
+                .values([
+                    {"embedding_model": embedding_model, "content_hash": digest, "embedding": embedding}
+                    for digest, embedding in embedded.items()
+                ])
+                .on_conflict_do_nothing()
+            )
+        
+        # Warm Redis with everything it did not have
+        if from_db or embedded:
+            try:
+                await cache_set_many(
+                    {_cache_key(embedding_model, digest): value for digest, value in {**from_db, **embedded}.items()},
+                    ttl=settings.EMBEDDING_CACHE_TTL
+                )
+            except RedisError:
+                pass
+        
+        return [found[digest] for digest in digests]
\ No newline at end of file
@@ -0,0 +1,625 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+
+
+from app.cache import get_redis
+from app.config import settings
+from app.core.jobs import enqueue_job
+from app.models.file import File, FileProcessingStatus
+from app.schemas.file import UploadCreate, UploadStatus
+from app.services.blob_service import BlobService
+from app.services.rag_service import RAGService
+from app.utils.file_utils import (
+    SNIFF_BYTES,
+    file_type_for,
+    merge_ranges,
+    resolve_mime_type,
+    safe_filename,
+)
+
+
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the {settings.MAX_UPLOAD_SIZE} byte upload limit"
+    )
+
+
+
+
+def _write_block(handle: BinaryIO, hasher, block: bytes):
+    # hashlib releases the GIL on large buffers, so both run off the event loop
+    hasher.update(block)
+    handle.write(block)
+
+
+
+
+def _sync_and_close(handle: BinaryIO):
+    handle.flush()
+    os.fsync(handle.fileno())
+    # Read-only from here: new content is hard-linked into the blob store
+    os.fchmod(handle.fileno(), 0o444)
+    handle.close()
+
+
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+
+
+def _create_sparse_file(path: str, size: int):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as handle:
+        handle.truncate(size)
+
+
+
+
+def _pwrite_all(fd: int, block: bytes, offset: int):
+    view = memoryview(block)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+
+
+def _hash_and_sniff(path: str) -> Tuple[str, bytes]:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as handle:
+        head = handle.read(SNIFF_BYTES)
+        hasher.update(head)
+        while block := handle.read(settings.UPLOAD_WRITE_BLOCK_BYTES):
+            hasher.update(block)
+    return hasher.hexdigest(), head
+
+
+
+
+def _sealed_path(part_path: str) -> str:
+    return part_path[:-len(".part")] + ".sealed"
+
+
+
+
+def _seal(part_path: str, sealed_path: str):
+    # Renamed first, so a part that arrives later has no file to open; the
+    # mode then keeps the inode, soon shared with the blob store, read-only.
+    # An earlier completion attempt may already have sealed it.
+    try:
+        os.rename(part_path, sealed_path)
+    except FileNotFoundError:
+        if not os.path.exists(sealed_path):
+            raise
+    os.chmod(sealed_path, 0o444)
+
+
+
+
+def _fsync_file(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+
+
+def _stale_part_files(root: str, modified_before: float) -> List[str]:
+    """Upload files in the per-user directories not modified since `modified_before`"""
+    stale = []
+    if not os.path.isdir(root):
+        return stale
+    for user_dir in os.scandir(root):
+        if not user_dir.is_dir() or user_dir.name == "blobs":
+            continue
+        for entry in os.scandir(user_dir.path):
+            try:
+                if entry.name.endswith((".part", ".sealed")) and entry.stat().st_mtime < modified_before:
+                    stale.append(entry.path)
+            except FileNotFoundError:
+                pass
+    return stale
+
+
+
+
+def _upload_key(upload_id: uuid.UUID) -> str:
+    return f"upload:{upload_id}"
+
+
+
+
+def _parts_key(upload_id: uuid.UUID) -> str:
+    return f"upload:{upload_id}:parts"
+
+
+
+
+def _open_uploads_key(user_id: uuid.UUID) -> str:
+    # Sorted set of a user's upload ids, scored by when each one expires
+    return f"uploads:open:{user_id}"
+
+
+
+
+_upload_sweeper_task: Optional[asyncio.Task] = None
+
+
+
+
+class FileService:
+    """Service for handling file uploads"""
+    
+    @staticmethod
+    def user_upload_dir(user_id: uuid.UUID) -> str:
+        return os.path.join(settings.UPLOAD_DIR, str(user_id))
+    
+    @staticmethod
+    async def save_upload(
+        stream: AsyncIterator[bytes],
+        filename: Optional[str],
+        declared_mime_type: Optional[str],
+        user_id: uuid.UUID,
+        db: AsyncSession,
+        content_length: Optional[int] = None,
+        in_library: bool = True,
+        vector_store_id: Optional[uuid.UUID] = None
+    ) -> File:
+        """
+        Stream an upload to UPLOAD_DIR and record it.
+        
+        The body is written in UPLOAD_WRITE_BLOCK_BYTES blocks while its
+        SHA-256 is computed and its leading bytes sniffed for the mime type,
+        so memory use is one block whatever the file size. The upload is
+        rejected with 413 as soon as it passes MAX_UPLOAD_SIZE. The data is
+        fsynced and moved into the blob store before the `File` row is
+        written, so a row never points at a partial file.
+        """
+        if content_length is not None and content_length > settings.MAX_UPLOAD_SIZE:
+            raise _too_large()
+        if vector_store_id is not None:
+            await RAGService.get_user_vector_store(vector_store_id, user_id, db)
+        
+        original_filename = safe_filename(filename)
+        file_id = uuid.uuid4()
+        directory = FileService.user_upload_dir(user_id)
+        temporary_path = os.path.join(directory, f"{file_id}.part")
+        
+        await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+        handle = await asyncio.to_thread(open, temporary_path, "wb")
+        hasher = hashlib.sha256()
+        head = b""
+        size = 0
+        buffer = bytearray()
+        try:
+            async for piece in stream:
+                size += len(piece)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise _too_large()
+                if len(head) < SNIFF_BYTES:
+                    head += piece[:SNIFF_BYTES - len(head)]
+                buffer += piece
+                if len(buffer) >= settings.UPLOAD_WRITE_BLOCK_BYTES:
+                    await asyncio.to_thread(_write_block, handle, hasher, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(_write_block, handle, hasher, bytes(buffer))
+            await asyncio.to_thread(_sync_and_close, handle)
+            return await FileService._record_file(
+                file_id, user_id, original_filename, temporary_path, size, head,
+                declared_mime_type, hasher.hexdigest(), in_library, vector_store_id, db
+            )
+        finally:
+            await asyncio.to_thread(handle.close)
+            await asyncio.to_thread(_remove, temporary_path)
+    
+    @staticmethod
+    async def _record_file(
+        file_id: uuid.UUID,
+        user_id: uuid.UUID,
+        original_filename: str,
+        data_path: str,
+        size: int,
+        head: bytes,
+        declared_mime_type: Optional[str],
+        sha256: str,
+        in_library: bool,
+        vector_store_id: Optional[uuid.UUID],
+        db: AsyncSession
+    ) -> File:
+        """
+        Write the `File` row for data already durable at `data_path`,
+        stored as (or deduplicated against) its content-addressed blob.
+        Content that was processed before gets the blob's results at once
+        and goes straight to indexing if it has a `vector_store_id`;
+        anything else is queued for the background worker. The caller
+        removes `data_path` afterwards.
+        """
+        mime_type = resolve_mime_type(head, original_filename, declared_mime_type)
+        blob = await BlobService.adopt(data_path, sha256, size, mime_type, db)
+        new_file = File(
+            id=file_id,
+            user_id=user_id,
+            filename=f"{file_id}{os.path.splitext(original_filename)[1].lower()}",
+            original_filename=original_filename,
+            file_path=blob.storage_path,
+            blob_sha256=blob.sha256,
+            file_type=file_type_for(mime_type, original_filename),
+            mime_type=mime_type,
+            file_size=size,
+            meta={"sha256": sha256},
+            in_library=in_library
+        )
+        if vector_store_id is not None:
+            new_file.meta["vector_store_id"] = str(vector_store_id)
+        if blob.processing_status == FileProcessingStatus.COMPLETED:
+            new_file.processing_status = blob.processing_status
+            new_file.extracted_text = blob.extracted_text
+            new_file.transcription = blob.transcription
+        db.add(new_file)
+        await db.commit()
+        await db.refresh(new_file)
+        
+        if new_file.processing_status == FileProcessingStatus.PENDING:
+            try:
+                await enqueue_job("process_file", {"file_id": str(new_file.id)})
+            except RedisError:
+                # The upload stands; the worker's reconciler requeues the
+                # file once it has been PENDING for JOB_RECONCILE_AFTER_S
+                pass
+        elif vector_store_id is not None:
+            # Unlike processing this is not reconciled, so the error reaches
+            # the client rather than the file silently staying unindexed
+            await enqueue_job("ingest_file", {"file_id": str(new_file.id), "vector_store_id": str(vector_store_id)})
+        return new_file
+    
+    @staticmethod
+    async def create_upload(upload_data: UploadCreate, user_id: uuid.UUID, db: AsyncSession) -> UploadStatus:
+        """
+        Start a resumable upload.
+        
+        The file is preallocated as a sparse file of the final size, parts
+        are written straight to their offsets, and finishing hard-links it
+        into the blob store, so the data is written once however it is split. Upload state lives in
+        Redis and expires UPLOAD_SESSION_TTL after the last part. A user
+        may have at most UPLOAD_MAX_OPEN_PER_USER uploads in progress.
+        """
+        if upload_data.size > settings.MAX_UPLOAD_SIZE:
+            raise _too_large()
+        if upload_data.vector_store_id is not None:
+            await RAGService.get_user_vector_store(upload_data.vector_store_id, user_id, db)
+        
+        upload_id = uuid.uuid4()
+        client = await get_redis()
+        open_key = _open_uploads_key(user_id)
+        now = time.time()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(open_key, "-inf", now)
+            pipe.zadd(open_key, {str(upload_id): now + settings.UPLOAD_SESSION_TTL})
+            pipe.zcard(open_key)
+            pipe.expire(open_key, settings.UPLOAD_SESSION_TTL)
+            _, _, open_count, _ = await pipe.execute()
+        if open_count > settings.UPLOAD_MAX_OPEN_PER_USER:
+            await client.zrem(open_key, str(upload_id))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many uploads in progress; complete or cancel one first"
+            )
+        
+        original_filename = safe_filename(upload_data.filename)
+        path = os.path.join(
+            FileService.user_upload_dir(user_id),
+            f"{upload_id}{os.path.splitext(original_filename)[1].lower()}.part"
+        )
+        await asyncio.to_thread(_create_sparse_file, path, upload_data.size)
+        
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(_upload_key(upload_id), mapping={
+                "user_id": str(user_id),
+                "filename": original_filename,
+                "size": upload_data.size,
+                "mime_type": upload_data.mime_type or "",
+                "in_library": int(upload_data.in_library),
+                "vector_store_id": str(upload_data.vector_store_id or ""),
+                "path": path,
+            })
+            pipe.expire(_upload_key(upload_id), settings.UPLOAD_SESSION_TTL)
+            await pipe.execute()
+        return UploadStatus(
+            id=upload_id,
+            filename=original_filename,
+            size=upload_data.size,
+            offset=0,
+            received=0,
+            missing=[[0, upload_data.size]]
+        )
+    
+    @staticmethod
+    async def _get_upload(upload_id: uuid.UUID, user_id: uuid.UUID) -> Dict[str, str]:
+        client = await get_redis()
+        raw = await client.hgetall(_upload_key(upload_id))
+        upload = {key.decode(): value.decode() for key, value in raw.items()}
+        # A hash without user_id is a writer count left behind by a finished upload
+        if upload.get("user_id") != str(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found"
+            )
+        return upload
+    
+    @staticmethod
+    async def _received_ranges(upload_id: uuid.UUID) -> List[Tuple[int, int]]:
+        client = await get_redis()
+        parts = await client.zrange(_parts_key(upload_id), 0, -1)
+        return merge_ranges(tuple(int(x) for x in part.decode().split(":")) for part in parts)
+    
+    @staticmethod
+    def _status(upload_id: uuid.UUID, upload: Dict[str, str], ranges: List[Tuple[int, int]]) -> UploadStatus:
+        size = int(upload["size"])
+        missing, position = [], 0
+        for start, end in ranges:
+            if start > position:
+                missing.append([position, start])
+            position = end
+        if position < size:
+            missing.append([position, size])
+        return UploadStatus(
+            id=upload_id,
+            filename=upload["filename"],
+            size=size,
+            offset=ranges[0][1] if ranges and ranges[0][0] == 0 else 0,
+            received=sum(end - start for start, end in ranges),
+            missing=missing
+        )
+    
+    @staticmethod
+    async def get_upload_status(upload_id: uuid.UUID, user_id: uuid.UUID) -> UploadStatus:
+        """Received and missing byte ranges of an upload"""
+        upload = await FileService._get_upload(upload_id, user_id)
+        return FileService._status(upload_id, upload, await FileService._received_ranges(upload_id))
+    
+    @staticmethod
+    async def write_upload_part(
+        upload_id: uuid.UUID,
+        offset: int,
+        stream: AsyncIterator[bytes],
+        user_id: uuid.UUID
+    ) -> UploadStatus:
+        """
+        Write a part at `offset` with pwrite. Parts may arrive in any order
+        and in parallel; a part is recorded as received only after it is
+        fsynced, so the reported offset is always safe to resume from.
+        
+        Each part counts itself in the upload's `writers` field before it
+        opens the file, and is refused with 409 once completion has started.
+        complete_upload waits for the count to reach zero before hashing.
+        """
+        upload = await FileService._get_upload(upload_id, user_id)
+        size = int(upload["size"])
+        if not 0 <= offset < size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload-Offset is outside the file"
+            )
+        
+        client = await get_redis()
+        await FileService._register_writer(client, upload_id)
+        try:
+            try:
+                fd = await asyncio.to_thread(os.open, upload["path"], os.O_WRONLY)
+            except FileNotFoundError:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Upload not found"
+                )
+            position = offset
+            buffer = bytearray()
+            try:
+                async for piece in stream:
+                    if position + len(buffer) + len(piece) > size:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Part extends past the declared upload size"
+                        )
+                    buffer += piece
+                    if len(buffer) >= settings.UPLOAD_WRITE_BLOCK_BYTES:
+                        await asyncio.to_thread(_pwrite_all, fd, bytes(buffer), position)
+                        position += len(buffer)
+                        buffer.clear()
+                if buffer:
+                    await asyncio.to_thread(_pwrite_all, fd, bytes(buffer), position)
+                    position += len(buffer)
+                await asyncio.to_thread(os.fsync, fd)
+            finally:
+                await asyncio.to_thread(os.close, fd)
+            
+            async with client.pipeline(transaction=True) as pipe:
+                if position > offset:
+                    pipe.zadd(_parts_key(upload_id), {f"{offset}:{position}": offset})
+                pipe.expire(_parts_key(upload_id), settings.UPLOAD_SESSION_TTL)
+                pipe.expire(_upload_key(upload_id), settings.UPLOAD_SESSION_TTL)
+                pipe.zadd(_open_uploads_key(user_id), {str(upload_id): time.time() + settings.UPLOAD_SESSION_TTL}, xx=True)
+                pipe.expire(_open_uploads_key(user_id), settings.UPLOAD_SESSION_TTL)
+                await pipe.execute()
+        finally:
+            await FileService._release_writer(client, upload_id)
+        return FileService._status(upload_id, upload, await FileService._received_ranges(upload_id))
+    
+    @staticmethod
+    async def _register_writer(client, upload_id: uuid.UUID):
+        """Count a part writer in, or refuse it with 409 if completion has started"""
+        # The EXPIRE keeps a hash recreated after completion from living forever
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(_upload_key(upload_id), "writers", 1)
+            pipe.hexists(_upload_key(upload_id), "completing")
+            pipe.expire(_upload_key(upload_id), settings.UPLOAD_SESSION_TTL)
+            _, completing, _ = await pipe.execute()
+        if completing:
+            await FileService._release_writer(client, upload_id)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload is being completed"
+            )
+    
+    @staticmethod
+    async def _release_writer(client, upload_id: uuid.UUID):
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(_upload_key(upload_id), "writers", -1)
+            pipe.expire(_upload_key(upload_id), settings.UPLOAD_SESSION_TTL)
+            await pipe.execute()
+    
+    @staticmethod
+    async def _wait_for_writers(client, upload_id: uuid.UUID) -> bool:
+        """Wait until no part is being written; False if UPLOAD_COMPLETE_WAIT_S passes first"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.UPLOAD_COMPLETE_WAIT_S
+        while int(await client.hget(_upload_key(upload_id), "writers") or 0) > 0:
+            if loop.time() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+    
+    @staticmethod
+    async def complete_upload(
+        upload_id: uuid.UUID,
+        user_id: uuid.UUID,
+        db: AsyncSession
+    ) -> File:
+        """
+        Finish an upload once every byte has been received: fsync the part
+        file, store it as a blob and write the `File` row. The SHA-256 and
+        mime type come from one read pass over the assembled file, taken
+        only after every in-flight part has finished and the file has been
+        sealed: renamed so no later part can open it, and made read-only.
+        On failure the sealed file is kept, so completing can be retried.
+        """
+        upload = await FileService._get_upload(upload_id, user_id)
+        upload_status = FileService._status(upload_id, upload, await FileService._received_ranges(upload_id))
+        if upload_status.missing:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload is missing byte ranges"
+            )
+        
+        # Only one request may finish an upload
+        client = await get_redis()
+        if not await client.hsetnx(_upload_key(upload_id), "completing", 1):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload is already being completed"
+            )
+        
+        part_path = upload["path"]
+        sealed_path = _sealed_path(part_path)
+        try:
+            if not await FileService._wait_for_writers(client, upload_id):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Upload still has parts being written"
+                )
+            await asyncio.to_thread(_seal, part_path, sealed_path)
+            sha256, head = await asyncio.to_thread(_hash_and_sniff, sealed_path)
+            await asyncio.to_thread(_fsync_file, sealed_path)
+            new_file = await FileService._record_file(
+                upload_id, user_id, upload["filename"], sealed_path, upload_status.size, head,
+                upload["mime_type"] or None, sha256, upload["in_library"] == "1",
+                uuid.UUID(upload["vector_store_id"]) if upload.get("vector_store_id") else None, db
+            )
+        except BaseException:
+            await client.hdel(_upload_key(upload_id), "completing")
+            raise
+        
+        await FileService._forget_upload(client, upload_id, user_id)
+        await asyncio.to_thread(_remove, sealed_path)
+        return new_file
+    
+    @staticmethod
+    async def cancel_upload(upload_id: uuid.UUID, user_id: uuid.UUID):
+        """Abort an upload and delete its data"""
+        upload = await FileService._get_upload(upload_id, user_id)
+        client = await get_redis()
+        await FileService._forget_upload(client, upload_id, user_id)
+        await asyncio.to_thread(_remove, upload["path"])
+        await asyncio.to_thread(_remove, _sealed_path(upload["path"]))
+    
+    @staticmethod
+    async def _forget_upload(client, upload_id: uuid.UUID, user_id: uuid.UUID):
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.delete(_upload_key(upload_id), _parts_key(upload_id))
+            pipe.zrem(_open_uploads_key(user_id), str(upload_id))
+            await pipe.execute()
+    
+    @staticmethod
+    async def sweep_abandoned_uploads(max_age: int = settings.UPLOAD_SESSION_TTL) -> int:
+        """
+        Remove .part and .sealed files untouched for `max_age` seconds that
+        no live upload owns, and return how many were removed. These are resumable uploads
+        whose Redis state expired, and streamed uploads cut off by a crash.
+        """
+        paths = await asyncio.to_thread(_stale_part_files, settings.UPLOAD_DIR, time.time() - max_age)
+        if not paths:
+            return 0
+        # The upload id leads the file name; streamed-upload temps match no key
+        client = await get_redis()
+        async with client.pipeline(transaction=False) as pipe:
+            for path in paths:
+                pipe.exists(_upload_key(os.path.basename(path).split(".")[0]))
+            live = await pipe.execute()
+        abandoned = [path for path, exists in zip(paths, live) if not exists]
+        for path in abandoned:
+            await asyncio.to_thread(_remove, path)
+        return len(abandoned)
+
+
+
+
+async def _sweep_uploads_periodically():
+    while True:
+        try:
+            await FileService.sweep_abandoned_uploads()
+        except (RedisError, OSError):
+            # Retried on the next round; abandoned parts only cost disk until then
+            pass
+        await asyncio.sleep(settings.UPLOAD_SWEEP_INTERVAL_S)
+
+
+
+
+async def start_upload_sweeper():
+    """Start removing abandoned upload files every UPLOAD_SWEEP_INTERVAL_S"""
+    global _upload_sweeper_task
+    if _upload_sweeper_task is None:
+        _upload_sweeper_task = asyncio.create_task(_sweep_uploads_periodically())
+
+
+
+
+async def stop_upload_sweeper():
+    """Stop the abandoned upload sweeper"""
+    global _upload_sweeper_task
+    if _upload_sweeper_task is not None:
+        _upload_sweeper_task.cancel()
+        try:
+            await _upload_sweeper_task
+        except asyncio.CancelledError:
+            pass
+        _upload_sweeper_task = None
\ No newline at end of file
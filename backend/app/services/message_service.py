@@ -1,10 +1,14 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from fastapi import HTTPException, status
-from typing import List
+from typing import Any, Dict, List, Optional
 import uuid
 
 
+from app.cache import cache_invalidate_namespaces
+from app.config import settings
+from app.core.pagination import Page, decode_cursor, encode_cursor, split_page
+from app.core.serialization import response_columns, row_dicts
 from app.models.message import Message, MessageRole
 from app.models.session import Session
 from app.schemas.chat import MessageCreate, MessageResponse
@@ -16,85 +20,141 @@ class MessageService:
     """Service for handling message operations"""
     
     @staticmethod
-    async def create_message(
+    async def allocate_sequences(
         session_id: uuid.UUID,
-        content: str,
-        role: MessageRole,
         user_id: uuid.UUID,
-        db: AsyncSession,
-        llm_model: str = None,
-        meta: dict = None
-    ) -> Message:
-        """Create a new message in a session"""
-        # Verify session belongs to user
+        count: int,
+        db: AsyncSession
+    ) -> int:
+        """
+        Reserve `count` consecutive sequence numbers and return the first.
+        
+        Bumps the session's counter with a single UPDATE ... RETURNING that also
+        checks ownership. The row lock serializes concurrent senders, and the
+        unique (session_id, sequence) constraint backs it up.
+        """
         result = await db.execute(
-            select(Session).where(
+            update(Session)
+            .where(
                 Session.id == session_id,
                 Session.user_id == user_id
             )
+            .values(last_sequence=Session.last_sequence + count)
+            .returning(Session.last_sequence)
+            .execution_options(synchronize_session=False)
         )
-        session = result.scalar_one_or_none()
+        last_sequence = result.scalar_one_or_none()
         
-        if not session:
+        if last_sequence is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Session not found"
             )
         
-        # Get the next sequence number
-        result = await db.execute(
-            select(Message)
-            .where(Message.session_id == session_id)
-            .order_by(Message.sequence.desc())
+        return last_sequence - count + 1
+    
+    @staticmethod
+    async def create_messages(
+        session_id: uuid.UUID,
+        user_id: uuid.UUID,
+        messages: List[Message],
+        db: AsyncSession
+    ) -> List[Message]:
+        """Insert messages with consecutive sequences in one transaction"""
+        first_sequence = await MessageService.allocate_sequences(
+            session_id, user_id, len(messages), db
         )
-        last_message = result.scalar_one_or_none()
-        next_sequence = (last_message.sequence + 1) if last_message else 0
         
-        # Create message
+        for offset, message in enumerate(messages):
+            message.session_id = session_id
+            message.sequence = first_sequence + offset
+            if message.meta is None:
+                message.meta = {}
+            if message.total_tokens is None and (message.prompt_tokens or message.completion_tokens):
+                message.total_tokens = (message.prompt_tokens or 0) + (message.completion_tokens or 0)
+        
+        # Server defaults come back through INSERT ... RETURNING (eager_defaults),
+        # so no refresh round trip is needed
+        db.add_all(messages)
+        await db.commit()
+        # Bumping the sequence counter touched sessions.updated_at, which
+        # reorders the user's cached session lists
+        await cache_invalidate_namespaces(("user", user_id), ("session", session_id))
+        
+        return messages
+    
+    @staticmethod
+    async def create_message(
+        session_id: uuid.UUID,
+        content: str,
+        role: MessageRole,
+        user_id: uuid.UUID,
+        db: AsyncSession,
+        llm_model: str = None,
+        meta: dict = None,
+        agent_name: str = None,
+        prompt_tokens: int = None,
+        completion_tokens: int = None
+    ) -> Message:
+        """Create a new message in a session"""
         new_message = Message(
-            session_id=session_id,
             role=role,
             content=content,
-            sequence=next_sequence,
             llm_model=llm_model,
-            meta=meta or {}
+            meta=meta or {},
+            agent_name=agent_name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens
         )
         
-        db.add(new_message)
-        await db.commit()
-        await db.refresh(new_message)
-        
-        return new_message
+        messages = await MessageService.create_messages(session_id, user_id, [new_message], db)
+        return messages[0]
     
     @staticmethod
     async def get_session_messages(
         session_id: uuid.UUID,
         user_id: uuid.UUID,
-        db: AsyncSession
-    ) -> List[Message]:
-        """Get all messages for a session"""
+        db: AsyncSession,
+        limit: int = settings.PAGE_SIZE_DEFAULT,
+        cursor: Optional[str] = None
+    ) -> Page[Dict[str, Any]]:
+        """
+        Get a page of messages for a session in chronological order
+        
+        The first page holds the newest messages; each cursor pages further
+        back in history.
+        """
         # Verify session belongs to user
         result = await db.execute(
-            select(Session).where(
+            select(Session.id).where(
                 Session.id == session_id,
                 Session.user_id == user_id
             )
         )
-        session = result.scalar_one_or_none()
         
-        if not session:
+        if result.scalar_one_or_none() is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Session not found"
             )
         
         # Get messages
+        query = select(*response_columns(Message, MessageResponse)).where(Message.session_id == session_id)
+        before = decode_cursor(cursor, int)
+        if before:
+            query = query.where(Message.sequence < before[0])
+        
         result = await db.execute(
-            select(Message)
-            .where(Message.session_id == session_id)
-            .order_by(Message.sequence.asc())
+            query
+            .order_by(Message.sequence.desc())
+            .limit(limit + 1)
+        )
+        messages, has_more = split_page(row_dicts(result), limit)
+        messages.reverse()
+        return Page(
+            items=messages,
+            next_cursor=encode_cursor(messages[0]["sequence"]) if has_more else None
         )
-        return result.scalars().all()
     
     @staticmethod
     async def delete_message(
@@ -0,0 +1,239 @@
+from concurrent.futures import Executor
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import time
+
+
+from app.config import settings
+
+
+OCR_IMAGE_MIME_TYPES = {
+    "image/png",
+    "image/jpeg",
+    "image/tiff",
+    "image/gif",
+    "image/webp",
+    "image/bmp",
+}
+
+# Each page gets one core; stop Tesseract's own threads competing for them
+_TESSERACT_ENV = {**os.environ, "OMP_THREAD_LIMIT": "1"}
+
+
+
+
+def _cache_path(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, digest[:2], f"{digest}.txt")
+
+
+
+
+def _ocr_image_bytes(image: bytes, language: str, cache_dir: str) -> str:
+    """
+    OCR one page image, through the page cache. A hit refreshes the entry's
+    mtime, so the sweep only removes entries no document has used lately.
+    """
+    digest = hashlib.sha256(image + f":{language}".encode()).hexdigest()
+    path = _cache_path(cache_dir, digest)
+    try:
+        with open(path, encoding="utf-8") as handle:
+            text = handle.read()
+        os.utime(path)
+        return text
+    except FileNotFoundError:
+        pass
+    
+    result = subprocess.run(
+        ["tesseract", "stdin", "stdout", "-l", language],
+        input=image,
+        capture_output=True,
+        env=_TESSERACT_ENV,
+        timeout=settings.OCR_PAGE_TIMEOUT_S,
+        check=True
+    )
+    text = result.stdout.decode("utf-8", errors="replace")
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    os.replace(temporary, path)
+    return text
+
+
+
+
+def _remove_cache_entries(paths: List[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+
+
+def _expired_cache_entries(cache_dir: str, modified_before: float) -> List[str]:
+    expired = []
+    if not os.path.isdir(cache_dir):
+        return expired
+    for shard in os.scandir(cache_dir):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            try:
+                if entry.stat().st_mtime < modified_before:
+                    expired.append(entry.path)
+            except FileNotFoundError:
+                pass
+    return expired
+
+
+
+
+def ocr_pdf_page(path: str, page: int, dpi: int, language: str, cache_dir: str) -> str:
+    """
+    Render one PDF page and OCR it. Runs in a process pool worker; the
+    rendered page is hashed, so a page already recognised is not OCRed again.
+    """
+    rendered = subprocess.run(
+        ["pdftoppm", "-f", str(page), "-l", str(page), "-r", str(dpi), "-png", path],
+        capture_output=True,
+        timeout=settings.OCR_PAGE_TIMEOUT_S,
+        check=True
+    )
+    return _ocr_image_bytes(rendered.stdout, language, cache_dir)
+
+
+
+
+def ocr_image_file(path: str, language: str, cache_dir: str) -> str:
+    """OCR an image file as a single page. Runs in a process pool worker."""
+    with open(path, "rb") as handle:
+        return _ocr_image_bytes(handle.read(), language, cache_dir)
+
+
+
+
+class OCRService:
+    """
+    Page-parallel OCR with Tesseract.
+    
+    PDFs are split into pages that are rendered (pdftoppm) and recognised
+    in parallel across a process pool, one page per core. Each page's text
+    is cached under OCR_CACHE_DIR by the hash of its rendered image, so a
+    retry after a failure only OCRs the pages that did not finish. Entries
+    are shared by every document with the same page, so they are never
+    evicted per document; those unused for OCR_CACHE_TTL_S are swept.
+    """
+    
+    @staticmethod
+    def supports(mime_type: str) -> bool:
+        return mime_type == "application/pdf" or mime_type in OCR_IMAGE_MIME_TYPES
+    
+    @staticmethod
+    def _require(*tools: str):
+        missing = [tool for tool in tools if shutil.which(tool) is None]
+        if missing:
+            raise RuntimeError(f"OCR needs {', '.join(missing)} on PATH")
+    
+    @staticmethod
+    async def pdf_page_count(path: str) -> int:
+        """Number of pages in a PDF, from pdfinfo"""
+        process = await asyncio.create_subprocess_exec(
+            "pdfinfo", path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"pdfinfo failed: {stderr.decode(errors='replace').strip()}")
+        match = re.search(rb"^Pages:\s+(\d+)", stdout, re.MULTILINE)
+        if not match:
+            raise RuntimeError("pdfinfo reported no page count")
+        return int(match.group(1))
+    
+    @staticmethod
+    async def ocr_pages(
+        path: str,
+        mime_type: str,
+        pool: Executor,
+        language: Optional[str] = None
+    ) -> AsyncIterator[Tuple[int, int, str]]:
+        """
+        Yield (page number, page count, text) as each page finishes, in
+        completion order. Pages that fail do not stop the others, so their
+        results are cached; the first error is raised once all have run.
+        """
+        language = language or settings.OCR_LANGUAGE
+        loop = asyncio.get_running_loop()
+        if mime_type != "application/pdf":
+            OCRService._require("tesseract")
+            text = await loop.run_in_executor(pool, ocr_image_file, path, language, settings.OCR_CACHE_DIR)
+            yield 1, 1, text
+            return
+        
+        OCRService._require("tesseract", "pdftoppm", "pdfinfo")
+        page_count = await OCRService.pdf_page_count(path)
+        pending: Dict[asyncio.Future, int] = {
+            loop.run_in_executor(
+                pool, ocr_pdf_page, path, page, settings.OCR_DPI, language, settings.OCR_CACHE_DIR
+            ): page
+            for page in range(1, page_count + 1)
+        }
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    page = pending.pop(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                        continue
+                    yield page, page_count, future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+        if error is not None:
+            raise error
+    
+    @staticmethod
+    async def extract_text(
+        path: str,
+        mime_type: str,
+        pool: Executor,
+        language: Optional[str] = None,
+        on_progress: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> str:
+        """
+        Full OCR text of a document, pages in order separated by form feeds.
+        
+        Every OCR_PROGRESS_PAGES pages `on_progress` gets the text of the
+        longest run of finished pages from the first, so a long document's
+        beginning is usable before its last page is recognised.
+        """
+        pages: Dict[int, str] = {}
+        published = 0
+        async for page, page_count, text in OCRService.ocr_pages(path, mime_type, pool, language):
+            pages[page] = text.strip()
+            if on_progress is None:
+                continue
+            ready = published
+            while ready + 1 in pages:
+                ready += 1
+            if ready - published >= settings.OCR_PROGRESS_PAGES and ready < page_count:
+                published = ready
+                await on_progress("\f".join(pages[number] for number in range(1, ready + 1)))
+        return "\f".join(pages[page] for page in sorted(pages))
+    
+    @staticmethod
+    async def sweep_cache(max_age: int = settings.OCR_CACHE_TTL_S) -> int:
+        """Remove cache entries unused for `max_age` seconds and return how many"""
+        paths = await asyncio.to_thread(_expired_cache_entries, settings.OCR_CACHE_DIR, time.time() - max_age)
+        await asyncio.to_thread(_remove_cache_entries, paths)
+        return len(paths)
\ No newline at end of file
@@ -0,0 +1,182 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, text
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional
+import asyncio
+import uuid
+
+
+from app.config import settings
+from app.core.jobs import Job, claim_work, enqueue_job
+from app.database import AsyncSessionLocal
+from app.models.blob import Blob
+from app.models.file import File, FileProcessingStatus
+from app.services.blob_service import BlobService
+from app.services.ocr_service import OCRService
+from app.services.rag_service import is_text_mime_type
+
+
+# File.meta key holding the OCR text recognised so far while a file is PROCESSING
+PARTIAL_TEXT_KEY = "partial_text"
+
+# An extractor runs in a worker's process pool: it takes a file path and
+# returns the File columns to set ("extracted_text", "transcription").
+# It must be a picklable module-level function.
+Extractor = Callable[[str], Dict[str, str]]
+
+
+
+
+def extract_plain_text(path: str) -> Dict[str, str]:
+    with open(path, "rb") as handle:
+        return {"extracted_text": handle.read().decode("utf-8", errors="replace")}
+
+
+
+
+def _without_partial_text(meta: Optional[Dict]) -> Dict:
+    return {key: value for key, value in (meta or {}).items() if key != PARTIAL_TEXT_KEY}
+
+
+
+
+def extractor_for(mime_type: str) -> Optional[Extractor]:
+    """Extractor for a mime type, or None if the file needs no processing"""
+    if is_text_mime_type(mime_type):
+        return extract_plain_text
+    return None
+
+
+
+
+class ProcessingService:
+    """
+    File processing run by the background worker.
+    
+    Results are written to the file's blob and every file sharing it, so
+    each distinct content is processed once; files uploaded before blobs
+    existed are updated on their own.
+    """
+    
+    @staticmethod
+    async def _set_status(
+        file: File,
+        db: AsyncSession,
+        processing_status: FileProcessingStatus,
+        **results: str
+    ):
+        if file.blob_sha256:
+            await BlobService.record_results(file.blob_sha256, db, processing_status, **results)
+        else:
+            await db.execute(
+                update(File).where(File.id == file.id).values(processing_status=processing_status, **results)
+            )
+        await db.commit()
+    
+    @staticmethod
+    async def _enqueue_ingestion(db: AsyncSession, condition):
+        """Queue indexing for the matching files uploaded into a vector store"""
+        result = await db.execute(select(File.id, File.meta).where(condition))
+        for file_id, meta in result.all():
+            if meta and meta.get("vector_store_id"):
+                await enqueue_job("ingest_file", {"file_id": str(file_id), "vector_store_id": meta["vector_store_id"]})
+    
+    @staticmethod
+    async def process_file(file_id: uuid.UUID, pool: Executor, job: Job):
+        """
+        Extract a file's content in `pool` and record the result, then queue
+        an "ingest_file" job for files uploaded into a vector store
+        """
+        async with AsyncSessionLocal() as db:
+            file = (await db.execute(select(File).where(File.id == file_id))).scalar_one_or_none()
+            # Already done when the reconciler requeued a file whose job was only slow
+            if file is None or file.processing_status == FileProcessingStatus.COMPLETED:
+                return
+            # A duplicate job for content another live job is processing;
+            # that job records the results for every file sharing the blob
+            if not await claim_work(file.blob_sha256 or str(file.id), job):
+                return
+            
+            if file.blob_sha256:
+                blob = (await db.execute(select(Blob).where(Blob.sha256 == file.blob_sha256))).scalar_one()
+                if blob.processing_status == FileProcessingStatus.COMPLETED:
+                    # Processed for another file with the same content
+                    await ProcessingService._set_status(
+                        file, db, blob.processing_status,
+                        extracted_text=blob.extracted_text, transcription=blob.transcription
+                    )
+                    await ProcessingService._enqueue_ingestion(db, File.id == file.id)
+                    return
+            
+            await ProcessingService._set_status(file, db, FileProcessingStatus.PROCESSING)
+            extractor = extractor_for(file.mime_type)
+            results = {}
+            if OCRService.supports(file.mime_type):
+                async def save_prefix(text: str):
+                    # Kept on this file only and out of extracted_text, which
+                    # is shared through the blob and only holds complete text
+                    file.meta = {**(file.meta or {}), PARTIAL_TEXT_KEY: text}
+                    await db.commit()
+                
+                # Page-parallel across the pool rather than one task per file
+                text = await OCRService.extract_text(
+                    file.file_path, file.mime_type, pool, on_progress=save_prefix
+                )
+                results = {"extracted_text": text}
+                file.meta = _without_partial_text(file.meta)
+            elif extractor is not None:
+                loop = asyncio.get_running_loop()
+                results = await loop.run_in_executor(pool, extractor, file.file_path)
+            await ProcessingService._set_status(file, db, FileProcessingStatus.COMPLETED, **results)
+            # record_results completed every file sharing the blob, so their
+            # own jobs will stop early; index them all from here
+            await ProcessingService._enqueue_ingestion(
+                db, File.blob_sha256 == file.blob_sha256 if file.blob_sha256 else File.id == file.id
+            )
+    
+    @staticmethod
+    async def claim_stale_pending(
+        db: AsyncSession,
+        older_than_seconds: int = settings.JOB_RECONCILE_AFTER_S,
+        batch_size: int = settings.JOB_RECONCILE_BATCH_SIZE
+    ) -> List[uuid.UUID]:
+        """
+        Claim up to `batch_size` files left PENDING for `older_than_seconds`
+        and return their ids for requeueing. Such files either lost their
+        job, e.g. because Redis was down when they were uploaded, or are
+        still waiting behind a long backlog; the caller requeues only those
+        whose job is gone (see `job_queued`).
+        
+        Claiming touches `updated_at`, so a file is requeued at most once per
+        interval, and SKIP LOCKED lets concurrent workers split the batch.
+        """
+        stale = (
+            select(File.id)
+            .where(
+                File.processing_status == FileProcessingStatus.PENDING,
+                File.updated_at < func.now() - text(f"interval '{int(older_than_seconds)} seconds'")
+            )
+            .order_by(File.updated_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(File)
+            .where(File.id.in_(stale))
+            .values(updated_at=func.now())
+            .returning(File.id)
+            .execution_options(synchronize_session=False)
+        )
+        file_ids = list(result.scalars())
+        await db.commit()
+        return file_ids
+    
+    @staticmethod
+    async def mark_failed(file_id: uuid.UUID, error: str):
+        """Record that a file could not be processed"""
+        async with AsyncSessionLocal() as db:
+            file = (await db.execute(select(File).where(File.id == file_id))).scalar_one_or_none()
+            if file is None:
+                return
+            file.meta = {**_without_partial_text(file.meta), "processing_error": error}
+            await ProcessingService._set_status(file, db, FileProcessingStatus.FAILED)
\ No newline at end of file
@@ -1,11 +1,17 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 import uuid
 
 
+from app.cache import cache_invalidate_namespaces, cache_read_through, cache_read_through_local
+from app.config import settings
+from app.core.pagination import Page, before_keyset, decode_cursor, encode_cursor, split_page
+from app.core.serialization import response_columns, row_dicts
 from app.models.project import Project
+from app.models.session import Session
 from app.models.user import User
 from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
 
@@ -35,22 +41,43 @@ class ProjectService:
         db.add(new_project)
         await db.commit()
         await db.refresh(new_project)
+        await cache_invalidate_namespaces(("user", user_id))
         
         return ProjectResponse.model_validate(new_project)
     
     @staticmethod
     async def get_user_projects(
         user_id: uuid.UUID,
-        db: AsyncSession
-    ) -> List[ProjectResponse]:
-        """Get all projects for a user"""
-        result = await db.execute(
-            select(Project)
-            .where(Project.user_id == user_id)
-            .order_by(Project.updated_at.desc())
+        db: AsyncSession,
+        limit: int = settings.PAGE_SIZE_DEFAULT,
+        cursor: Optional[str] = None
+    ) -> Page[Dict[str, Any]]:
+        """Get a page of projects for a user, most recently updated first (cached in the user's namespace)"""
+        async def load() -> Dict[str, Any]:
+            query = select(*response_columns(Project, ProjectResponse)).where(Project.user_id == user_id)
+            
+            after = decode_cursor(cursor, datetime, uuid.UUID)
+            if after:
+                query = query.where(before_keyset(Project.updated_at, Project.id, after))
+            
+            result = await db.execute(
+                query
+                .order_by(Project.updated_at.desc(), Project.id.desc())
+                .limit(limit + 1)
+            )
+            projects, has_more = split_page(row_dicts(result), limit)
+            return {
+                "items": projects,
+                "next_cursor": encode_cursor(projects[-1]["updated_at"], projects[-1]["id"]) if has_more else None,
+            }
+        
+        page = await cache_read_through(
+            ("user", user_id),
+            f"projects:{limit}:{cursor or ''}",
+            load,
+            ttl=settings.LIST_CACHE_TTL
         )
-        projects = result.scalars().all()
-        return [ProjectResponse.model_validate(p) for p in projects]
+        return Page(**page)
     
     @staticmethod
     async def get_project_by_id(
@@ -69,6 +96,32 @@ class ProjectService:
         )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_project_cached(
+        project_id: uuid.UUID,
+        user_id: uuid.UUID,
+        db: AsyncSession
+    ) -> Dict[str, Any]:
+        """
+        Get a project as a response dict through the two-tier cache.
+        Hot reads are served from this worker's memory; writes invalidate
+        every worker through the project's namespace.
+        """
+        async def load() -> Optional[Dict[str, Any]]:
+            project = await ProjectService.get_project_by_id(project_id, user_id, db)
+            return ProjectResponse.model_validate(project).model_dump(mode="json") if project else None
+        
+        project = await cache_read_through_local(("project", project_id), "project", load)
+        
+        # Cached by id, so ownership is checked on every read
+        if not project or project["user_id"] != str(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        
+        return project
+    
     @staticmethod
     async def update_project(
         project_id: uuid.UUID,
@@ -92,6 +145,7 @@ class ProjectService:
         
         await db.commit()
         await db.refresh(project)
+        await cache_invalidate_namespaces(("user", user_id), ("project", project_id))
         
         return ProjectResponse.model_validate(project)
     
@@ -110,7 +164,16 @@ class ProjectService:
                 detail="Project not found"
             )
         
+        # Sessions go with the project, so their cached copies must too
+        result = await db.execute(select(Session.id).where(Session.project_id == project_id))
+        session_ids = result.scalars().all()
+        
         await db.delete(project)
         await db.commit()
+        await cache_invalidate_namespaces(
+            ("user", user_id),
+            ("project", project_id),
+            *(("session", session_id) for session_id in session_ids)
+        )
         
         return True
\ No newline at end of file
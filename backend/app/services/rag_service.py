@@ -0,0 +1,607 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, delete, text, func
+from fastapi import HTTPException, status
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import codecs
+import os
+import uuid
+
+
+from app.cache import LocalCache
+from app.config import settings
+from app.core.context import estimate_tokens
+from app.database import AsyncSessionLocal
+from app.models.file import File
+from app.models.project import Project
+from app.models.vector_store import VectorStore, VectorChunk
+from app.providers import get_provider_for_model
+from app.services.embedding_service import EmbeddingService
+from app.utils.vector_utils import (
+    TEXT_SEARCH_CONFIG,
+    TextChunker,
+    VectorMatrix,
+    abatched,
+    open_vector_matrix,
+    reciprocal_rank_fusion,
+    vector_index_distance,
+    vector_search_settings,
+    vector_shortlist_size,
+    write_vector_matrix,
+)
+
+
+# Mime types read as plain text; anything else needs `File.extracted_text`
+# (OCR, transcription) before it can be indexed
+TEXT_MIME_TYPES = {
+    "application/json",
+    "application/xml",
+    "application/javascript",
+    "application/x-yaml",
+    "application/x-sh",
+}
+
+# Columns returned for every retrieved chunk
+_CHUNK_COLUMNS = (
+    VectorChunk.id,
+    VectorChunk.vector_store_id,
+    VectorChunk.file_id,
+    VectorChunk.content,
+    VectorChunk.chunk_index,
+    VectorChunk.meta,
+)
+
+# Small stores' embedding matrices opened by this worker: store id ->
+# (chunk version loaded, chunk count, matrix or None if too large).
+# Reopening an evicted matrix is a cheap memory map of its .npy file.
+_local_matrices = LocalCache(maxsize=settings.VECTOR_LOCAL_MATRICES, ttl=3600)
+
+
+
+
+def is_text_mime_type(mime_type: str) -> bool:
+    return mime_type.startswith("text/") or mime_type in TEXT_MIME_TYPES
+
+
+
+
+@dataclass
+class RetrievedChunk:
+    """A chunk returned by retrieval, best first"""
+    id: uuid.UUID
+    vector_store_id: uuid.UUID
+    file_id: Optional[uuid.UUID]
+    content: str
+    chunk_index: int
+    meta: Dict[str, Any]
+    score: float
+    
+    @classmethod
+    def from_row(cls, row, score: float) -> "RetrievedChunk":
+        return cls(
+            id=row.id,
+            vector_store_id=row.vector_store_id,
+            file_id=row.file_id,
+            content=row.content,
+            chunk_index=row.chunk_index,
+            meta=row.meta or {},
+            score=score,
+        )
+
+
+
+
+class RAGService:
+    """
+    Document ingestion and retrieval for vector stores.
+    
+    Ingestion is a pull-based pipeline of async generators:
+    extract (fixed-size blocks) -> chunk -> batch-embed -> bulk insert.
+    At most one read block and one embedding batch are in memory at a time,
+    whatever the size of the document.
+    """
+    
+    @staticmethod
+    async def extract_text(
+        file: File,
+        block_size: int = settings.INGEST_READ_BLOCK_BYTES
+    ) -> AsyncIterator[str]:
+        """Yield a file's text in blocks"""
+        if file.extracted_text is not None:
+            for start in range(0, len(file.extracted_text), block_size):
+                yield file.extracted_text[start:start + block_size]
+            return
+        
+        if not is_text_mime_type(file.mime_type):
+            raise ValueError(f"No text extractor for {file.mime_type}")
+        
+        # Incremental decoding keeps multi-byte characters split across
+        # blocks intact
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        handle = await asyncio.to_thread(open, file.file_path, "rb")
+        try:
+            while True:
+                block = await asyncio.to_thread(handle.read, block_size)
+                if not block:
+                    break
+                yield decoder.decode(block)
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+        finally:
+            await asyncio.to_thread(handle.close)
+    
+    @staticmethod
+    async def chunk_text(
+        blocks: AsyncIterator[str],
+        size: int = settings.INGEST_CHUNK_CHARS,
+        overlap: int = settings.INGEST_CHUNK_OVERLAP_CHARS
+    ) -> AsyncIterator[str]:
+        """Split streamed text into overlapping chunks"""
+        chunker = TextChunker(size, overlap)
+        async for block in blocks:
+            for chunk in chunker.feed(block):
+                yield chunk
+        for chunk in chunker.flush():
+            yield chunk
+    
+    @staticmethod
+    async def embed_chunks(
+        chunks: AsyncIterator[str],
+        embedding_model: str,
+        db: AsyncSession,
+        batch_size: int = settings.INGEST_EMBED_BATCH_SIZE
+    ) -> AsyncIterator[List[Tuple[str, List[float]]]]:
+        """
+        Embed chunks in batches through the embedding cache: one cache lookup
+        per batch, and one provider request for the chunks it misses
+        """
+        async for batch in abatched(chunks, batch_size):
+            embeddings = await EmbeddingService.embed(batch, embedding_model, db)
+            yield list(zip(batch, embeddings))
+    
+    @staticmethod
+    async def _bump_chunk_version(vector_store_id: uuid.UUID, db: AsyncSession):
+        """Mark the store's chunks as changed; commits with the caller's transaction"""
+        await db.execute(
+            update(VectorStore)
+            .where(VectorStore.id == vector_store_id)
+            .values(chunk_version=VectorStore.chunk_version + 1)
+        )
+    
+    @staticmethod
+    async def ingest_file(
+        file_id: uuid.UUID,
+        vector_store_id: uuid.UUID,
+        db: AsyncSession
+    ) -> int:
+        """
+        Index a file into a vector store and return the number of chunks.
+        
+        Each embedded batch is written with one multi-row INSERT and committed
+        together with the progress counters in `File.meta["ingest"]`, so
+        progress is visible while a large document is still being indexed.
+        Its "status" moves to "completed", or "failed" with the error
+        recorded; earlier chunks of the same file in the store are replaced.
+        `File.processing_status` belongs to extraction and is left alone.
+        """
+        file = (await db.execute(select(File).where(File.id == file_id))).scalar_one_or_none()
+        store = (await db.execute(select(VectorStore).where(VectorStore.id == vector_store_id))).scalar_one_or_none()
+        if not file or not store:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File or vector store not found"
+            )
+        
+        await db.execute(
+            delete(VectorChunk).where(
+                VectorChunk.vector_store_id == vector_store_id,
+                VectorChunk.file_id == file_id
+            )
+        )
+        progress = {"chunks": 0, "characters": 0}
+        file.meta = {
+            **(file.meta or {}),
+            "ingest": dict(progress, status="processing", vector_store_id=str(vector_store_id))
+        }
+        await RAGService._bump_chunk_version(vector_store_id, db)
+        await db.commit()
+        
+        try:
+            pipeline = RAGService.embed_chunks(
+                RAGService.chunk_text(RAGService.extract_text(file)),
+                store.embedding_model,
+                db
+            )
+            async for batch in pipeline:
+                await db.execute(
+                    insert(VectorChunk),
+                    [
+                        {
+                            "vector_store_id": vector_store_id,
+                            "file_id": file_id,
+                            "content": content,
+                            "embedding": embedding,
+                            "chunk_index": progress["chunks"] + offset,
+                            "token_count": estimate_tokens(content),
+                            "meta": {},
+                        }
+                        for offset, (content, embedding) in enumerate(batch)
+                    ]
+                )
+                progress["chunks"] += len(batch)
+                progress["characters"] += sum(len(content) for content, _ in batch)
+                file.meta = {**file.meta, "ingest": {**file.meta["ingest"], **progress}}
+                await db.commit()
+        except Exception as exc:
+            await db.rollback()
+            await db.refresh(file)
+            file.meta = {
+                **file.meta,
+                "ingest": {**file.meta["ingest"], **progress, "status": "failed", "error": str(exc)}
+            }
+            await RAGService._bump_chunk_version(vector_store_id, db)
+            await db.commit()
+            raise
+        
+        file.meta = {**file.meta, "ingest": {**file.meta["ingest"], "status": "completed"}}
+        await RAGService._bump_chunk_version(vector_store_id, db)
+        await db.commit()
+        return progress["chunks"]
+    
+    @staticmethod
+    async def run_ingest_job(file_id: uuid.UUID, vector_store_id: uuid.UUID):
+        """Worker entry point for an "ingest_file" job"""
+        async with AsyncSessionLocal() as db:
+            await RAGService.ingest_file(file_id, vector_store_id, db)
+    
+    @staticmethod
+    async def mark_ingest_failed(file_id: uuid.UUID, error: str):
+        """Record that a file could not be indexed after every attempt"""
+        async with AsyncSessionLocal() as db:
+            file = (await db.execute(select(File).where(File.id == file_id))).scalar_one_or_none()
+            if file is None:
+                return
+            ingest = (file.meta or {}).get("ingest", {})
+            file.meta = {**(file.meta or {}), "ingest": {**ingest, "status": "failed", "error": error}}
+            await db.commit()
+    
+    @staticmethod
+    async def get_user_vector_store(
+        vector_store_id: uuid.UUID,
+        user_id: uuid.UUID,
+        db: AsyncSession
+    ) -> VectorStore:
+        """A vector store in one of the user's projects, or 404"""
+        store = (await db.execute(
+            select(VectorStore)
+            .join(Project, Project.id == VectorStore.project_id)
+            .where(VectorStore.id == vector_store_id, Project.user_id == user_id)
+        )).scalar_one_or_none()
+        if not store:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vector store not found"
+            )
+        return store
+    
+    @staticmethod
+    async def vector_search(
+        query_embedding: List[float],
+        vector_store_ids: List[uuid.UUID],
+        db: AsyncSession,
+        top_k: int = settings.RAG_TOP_K,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> List[RetrievedChunk]:
+        """
+        Nearest chunks by cosine similarity.
+        
+        Stores with at most VECTOR_LOCAL_SEARCH_MAX_CHUNKS chunks in total
+        are searched exactly in process (see `local_matrices`); larger ones
+        go through the ANN index (see `_ann_hits`), where `probes` (ivfflat)
+        or `ef_search` (HNSW) trade recall for latency for this search only:
+        they are applied with SET LOCAL, so they end with the caller's
+        transaction, and raised as needed to cover the index shortlist.
+        """
+        matrices = await RAGService.local_matrices(vector_store_ids, db)
+        if matrices is not None:
+            return await RAGService._local_vector_search(query_embedding, matrices, db, top_k)
+        
+        for statement in vector_search_settings(probes, ef_search, top_k):
+            await db.execute(text(statement))
+        
+        hits = RAGService._ann_hits(query_embedding, vector_store_ids, top_k)
+        result = await db.execute(
+            select(*_CHUNK_COLUMNS, hits.c.distance)
+            .join(hits, hits.c.id == VectorChunk.id)
+            .order_by(hits.c.distance)
+        )
+        return [RetrievedChunk.from_row(row, 1 - row.distance) for row in result]
+    
+    @staticmethod
+    def _ann_hits(query_embedding: List[float], vector_store_ids: List[uuid.UUID], limit: int):
+        """
+        Subquery of the `limit` nearest chunk ids with their full-precision
+        cosine distance. With a reduced VECTOR_INDEX_PRECISION the index
+        shortlists VECTOR_RESCORE_MULTIPLIER times as many candidates, which
+        are rescored against the stored embeddings. Callers apply
+        `vector_search_settings` with the same limit, so the index scan is
+        wide enough to return the whole shortlist.
+        """
+        in_stores = VectorChunk.vector_store_id.in_(vector_store_ids)
+        distance = VectorChunk.embedding.cosine_distance(query_embedding)
+        if settings.VECTOR_INDEX_PRECISION == "full":
+            return (
+                select(VectorChunk.id, distance.label("distance"))
+                .where(in_stores)
+                .order_by(distance)
+                .limit(limit)
+                .subquery()
+            )
+        
+        shortlist = (
+            select(VectorChunk.id)
+            .where(in_stores)
+            .order_by(vector_index_distance(VectorChunk.embedding, query_embedding))
+            .limit(vector_shortlist_size(limit))
+            .subquery()
+        )
+        return (
+            select(VectorChunk.id, distance.label("distance"))
+            .join(shortlist, shortlist.c.id == VectorChunk.id)
+            .order_by(distance)
+            .limit(limit)
+            .subquery()
+        )
+    
+    @staticmethod
+    async def local_matrices(
+        vector_store_ids: List[uuid.UUID],
+        db: AsyncSession
+    ) -> Optional[List[VectorMatrix]]:
+        """
+        In-process matrices for the stores, or None when together they hold
+        more than VECTOR_LOCAL_SEARCH_MAX_CHUNKS chunks.
+        
+        Each store's matrix is written once per chunk version to a .npy file
+        under VECTOR_MATRIX_CACHE_DIR and memory mapped. The version is
+        `VectorStore.chunk_version`, bumped by ingestion in the same
+        transaction as the chunk changes, so a changed store is reloaded from
+        `vector_chunks` on its next search.
+        """
+        result = await db.execute(
+            select(VectorStore.id, VectorStore.chunk_version).where(VectorStore.id.in_(vector_store_ids))
+        )
+        versions = dict(result.all())
+        
+        limit = settings.VECTOR_LOCAL_SEARCH_MAX_CHUNKS
+        matrices: List[VectorMatrix] = []
+        unloaded: List[uuid.UUID] = []
+        total = 0
+        for store_id, version in versions.items():
+            cached = _local_matrices.get(store_id)
+            if cached is None or cached[0] != version:
+                matrix = await asyncio.to_thread(open_vector_matrix, RAGService._matrix_path(store_id, version))
+                cached = (version, len(matrix), matrix) if matrix is not None else None
+                if cached is not None:
+                    _local_matrices.set(store_id, cached)
+            if cached is None:
+                unloaded.append(store_id)
+                continue
+            total += cached[1]
+            if cached[2] is None or total > limit:
+                return None
+            matrices.append(cached[2])
+        
+        if unloaded:
+            result = await db.execute(
+                select(VectorChunk.vector_store_id, func.count())
+                .where(VectorChunk.vector_store_id.in_(unloaded))
+                .group_by(VectorChunk.vector_store_id)
+            )
+            counts = dict(result.all())
+            for store_id in unloaded:
+                count = counts.get(store_id, 0)
+                if count > limit:
+                    _local_matrices.set(store_id, (versions[store_id], count, None))
+            total += sum(counts.values())
+            if total > limit:
+                return None
+        
+        for store_id in unloaded:
+            result = await db.execute(
+                select(VectorChunk.id, VectorChunk.embedding)
+                .where(VectorChunk.vector_store_id == store_id)
+            )
+            rows = result.all()
+            matrix = await asyncio.to_thread(
+                write_vector_matrix,
+                RAGService._matrix_path(store_id, versions[store_id]),
+                [row.id for row in rows],
+                [row.embedding for row in rows]
+            )
+            _local_matrices.set(store_id, (versions[store_id], len(matrix), matrix))
+            matrices.append(matrix)
+        return matrices
+    
+    @staticmethod
+    def _matrix_path(store_id: uuid.UUID, version: int) -> str:
+        return os.path.join(settings.VECTOR_MATRIX_CACHE_DIR, str(store_id), f"v{version}.npy")
+    
+    @staticmethod
+    async def _local_vector_search(
+        query_embedding: List[float],
+        matrices: List[VectorMatrix],
+        db: AsyncSession,
+        top_k: int
+    ) -> List[RetrievedChunk]:
+        """Exact search over in-process matrices, then one primary key fetch"""
+        def search():
+            hits = [hit for matrix in matrices for hit in matrix.search(query_embedding, top_k)]
+            return sorted(hits, key=lambda hit: hit[1], reverse=True)[:top_k]
+        
+        hits = await asyncio.to_thread(search)
+        if not hits:
+            return []
+        result = await db.execute(select(*_CHUNK_COLUMNS).where(VectorChunk.id.in_([chunk_id for chunk_id, _ in hits])))
+        rows = {row.id: row for row in result}
+        return [RetrievedChunk.from_row(rows[chunk_id], score) for chunk_id, score in hits if chunk_id in rows]
+    
+    @staticmethod
+    async def lexical_search(
+        query: str,
+        vector_store_ids: List[uuid.UUID],
+        db: AsyncSession,
+        top_k: int = settings.RAG_TOP_K
+    ) -> List[RetrievedChunk]:
+        """
+        Best full-text matches through the GIN index on `content_tsv`,
+        ranked by cover density. `query` uses web search syntax: quoted
+        phrases, OR and -exclusions.
+        """
+        tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+        rank = func.ts_rank_cd(VectorChunk.content_tsv, tsquery)
+        result = await db.execute(
+            select(*_CHUNK_COLUMNS, rank.label("rank"))
+            .where(
+                VectorChunk.vector_store_id.in_(vector_store_ids),
+                VectorChunk.content_tsv.op("@@")(tsquery)
+            )
+            .order_by(rank.desc())
+            .limit(top_k)
+        )
+        return [RetrievedChunk.from_row(row, row.rank) for row in result]
+    
+    @staticmethod
+    async def project_vector_store_ids(project_id: uuid.UUID, db: AsyncSession) -> List[uuid.UUID]:
+        """Ids of a project's vector stores; the caller checks ownership"""
+        result = await db.execute(select(VectorStore.id).where(VectorStore.project_id == project_id))
+        return list(result.scalars())
+    
+    @staticmethod
+    async def query_embedding(
+        query: str,
+        vector_store_ids: List[uuid.UUID],
+        db: AsyncSession
+    ) -> List[float]:
+        """Embed a search query with the stores' embedding model"""
+        result = await db.execute(
+            select(VectorStore.embedding_model)
+            .where(VectorStore.id.in_(vector_store_ids))
+            .distinct()
+        )
+        models = result.scalars().all()
+        if len(models) != 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Vector stores must exist and share one embedding model"
+            )
+        provider = get_provider_for_model(models[0])
+        return (await provider.embed([query], models[0]))[0]
+    
+    @staticmethod
+    async def hybrid_search(
+        query: str,
+        vector_store_ids: List[uuid.UUID],
+        db: AsyncSession,
+        top_k: int = settings.RAG_TOP_K,
+        candidates: int = settings.RAG_HYBRID_CANDIDATES,
+        single_query: bool = False,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> List[RetrievedChunk]:
+        """
+        Lexical and vector retrieval merged with reciprocal rank fusion.
+        
+        Each retriever returns up to `candidates` chunks and the fused
+        `top_k` come back with their RRF score. By default the full-text
+        query runs on its own connection while the query is embedded and
+        the ANN search runs on `db`. With `single_query` both retrievers and
+        the fusion run as one SQL statement after the embedding call, which
+        saves a connection and a round trip at the cost of that overlap.
+        """
+        if single_query:
+            embedding = await RAGService.query_embedding(query, vector_store_ids, db)
+            return await RAGService._hybrid_search_sql(
+                query, embedding, vector_store_ids, db, top_k, candidates, probes, ef_search
+            )
+        
+        async def lexical() -> List[RetrievedChunk]:
+            async with AsyncSessionLocal() as session:
+                return await RAGService.lexical_search(query, vector_store_ids, session, candidates)
+        
+        async def semantic() -> List[RetrievedChunk]:
+            embedding = await RAGService.query_embedding(query, vector_store_ids, db)
+            return await RAGService.vector_search(
+                embedding, vector_store_ids, db, candidates, probes, ef_search
+            )
+        
+        lexical_hits, semantic_hits = await asyncio.gather(lexical(), semantic())
+        chunks = {chunk.id: chunk for chunk in lexical_hits + semantic_hits}
+        scores = reciprocal_rank_fusion(
+            [[chunk.id for chunk in lexical_hits], [chunk.id for chunk in semantic_hits]],
+            settings.RAG_RRF_K
+        )
+        best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return [replace(chunks[chunk_id], score=scores[chunk_id]) for chunk_id in best]
+    
+    @staticmethod
+    async def _hybrid_search_sql(
+        query: str,
+        query_embedding: List[float],
+        vector_store_ids: List[uuid.UUID],
+        db: AsyncSession,
+        top_k: int,
+        candidates: int,
+        probes: Optional[int],
+        ef_search: Optional[int]
+    ) -> List[RetrievedChunk]:
+        """Both retrievers and the rank fusion in one statement"""
+        for statement in vector_search_settings(probes, ef_search, candidates):
+            await db.execute(text(statement))
+        
+        in_stores = VectorChunk.vector_store_id.in_(vector_store_ids)
+        
+        # Each candidate set is ordered and limited before ranking, so the
+        # GIN and ANN indexes can serve it
+        tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+        text_rank = func.ts_rank_cd(VectorChunk.content_tsv, tsquery)
+        lexical_hits = (
+            select(VectorChunk.id, text_rank.label("score"))
+            .where(in_stores, VectorChunk.content_tsv.op("@@")(tsquery))
+            .order_by(text_rank.desc())
+            .limit(candidates)
+            .subquery()
+        )
+        lexical = select(
+            lexical_hits.c.id,
+            func.row_number().over(order_by=lexical_hits.c.score.desc()).label("rank")
+        ).cte("lexical")
+        
+        semantic_hits = RAGService._ann_hits(query_embedding, vector_store_ids, candidates)
+        semantic = select(
+            semantic_hits.c.id,
+            func.row_number().over(order_by=semantic_hits.c.distance).label("rank")
+        ).cte("semantic")
+        
+        rrf_k = settings.RAG_RRF_K
+        fused = (
+            select(
+                func.coalesce(lexical.c.id, semantic.c.id).label("id"),
+                (
+                    func.coalesce(1.0 / (lexical.c.rank + rrf_k), 0.0)
+                    + func.coalesce(1.0 / (semantic.c.rank + rrf_k), 0.0)
+                ).label("score"),
+            )
+            .select_from(lexical.join(semantic, lexical.c.id == semantic.c.id, full=True))
+            .cte("fused")
+        )
+        result = await db.execute(
+            select(*_CHUNK_COLUMNS, fused.c.score)
+            .join(fused, fused.c.id == VectorChunk.id)
+            .order_by(fused.c.score.desc())
+            .limit(top_k)
+        )
+        return [RetrievedChunk.from_row(row, float(row.score)) for row in result]
\ No newline at end of file
@@ -1,11 +1,16 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, delete, and_
+from sqlalchemy.orm import raiseload, selectinload
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 import uuid
 
 
+from app.cache import cache_invalidate_namespaces, cache_read_through, cache_read_through_local
+from app.config import settings
+from app.core.pagination import Page, before_keyset, decode_cursor, encode_cursor, split_page
+from app.core.serialization import response_columns, row_dicts
 from app.models.session import Session, SessionMode
 from app.models.message import Message
 from app.schemas.chat import SessionCreate, SessionUpdate, SessionResponse
@@ -36,6 +41,7 @@ class SessionService:
         db.add(new_session)
         await db.commit()
         await db.refresh(new_session)
+        await cache_invalidate_namespaces(("user", user_id))
         
         return SessionResponse.model_validate(new_session)
     
@@ -43,30 +49,60 @@ class SessionService:
     async def get_user_sessions(
         user_id: uuid.UUID,
         project_id: Optional[uuid.UUID],
-        db: AsyncSession
-    ) -> List[SessionResponse]:
-        """Get all sessions for a user, optionally filtered by project"""
-        query = select(Session).where(Session.user_id == user_id)
-        
-        if project_id:
-            query = query.where(Session.project_id == project_id)
+        db: AsyncSession,
+        limit: int = settings.PAGE_SIZE_DEFAULT,
+        cursor: Optional[str] = None
+    ) -> Page[Dict[str, Any]]:
+        """
+        Get a page of sessions for a user, most recently updated first, optionally filtered by project.
+        Pages are cached in the user's namespace, which every session, project
+        and message write invalidates.
+        """
+        async def load() -> Dict[str, Any]:
+            query = select(*response_columns(Session, SessionResponse)).where(Session.user_id == user_id)
+            
+            if project_id:
+                query = query.where(Session.project_id == project_id)
+            
+            after = decode_cursor(cursor, datetime, uuid.UUID)
+            if after:
+                query = query.where(before_keyset(Session.updated_at, Session.id, after))
+            
+            query = query.order_by(Session.updated_at.desc(), Session.id.desc()).limit(limit + 1)
+            
+            result = await db.execute(query)
+            sessions, has_more = split_page(row_dicts(result), limit)
+            return {
+                "items": sessions,
+                "next_cursor": encode_cursor(sessions[-1]["updated_at"], sessions[-1]["id"]) if has_more else None,
+            }
         
-        query = query.order_by(Session.updated_at.desc())
-        
-        result = await db.execute(query)
-        sessions = result.scalars().all()
-        return [SessionResponse.model_validate(s) for s in sessions]
+        page = await cache_read_through(
+            ("user", user_id),
+            f"sessions:{project_id or 'all'}:{limit}:{cursor or ''}",
+            load,
+            ttl=settings.LIST_CACHE_TTL
+        )
+        return Page(**page)
     
     @staticmethod
     async def get_session_by_id(
         session_id: uuid.UUID,
         user_id: uuid.UUID,
-        db: AsyncSession
+        db: AsyncSession,
+        with_messages: bool = False
     ) -> Optional[Session]:
-        """Get a specific session by ID"""
+        """
+        Get a specific session by ID
+        
+        Only the session row is loaded unless `with_messages` is set; touching
+        `session.messages` on a header-only load raises instead of silently
+        reading the whole history.
+        """
+        history = selectinload(Session.messages) if with_messages else raiseload(Session.messages)
         result = await db.execute(
             select(Session)
-            .options(selectinload(Session.messages))
+            .options(history)
             .where(
                 and_(
                     Session.id == session_id,
@@ -76,6 +112,32 @@ class SessionService:
         )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_session_cached(
+        session_id: uuid.UUID,
+        user_id: uuid.UUID,
+        db: AsyncSession
+    ) -> Dict[str, Any]:
+        """
+        Get a session header as a response dict through the two-tier cache.
+        Hot reads are served from this worker's memory; writes invalidate
+        every worker through the session's namespace.
+        """
+        async def load() -> Optional[Dict[str, Any]]:
+            session = await SessionService.get_session_by_id(session_id, user_id, db)
+            return SessionResponse.model_validate(session).model_dump(mode="json") if session else None
+        
+        session = await cache_read_through_local(("session", session_id), "session", load)
+        
+        # Cached by id, so ownership is checked on every read
+        if not session or session["user_id"] != str(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        
+        return session
+    
     @staticmethod
     async def update_session(
         session_id: uuid.UUID,
@@ -83,8 +145,19 @@ class SessionService:
         user_id: uuid.UUID,
         db: AsyncSession
     ) -> SessionResponse:
-        """Update a session"""
-        session = await SessionService.get_session_by_id(session_id, user_id, db)
+        """Update a session in a single UPDATE ... RETURNING"""
+        update_data = session_data.model_dump(exclude_unset=True)
+        
+        if update_data:
+            result = await db.execute(
+                update(Session)
+                .where(Session.id == session_id, Session.user_id == user_id)
+                .values(**update_data)
+                .returning(Session)
+            )
+            session = result.scalar_one_or_none()
+        else:
+            session = await SessionService.get_session_by_id(session_id, user_id, db)
         
         if not session:
             raise HTTPException(
@@ -92,15 +165,11 @@ class SessionService:
                 detail="Session not found"
             )
         
-        # Update fields
-        update_data = session_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(session, field, value)
-        
+        response = SessionResponse.model_validate(session)
         await db.commit()
-        await db.refresh(session)
+        await cache_invalidate_namespaces(("user", user_id), ("session", session_id))
         
-        return SessionResponse.model_validate(session)
+        return response
     
     @staticmethod
     async def delete_session(
@@ -108,17 +177,21 @@ class SessionService:
         user_id: uuid.UUID,
         db: AsyncSession
     ) -> bool:
-        """Delete a session"""
-        session = await SessionService.get_session_by_id(session_id, user_id, db)
+        """Delete a session; messages and attachments go with it via ON DELETE CASCADE"""
+        result = await db.execute(
+            delete(Session)
+            .where(Session.id == session_id, Session.user_id == user_id)
+            .returning(Session.id)
+        )
         
-        if not session:
+        if result.scalar_one_or_none() is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Session not found"
             )
         
-        await db.delete(session)
         await db.commit()
+        await cache_invalidate_namespaces(("user", user_id), ("session", session_id))
         
         return True
     
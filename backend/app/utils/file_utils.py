@@ -0,0 +1,165 @@
+from typing import Iterable, List, Optional, Tuple
+import hashlib
+import mimetypes
+import os
+import unicodedata
+
+
+from app.models.file import FileType
+
+
+# Bytes needed to sniff every signature below
+SNIFF_BYTES = 16
+
+# (offset, magic bytes, mime type), most specific first
+_SIGNATURES = (
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"\x1a\x45\xdf\xa3", "video/webm"),
+    (0, b"OggS", "audio/ogg"),
+    (0, b"fLaC", "audio/flac"),
+    (0, b"ID3", "audio/mpeg"),
+    (0, b"\x1f\x8b", "application/gzip"),
+    (4, b"ftypM4A", "audio/mp4"),
+    (4, b"ftypheic", "image/heic"),
+    (4, b"ftypqt", "video/quicktime"),
+    (4, b"ftyp", "video/mp4"),
+)
+
+# RIFF containers name their format at offset 8
+_RIFF_FORMATS = {
+    b"WEBP": "image/webp",
+    b"WAVE": "audio/wav",
+    b"AVI ": "video/x-msvideo",
+}
+
+# Declared types trusted when sniffing finds no signature: ZIP-based
+# office formats and text cannot be told apart by their first bytes
+_GENERIC_MIME_TYPES = {"application/octet-stream", "binary/octet-stream", ""}
+
+_DOCUMENT_MIME_TYPES = {
+    "application/pdf",
+    "application/msword",
+    "application/rtf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "application/vnd.ms-powerpoint",
+    "text/plain",
+    "text/markdown",
+    "text/html",
+}
+
+_SPREADSHEET_MIME_TYPES = {
+    "text/csv",
+    "application/vnd.ms-excel",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+_CODE_EXTENSIONS = {
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".java", ".c", ".h", ".cpp", ".hpp", ".cs",
+    ".go", ".rs", ".rb", ".php", ".swift", ".kt", ".scala", ".sh", ".sql", ".json",
+    ".yaml", ".yml", ".toml", ".xml", ".css",
+}
+
+
+
+
+def sniff_mime_type(head: bytes) -> Optional[str]:
+    """Mime type from a file's leading bytes, or None if no signature matches"""
+    if head[:4] == b"RIFF" and head[8:12] in _RIFF_FORMATS:
+        return _RIFF_FORMATS[head[8:12]]
+    if head[:2] == b"\xff\xfb" or head[:2] == b"\xff\xf3":
+        return "audio/mpeg"
+    for offset, magic, mime_type in _SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            return mime_type
+    return None
+
+
+
+
+def resolve_mime_type(head: bytes, filename: str, declared: Optional[str]) -> str:
+    """
+    Mime type for an upload: the sniffed signature wins, then the type the
+    client declared, then the filename extension
+    """
+    sniffed = sniff_mime_type(head)
+    if sniffed:
+        return sniffed
+    declared = (declared or "").split(";")[0].strip().lower()
+    if declared not in _GENERIC_MIME_TYPES:
+        return declared
+    guessed, _ = mimetypes.guess_type(filename)
+    return guessed or "application/octet-stream"
+
+
+
+
+def file_type_for(mime_type: str, filename: str) -> FileType:
+    """FileType for a mime type, with the extension deciding source code"""
+    if os.path.splitext(filename)[1].lower() in _CODE_EXTENSIONS:
+        return FileType.CODE
+    if mime_type.startswith("image/"):
+        return FileType.IMAGE
+    if mime_type.startswith("video/"):
+        return FileType.VIDEO
+    if mime_type.startswith("audio/"):
+        return FileType.AUDIO
+    if mime_type in _SPREADSHEET_MIME_TYPES:
+        return FileType.SPREADSHEET
+    if mime_type in _DOCUMENT_MIME_TYPES or mime_type.startswith("text/"):
+        return FileType.DOCUMENT
+    return FileType.OTHER
+
+
+
+
+def safe_filename(filename: Optional[str], max_length: int = 255) -> str:
+    """Client-supplied filename reduced to a printable base name"""
+    name = os.path.basename((filename or "").replace("\\", "/"))
+    name = "".join(ch for ch in unicodedata.normalize("NFC", name) if unicodedata.category(ch)[0] != "C")
+    name = name.strip().lstrip(".")
+    if not name:
+        return "upload"
+    stem, ext = os.path.splitext(name)
+    return stem[:max_length - len(ext)] + ext if len(name) > max_length else name
+
+
+
+
+def fsync_directory(path: str):
+    """Make a rename or new file in a directory durable"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """Hex SHA-256 of a file's contents, read in blocks"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while block := handle.read(block_size):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+
+
+def merge_ranges(ranges: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sorted, non-overlapping union of half-open [start, end) byte ranges"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
\ No newline at end of file
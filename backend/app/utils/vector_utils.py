@@ -0,0 +1,408 @@
+from typing import AsyncIterable, AsyncIterator, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+import hashlib
+import math
+import os
+import re
+import time
+import unicodedata
+import uuid
+import numpy as np
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+from sqlalchemy import Float, cast, func, literal
+
+
+from app.config import settings
+
+
+T = TypeVar("T")
+
+VECTOR_INDEX_NAME = "idx_vector_chunks_embedding"
+
+# ANN index precisions: indexed expression and operator class. Reduced
+# precisions index a cast of the full-precision column, so the table keeps
+# exact embeddings for rescoring and converting is only an index rebuild.
+_INDEX_PRECISIONS = {
+    "full": ("{column}", "vector_cosine_ops"),
+    "half": ("(({column})::halfvec({dimension}))", "halfvec_cosine_ops"),
+    "binary": ("(binary_quantize({column})::bit({dimension}))", "bit_hamming_ops"),
+}
+
+# Text search configuration for chunk content. 'simple' does no stemming and
+# keeps stop words, so identifiers and code symbols match exactly. Changing
+# it requires rebuilding vector_chunks.content_tsv.
+TEXT_SEARCH_CONFIG = "simple"
+
+# Preferred split points, best first
+_SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+
+
+class TextChunker:
+    """
+    Incremental text splitter for streaming ingestion.
+    
+    Text is fed in blocks as it is read and complete chunks of about `size`
+    characters come back, each overlapping the previous one by roughly
+    `overlap` characters. Chunks end at a paragraph, line, sentence or word
+    boundary when one exists in the second half of the window. Only the
+    unfinished tail is buffered, so memory is bounded by the block size.
+    """
+    
+    def __init__(self, size: int, overlap: int):
+        if size <= 0 or not 0 <= overlap < size // 2:
+            raise ValueError("Chunk overlap must be smaller than half the chunk size")
+        self.size = size
+        self.overlap = overlap
+        self._buffer = ""
+    
+    def _cut(self, text: str, start: int) -> int:
+        end = start + self.size
+        floor = start + self.size // 2
+        for separator in _SEPARATORS:
+            index = text.rfind(separator, floor, end)
+            if index != -1:
+                return index + len(separator)
+        return end
+    
+    def _next_start(self, text: str, cut: int) -> int:
+        if not self.overlap:
+            return cut
+        start = cut - self.overlap
+        # Begin the overlap on a word boundary
+        index = text.find(" ", start, cut)
+        return index + 1 if index != -1 else start
+    
+    def feed(self, text: str) -> List[str]:
+        """Add text and return the chunks it completes"""
+        buffer = self._buffer + text
+        chunks = []
+        start = 0
+        while len(buffer) - start >= self.size:
+            cut = self._cut(buffer, start)
+            chunk = buffer[start:cut].strip()
+            if chunk:
+                chunks.append(chunk)
+            start = self._next_start(buffer, cut)
+        self._buffer = buffer[start:]
+        return chunks
+    
+    def flush(self) -> List[str]:
+        """Return the final partial chunk, if any"""
+        chunk = self._buffer.strip()
+        self._buffer = ""
+        return [chunk] if chunk else []
+
+
+
+
+async def abatched(items: AsyncIterable[T], size: int) -> AsyncIterator[List[T]]:
+    """Group an async stream into lists of at most `size` items"""
+    batch: List[T] = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+
+
+def ivfflat_lists(row_count: int) -> int:
+    """pgvector's guideline for ivfflat lists: rows / 1000 up to 1M rows, sqrt(rows) beyond"""
+    if row_count <= 1_000_000:
+        return max(row_count // 1000, 1)
+    return int(math.sqrt(row_count))
+
+
+
+
+def vector_index_params(row_count: Optional[int] = None) -> Dict[str, int]:
+    """Storage parameters for the configured ANN index type"""
+    if settings.VECTOR_INDEX_TYPE == "hnsw":
+        return {"m": settings.VECTOR_HNSW_M, "ef_construction": settings.VECTOR_HNSW_EF_CONSTRUCTION}
+    if settings.VECTOR_INDEX_TYPE == "ivfflat":
+        if settings.VECTOR_IVFFLAT_LISTS:
+            return {"lists": settings.VECTOR_IVFFLAT_LISTS}
+        return {"lists": ivfflat_lists(row_count) if row_count is not None else 100}
+    raise ValueError(f"Unknown VECTOR_INDEX_TYPE: {settings.VECTOR_INDEX_TYPE}")
+
+
+
+
+def _index_precision():
+    if settings.VECTOR_INDEX_PRECISION not in _INDEX_PRECISIONS:
+        raise ValueError(f"Unknown VECTOR_INDEX_PRECISION: {settings.VECTOR_INDEX_PRECISION}")
+    return _INDEX_PRECISIONS[settings.VECTOR_INDEX_PRECISION]
+
+
+
+
+def vector_index_ddl(
+    name: str,
+    row_count: int,
+    table: str = "vector_chunks",
+    column: str = "embedding",
+    concurrently: bool = True
+) -> str:
+    """CREATE INDEX statement for the configured ANN index, sized for `row_count` rows"""
+    params = ", ".join(f"{key} = {value}" for key, value in vector_index_params(row_count).items())
+    expression, opclass = _index_precision()
+    expression = expression.format(column=column, dimension=settings.VECTOR_DIMENSION)
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}{name} ON {table} "
+        f"USING {settings.VECTOR_INDEX_TYPE} ({expression} {opclass}) WITH ({params})"
+    )
+
+
+
+
+def vector_index_target(column):
+    """Expression the ANN index is built on and its postgresql_ops, for the model's Index"""
+    _, opclass = _index_precision()
+    dimension = settings.VECTOR_DIMENSION
+    if settings.VECTOR_INDEX_PRECISION == "half":
+        expression = cast(column, HALFVEC(dimension)).label(f"{column.key}_half")
+    elif settings.VECTOR_INDEX_PRECISION == "binary":
+        expression = cast(func.binary_quantize(column), BIT(dimension)).label(f"{column.key}_binary")
+    else:
+        expression = column
+    return expression, {expression.key: opclass}
+
+
+
+
+def vector_index_distance(column, query: Sequence[float]):
+    """
+    Distance the ANN index orders by for VECTOR_INDEX_PRECISION. For
+    reduced precisions it only ranks candidates; rescore them with
+    `column.cosine_distance(query)`.
+    """
+    _index_precision()
+    dimension = settings.VECTOR_DIMENSION
+    query = literal(list(query), Vector(dimension))
+    if settings.VECTOR_INDEX_PRECISION == "half":
+        return cast(column, HALFVEC(dimension)).op("<=>", return_type=Float)(cast(query, HALFVEC(dimension)))
+    if settings.VECTOR_INDEX_PRECISION == "binary":
+        return cast(func.binary_quantize(column), BIT(dimension)).op("<~>", return_type=Float)(
+            cast(func.binary_quantize(query), BIT(dimension))
+        )
+    return column.cosine_distance(query)
+
+
+
+
+def vector_shortlist_size(limit: int) -> int:
+    """Rows the ANN index must return for `limit` results: more when they are rescored at full precision"""
+    if settings.VECTOR_INDEX_PRECISION == "full":
+        return limit
+    return limit * settings.VECTOR_RESCORE_MULTIPLIER
+
+
+
+
+def vector_search_settings(
+    probes: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[str]:
+    """
+    SET LOCAL statements that tune recall against latency for one search
+    transaction. With `limit`, the search is widened to cover its index
+    shortlist (see `vector_shortlist_size`): an HNSW scan returns at most
+    ef_search rows, so it is raised to the shortlist size, and ivfflat
+    probes are scaled by the rescore multiplier.
+    """
+    shortlist = vector_shortlist_size(limit) if limit else 0
+    if settings.VECTOR_INDEX_TYPE == "hnsw":
+        ef_search = max(int(ef_search or settings.VECTOR_HNSW_EF_SEARCH), shortlist)
+        return [f"SET LOCAL hnsw.ef_search = {ef_search}"]
+    probes = int(probes or settings.VECTOR_IVFFLAT_PROBES)
+    if limit:
+        probes *= shortlist // limit
+    return [f"SET LOCAL ivfflat.probes = {probes}"]
+
+
+
+
+def vector_index_rebuild_statements(row_count: int) -> List[str]:
+    """
+    Statements that rebuild the ANN index for the current settings without
+    blocking writes: build a replacement concurrently, then swap it in.
+    Must run outside a transaction.
+    """
+    replacement = f"{VECTOR_INDEX_NAME}_new"
+    return [
+        f"DROP INDEX CONCURRENTLY IF EXISTS {replacement}",
+        vector_index_ddl(replacement, row_count),
+        f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX_NAME}",
+        f"ALTER INDEX {replacement} RENAME TO {VECTOR_INDEX_NAME}",
+    ]
+
+
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[Hashable]], k: int = 60) -> Dict[Hashable, float]:
+    """
+    Merge ranked id lists with reciprocal rank fusion: each list contributes
+    1 / (k + rank) per id, so ids ranked well by several retrievers rise and
+    no score normalization between retrievers is needed
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return scores
+
+
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of a text for embedding cache keys: Unicode NFC with
+    whitespace runs collapsed. Case is kept, since it can change an embedding.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+
+
+def content_hash(text: str) -> str:
+    """Hex SHA-256 of the normalized text"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+
+
+def normalize_rows(matrix) -> np.ndarray:
+    """float32 copy of a matrix with unit-length rows; zero rows stay zero"""
+    matrix = np.array(matrix, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+
+
+def top_k_cosine(matrix: np.ndarray, query: Sequence[float], k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row indices and cosine similarities of the `k` rows of a row-normalized
+    matrix closest to `query`, best first. One matrix-vector product, then
+    argpartition so only the k winners are sorted.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    scores = matrix @ (query / norm if norm else query)
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+    candidates = np.argpartition(scores, -k)[-k:] if k < len(scores) else np.arange(len(scores))
+    best = candidates[np.argsort(scores[candidates])[::-1]]
+    return best, scores[best]
+
+
+
+
+class VectorMatrix:
+    """
+    Chunk ids and their row-normalized float32 embeddings, searched exactly
+    by brute force. Opened from the matrix cache the embeddings are memory
+    mapped, so workers on one host share them through the page cache.
+    """
+    
+    def __init__(self, ids: np.ndarray, matrix: np.ndarray):
+        self.ids = ids  # (n, 16) uint8, UUID bytes
+        self.matrix = matrix
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def search(self, query: Sequence[float], k: int) -> List[Tuple[uuid.UUID, float]]:
+        """(chunk id, cosine similarity) of the k nearest rows, best first"""
+        rows, scores = top_k_cosine(self.matrix, query, k)
+        return [(uuid.UUID(bytes=self.ids[row].tobytes()), float(score)) for row, score in zip(rows, scores)]
+
+
+
+
+_MATRIX_FILE = re.compile(r"v(\d+)\.npy(?:\.ids\.npy)?")
+
+
+
+
+def _ids_path(path: str) -> str:
+    return f"{path}.ids.npy"
+
+
+
+
+def write_vector_matrix(path: str, ids: Sequence[uuid.UUID], embeddings: Sequence[Sequence[float]]) -> VectorMatrix:
+    """
+    Normalize embeddings and write them to `path` (`v<version>.npy`) with
+    their ids, then open the result memory mapped. Files are replaced
+    atomically. Older versions in the same directory are removed once
+    they have been superseded for VECTOR_MATRIX_GRACE_S, so readers in
+    other workers still on an older version can finish opening it; a
+    mapping that is already open survives the unlink.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    id_bytes = np.frombuffer(b"".join(chunk_id.bytes for chunk_id in ids), dtype=np.uint8).reshape(-1, 16)
+    matrix = normalize_rows(embeddings) if len(ids) else np.empty((0, settings.VECTOR_DIMENSION), dtype=np.float32)
+    
+    # The matrix lands last, so a complete matrix file implies its ids file
+    for target, array in ((_ids_path(path), id_bytes), (path, matrix)):
+        temporary = f"{target}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as handle:
+            np.save(handle, array)
+        os.replace(temporary, target)
+    
+    # A version is superseded when a newer one is written, so anything
+    # older than the newest version written before the grace period can go
+    expired = time.time() - settings.VECTOR_MATRIX_GRACE_S
+    versions: Dict[str, int] = {}
+    settled = -1
+    for name in os.listdir(directory):
+        version = _matrix_version(name)
+        if version is None:
+            continue
+        versions[name] = version
+        try:
+            if os.path.getmtime(os.path.join(directory, name)) < expired:
+                settled = max(settled, version)
+        except FileNotFoundError:
+            pass
+    for name, version in versions.items():
+        if version < settled:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+    return open_vector_matrix(path)
+
+
+
+
+def _matrix_version(name: str) -> Optional[int]:
+    """Version of a matrix or ids file name, None for anything else (e.g. .tmp files)"""
+    match = _MATRIX_FILE.fullmatch(name)
+    return int(match.group(1)) if match else None
+
+
+
+
+def open_vector_matrix(path: str) -> Optional[VectorMatrix]:
+    """Open a matrix written by write_vector_matrix, or None if there is none"""
+    try:
+        ids = np.load(_ids_path(path))
+        # Empty arrays cannot be memory mapped
+        matrix = np.load(path, mmap_mode="r" if len(ids) else None)
+    except FileNotFoundError:
+        # Not written yet, or an old version removed after its grace period
+        return None
+    return VectorMatrix(ids, matrix)
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+Background job worker.
+
+Runs file processing and indexing jobs from the Redis job stream, with CPU-bound steps
+in a process pool so extraction never blocks an event loop. Start as many
+as needed, on any hosts sharing Redis and the upload directory:
+
+    python -m app.worker
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import uuid
+
+
+from app.cache import close_redis
+from app.config import settings
+from app.core.jobs import Job, JobConsumer, enqueue_job, job_queued
+from app.database import AsyncSessionLocal, engine
+from app.services.ocr_service import OCRService
+from app.services.processing_service import ProcessingService
+from app.services.rag_service import RAGService
+
+
+# kind -> (run(job, pool), on_dead_letter(payload, error))
+JobHandler = Callable[[Job, Executor], Awaitable[None]]
+DeadLetterHandler = Callable[[Dict[str, Any], str], Awaitable[None]]
+
+HANDLERS: Dict[str, Tuple[JobHandler, DeadLetterHandler]] = {
+    "process_file": (
+        lambda job, pool: ProcessingService.process_file(uuid.UUID(job.payload["file_id"]), pool, job),
+        lambda payload, error: ProcessingService.mark_failed(uuid.UUID(payload["file_id"]), error),
+    ),
+    "ingest_file": (
+        lambda job, pool: RAGService.run_ingest_job(
+            uuid.UUID(job.payload["file_id"]), uuid.UUID(job.payload["vector_store_id"])
+        ),
+        lambda payload, error: RAGService.mark_ingest_failed(uuid.UUID(payload["file_id"]), error),
+    ),
+}
+
+
+
+
+async def _keep_extending(consumer: JobConsumer, job: Job, work: asyncio.Task, lease_lost: asyncio.Event):
+    """
+    Extend the job every third of the visibility timeout. Failed extensions
+    are retried; if the timeout passes without one, the job may already be
+    redelivered elsewhere, so this attempt is cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    interval = settings.JOB_VISIBILITY_TIMEOUT_S / 3
+    extended_at = loop.time()
+    delay = interval
+    while True:
+        await asyncio.sleep(delay)
+        try:
+            await consumer.extend(job)
+        except RedisError:
+            if loop.time() - extended_at >= settings.JOB_VISIBILITY_TIMEOUT_S:
+                lease_lost.set()
+                work.cancel()
+                return
+            delay = min(5.0, interval)
+            continue
+        extended_at = loop.time()
+        delay = interval
+
+
+
+
+async def _reconcile_periodically():
+    """
+    Requeue files whose job is gone (see ProcessingService.claim_stale_pending);
+    files whose job is still waiting in a long backlog are left to it
+    """
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                file_ids = await ProcessingService.claim_stale_pending(db)
+            for file_id in file_ids:
+                payload = {"file_id": str(file_id)}
+                if not await job_queued("process_file", payload):
+                    await enqueue_job("process_file", payload)
+        except (SQLAlchemyError, RedisError):
+            # Claimed files not enqueued are picked up again next interval
+            pass
+        await asyncio.sleep(settings.JOB_RECONCILE_INTERVAL_S)
+
+
+
+
+async def _sweep_ocr_cache_periodically():
+    while True:
+        try:
+            await OCRService.sweep_cache()
+        except OSError:
+            pass
+        await asyncio.sleep(settings.OCR_CACHE_SWEEP_INTERVAL_S)
+
+
+
+
+async def _run_job(consumer: JobConsumer, job: Job, pool: Executor):
+    run, on_dead_letter = HANDLERS.get(job.kind, (None, None))
+    if run is None:
+        await consumer.dead_letter(job, f"Unknown job kind: {job.kind}")
+        return
+    if job.attempt > settings.JOB_MAX_ATTEMPTS:
+        error = "Worker stopped responding on every attempt"
+        await on_dead_letter(job.payload, error)
+        await consumer.dead_letter(job, error)
+        return
+    
+    work = asyncio.create_task(run(job, pool))
+    lease_lost = asyncio.Event()
+    heartbeat = asyncio.create_task(_keep_extending(consumer, job, work, lease_lost))
+    try:
+        await work
+    except asyncio.CancelledError:
+        if not lease_lost.is_set():
+            raise
+        # Another worker may own the job now; redelivery decides what happens
+        return
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        if job.attempt < settings.JOB_MAX_ATTEMPTS:
+            await asyncio.sleep(min(2 ** job.attempt, 30))
+            await consumer.retry(job)
+        else:
+            await on_dead_letter(job.payload, error)
+            await consumer.dead_letter(job, error)
+        return
+    finally:
+        heartbeat.cancel()
+    await consumer.ack(job)
+
+
+
+
+async def run_worker():
+    consumer = JobConsumer(f"{socket.gethostname()}-{os.getpid()}")
+    await consumer.setup()
+    
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    
+    # Spawned, not forked: children must not inherit the event loop's sockets
+    pool = ProcessPoolExecutor(
+        max_workers=settings.JOB_WORKER_PROCESSES,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    running: Set[asyncio.Task] = set()
+    maintenance = [
+        asyncio.create_task(_reconcile_periodically()),
+        asyncio.create_task(_sweep_ocr_cache_periodically()),
+    ]
+    print(f"👷 Worker {consumer.name} started")
+    try:
+        while not stopping.is_set():
+            if len(running) >= settings.JOB_WORKER_CONCURRENCY:
+                await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            try:
+                jobs = await consumer.read(settings.JOB_WORKER_CONCURRENCY - len(running))
+            except RedisError:
+                await asyncio.sleep(1.0)
+                continue
+            for job in jobs:
+                task = asyncio.create_task(_run_job(consumer, job, pool))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        
+        # Unfinished jobs stay pending and are redelivered after the
+        # visibility timeout
+        if running:
+            await asyncio.wait(running, timeout=settings.JOB_VISIBILITY_TIMEOUT_S)
+    finally:
+        for task in maintenance:
+            task.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+        await engine.dispose()
+        await close_redis()
+        print(f"✅ Worker {consumer.name} stopped")
+
+
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Micro-benchmark: hydrating a page of cached sessions from Redis.
+
+Stores one cached entry per session, then reads the page back key by key
+(one round trip each) and with cache_get_many (one MGET), and writes it
+with cache_set one key at a time and with cache_set_many (one pipeline).
+Payload sizes are reported for both serializers.
+
+Needs a reachable Redis at REDIS_URL; the benchmark keys are removed at
+the end.
+
+Usage (from backend/):
+    python -m scripts.bench_cache_batching --sessions 50 --repeat 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/unused")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app import cache  # noqa: E402
+from app.cache import (  # noqa: E402
+    cache_clear_pattern,
+    cache_get,
+    cache_get_many,
+    cache_set,
+    cache_set_many,
+    close_redis,
+)
+from app.config import settings  # noqa: E402
+
+
+KEY_PREFIX = "bench:cache-batching"
+
+
+
+
+def _sessions(count: int) -> dict:
+    now = datetime.now(timezone.utc)
+    user_id = uuid.uuid4()
+    return {
+        f"{KEY_PREFIX}:{i}": {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "project_id": None,
+            "title": f"Session {i}",
+            "mode": "chat",
+            "llm_model": "gpt-4o",
+            "system_prompt": "You are a helpful assistant.",
+            "settings": {"temperature": 0.7},
+            "context_summary": None,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+        }
+        for i in range(count)
+    }
+
+
+
+
+async def _time(label: str, fn, repeat: int, round_trips: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    median = statistics.median(timings)
+    print(f"{label:<22} round trips={round_trips:3d}  median={median:7.3f}ms  p95={sorted(timings)[int(len(timings) * 0.95)]:7.3f}ms")
+    return median
+
+
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    items = _sessions(args.sessions)
+    keys = list(items)
+
+    for name in ("json", "msgpack"):
+        try:
+            dumps, _ = cache._select_serializer(name)
+        except RuntimeError:
+            print(f"{name:<8} not installed")
+            continue
+        size = sum(len(dumps(value)) for value in items.values())
+        print(f"{name:<8} payload for {args.sessions} sessions: {size} bytes")
+    print(f"serializer in use: {settings.CACHE_SERIALIZER}\n")
+
+    async def set_each():
+        for key, value in items.items():
+            await cache_set(key, value, ttl=60)
+
+    async def get_each():
+        return [await cache_get(key) for key in keys]
+
+    try:
+        await _time("set one by one", set_each, args.repeat, len(keys))
+        await _time("cache_set_many", lambda: cache_set_many(items, ttl=60), args.repeat, 1)
+        sequential = await _time("get one by one", get_each, args.repeat, len(keys))
+        batched = await _time("cache_get_many", lambda: cache_get_many(keys), args.repeat, 1)
+        print(f"\nhydration speed-up: {sequential / batched:.1f}x, {len(keys) - 1} round trips saved per page")
+    finally:
+        await cache_clear_pattern(f"{KEY_PREFIX}:*")
+        await close_redis()
+
+
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""
+Micro-benchmark: serializing a 1,000-session list response.
+
+Compares the previous path, where the service validated each ORM object
+into SessionResponse and FastAPI validated, serialized and JSON-encoded the
+list again against response_model, with the row-tuple path, where the rows
+are turned into dicts once and encoded by ORJSONResponse.
+
+Runs without a database: ORM objects and result rows are built in memory,
+so only serialization cost is measured.
+
+Usage (from backend/):
+    python -m scripts.bench_list_serialization --sessions 1000 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/unused")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy.engine import result_tuple  # noqa: E402
+
+from app.core.serialization import response_columns, row_dicts  # noqa: E402
+from app.models import Session, SessionMode  # noqa: E402
+from app.schemas.chat import SessionResponse  # noqa: E402
+
+
+
+
+def _fixtures(count: int):
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    values = [
+        {
+            "title": f"Session {i}",
+            "mode": SessionMode.CHAT,
+            "llm_model": "gpt-4o",
+            "system_prompt": "You are a helpful assistant.",
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "project_id": None,
+            "settings": {"temperature": 0.7},
+            "context_summary": None,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+    sessions = [Session(**v) for v in values]
+
+    columns = response_columns(Session, SessionResponse)
+    make_row = result_tuple([c.key for c in columns])
+    rows = [make_row(tuple(v[c.key] for c in columns)) for v in values]
+    return sessions, rows
+
+
+
+
+def _previous_path(sessions, adapter: TypeAdapter) -> bytes:
+    # Service: one model per ORM object
+    items = [SessionResponse.model_validate(s) for s in sessions]
+    # FastAPI: validate against response_model, serialize, then json.dumps
+    validated = adapter.validate_python(items)
+    return JSONResponse(content=adapter.dump_python(validated, mode="json")).body
+
+
+
+
+def _row_path(rows) -> bytes:
+    return ORJSONResponse(content=row_dicts(rows)).body
+
+
+
+
+def _time(label: str, fn, repeat: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    median = statistics.median(timings)
+    print(f"{label:<10} median={median:7.2f}ms  min={min(timings):7.2f}ms  max={max(timings):7.2f}ms")
+    return median
+
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    sessions, rows = _fixtures(args.sessions)
+    adapter = TypeAdapter(List[SessionResponse])
+
+    previous = _previous_path(sessions, adapter)
+    current = _row_path(rows)
+    print(f"{args.sessions} sessions, body {len(previous)} bytes (previous) / {len(current)} bytes (rows)")
+
+    before = _time("previous", lambda: _previous_path(sessions, adapter), args.repeat)
+    after = _time("rows", lambda: _row_path(rows), args.repeat)
+    print(f"speed-up: {before / after:.1f}x")
+
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Micro-benchmark: event-loop lag during a burst of concurrent logins.
+
+Runs N concurrent password verifications twice: once calling bcrypt
+inline on the event loop (the old behaviour) and once through the bounded
+hashing pool. A ticker task sleeps in short intervals and records how late
+each wake-up is; that lateness is what every streaming response on the
+same worker would feel.
+
+Usage (from backend/):
+    python -m scripts.bench_password_hashing --logins 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/unused")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core import security  # noqa: E402
+from app.core.security import (  # noqa: E402
+    PasswordHasherBusy,
+    get_password_hash,
+    verify_password,
+    verify_password_async,
+)
+
+
+TICK = 0.005  # seconds between ticker wake-ups
+
+
+
+
+async def _ticker(stop: asyncio.Event, lags: list):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+
+
+async def _blocking_login(password: str, hashed: str):
+    # Yield once so logins interleave with the ticker like real requests
+    await asyncio.sleep(0)
+    return verify_password(password, hashed)
+
+
+
+
+async def _pooled_login(password: str, hashed: str):
+    try:
+        valid, _ = await verify_password_async(password, hashed)
+        return valid
+    except PasswordHasherBusy:
+        return None
+
+
+
+
+async def _run(label: str, login, logins: int, password: str, hashed: str):
+    lags: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stop, lags))
+    await asyncio.sleep(TICK * 2)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login(password, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+
+    rejected = sum(1 for r in results if r is None)
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{label:<10} total={elapsed:6.2f}s  rejected={rejected:3d}  "
+        f"loop lag: mean={statistics.mean(lags_ms):7.1f}ms  "
+        f"p99={p99:7.1f}ms  max={lags_ms[-1]:7.1f}ms"
+    )
+
+
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50)
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    hashed = get_password_hash(password)
+    print(
+        f"{args.logins} concurrent logins, bcrypt rounds={security.settings.BCRYPT_ROUNDS}, "
+        f"workers={security.settings.PASSWORD_HASH_WORKERS}, "
+        f"queue limit={security.settings.PASSWORD_HASH_MAX_QUEUE}"
+    )
+
+    await _run("inline", _blocking_login, args.logins, password, hashed)
+    await _run("pooled", _pooled_login, args.logins, password, hashed)
+    security.shutdown_password_hasher()
+
+
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""
+Benchmark behind VECTOR_LOCAL_SEARCH_MAX_CHUNKS: in-process exact search
+versus a pgvector ANN query, by store size.
+
+For each size, random unit vectors are written to a memory-mapped matrix
+(as rag_service caches small stores) and to a scratch table with the
+configured ANN index. The local path is timed as brute-force top-k plus the
+primary key fetch rag_service makes for the winners; the pgvector path as
+one ORDER BY <=> LIMIT query. The largest size where the local path is
+still faster is the cutoff to configure. The scratch table and matrix files
+are removed at the end.
+
+Usage (from backend/, against a local pgvector database):
+    python -m scripts.bench_vector_engine --sizes 1000,2000,5000,10000,20000 --dimension 1536
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from typing import List
+
+import numpy as np
+from sqlalchemy import text
+
+from app.database import engine
+from app.utils.vector_utils import vector_index_ddl, write_vector_matrix
+
+
+TABLE = "bench_vector_engine"
+
+
+
+
+def _vector_literal(vector: np.ndarray) -> str:
+    return "[" + ",".join(f"{v:.6f}" for v in vector) + "]"
+
+
+
+
+async def _seed(conn, ids: List[uuid.UUID], vectors: np.ndarray):
+    await conn.execute(text(f"TRUNCATE {TABLE}"))
+    for start in range(0, len(ids), 1000):
+        await conn.execute(
+            text(f"INSERT INTO {TABLE} (id, embedding) VALUES (:id, CAST(:embedding AS vector))"),
+            [
+                {"id": chunk_id, "embedding": _vector_literal(vector)}
+                for chunk_id, vector in zip(ids[start:start + 1000], vectors[start:start + 1000])
+            ],
+        )
+
+
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,2000,5000,10000,20000")
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=8)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    rng = np.random.default_rng(0)
+    cutoff = 0
+
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+            await conn.execute(text(f"CREATE TABLE {TABLE} (id uuid PRIMARY KEY, embedding vector({args.dimension}))"))
+            try:
+                with tempfile.TemporaryDirectory() as directory:
+                    print(f"{'chunks':>8}  {'local ms':>9}  {'pgvector ms':>11}")
+                    for size in sizes:
+                        ids = [uuid.uuid4() for _ in range(size)]
+                        vectors = rng.standard_normal((size, args.dimension), dtype=np.float32)
+                        matrix = write_vector_matrix(os.path.join(directory, str(size), "v1.npy"), ids, vectors)
+                        await _seed(conn, ids, vectors)
+                        await conn.execute(text(f"DROP INDEX IF EXISTS {TABLE}_embedding_idx"))
+                        await conn.execute(text(vector_index_ddl(f"{TABLE}_embedding_idx", size, table=TABLE, concurrently=False)))
+                        await conn.execute(text(f"ANALYZE {TABLE}"))
+
+                        queries = rng.standard_normal((args.queries, args.dimension), dtype=np.float32)
+                        local, remote = [], []
+                        for query in queries:
+                            started = time.perf_counter()
+                            hits = await asyncio.to_thread(matrix.search, query, args.k)
+                            await conn.execute(
+                                text(f"SELECT id FROM {TABLE} WHERE id = ANY(:ids)"),
+                                {"ids": [chunk_id for chunk_id, _ in hits]},
+                            )
+                            local.append((time.perf_counter() - started) * 1000)
+
+                            started = time.perf_counter()
+                            await conn.execute(
+                                text(f"SELECT id FROM {TABLE} ORDER BY embedding <=> CAST(:query AS vector) LIMIT :k"),
+                                {"query": _vector_literal(query), "k": args.k},
+                            )
+                            remote.append((time.perf_counter() - started) * 1000)
+
+                        local_ms, remote_ms = statistics.median(local), statistics.median(remote)
+                        if local_ms <= remote_ms:
+                            cutoff = size
+                        print(f"{size:>8}  {local_ms:>9.2f}  {remote_ms:>11.2f}")
+            finally:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    finally:
+        await engine.dispose()
+
+    print(f"\nlocal search is faster up to {cutoff} chunks; set VECTOR_LOCAL_SEARCH_MAX_CHUNKS accordingly")
+
+
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Recall-versus-latency benchmark for the ANN index settings.
+
+Seeds a scratch table with random unit vectors in a local pgvector
+database, builds the configured index type (VECTOR_INDEX_TYPE, sized for
+the seeded row count), and for each probes / ef_search value measures
+search latency and recall@k against exact results from a sequential scan.
+The scratch table is dropped at the end.
+
+Usage (from backend/):
+    python -m scripts.bench_vector_recall --rows 100000 --dimension 256 --values 10,20,40,80,160
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import List
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+from app.utils.vector_utils import vector_index_ddl, vector_search_settings
+
+
+TABLE = "bench_vector_recall"
+
+
+
+
+def _random_vector(dimension: int) -> str:
+    values = [random.gauss(0.0, 1.0) for _ in range(dimension)]
+    norm = sum(v * v for v in values) ** 0.5
+    return "[" + ",".join(f"{v / norm:.6f}" for v in values) + "]"
+
+
+
+
+async def _nearest(conn, query: str, k: int, statements: List[str]):
+    # SET LOCAL settings and the search share one transaction
+    async with conn.begin():
+        for statement in statements:
+            await conn.execute(text(statement))
+        started = time.perf_counter()
+        result = await conn.execute(
+            text(f"SELECT id FROM {TABLE} ORDER BY embedding <=> CAST(:query AS vector) LIMIT :k"),
+            {"query": query, "k": k},
+        )
+        ids = {row.id for row in result}
+        return ids, (time.perf_counter() - started) * 1000
+
+
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--values", default="", help="comma-separated probes (ivfflat) or ef_search (hnsw) values")
+    args = parser.parse_args()
+    if settings.VECTOR_INDEX_PRECISION != "full":
+        parser.error("measures full-precision indexes only; run with VECTOR_INDEX_PRECISION=full")
+
+    hnsw = settings.VECTOR_INDEX_TYPE == "hnsw"
+    knob = "ef_search" if hnsw else "probes"
+    default_values = "10,20,40,80,160" if hnsw else "1,5,10,20,50"
+    values = [int(v) for v in (args.values or default_values).split(",")]
+
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+            await conn.execute(text(f"CREATE TABLE {TABLE} (id bigserial PRIMARY KEY, embedding vector({args.dimension}))"))
+
+            print(f"Seeding {args.rows} vectors of dimension {args.dimension}...")
+            started = time.perf_counter()
+            # The correlated g reference makes Postgres draw a new array per row
+            await conn.execute(text(f"""
+                INSERT INTO {TABLE} (embedding)
+                SELECT (SELECT array_agg(random() - 0.5 + g * 0) FROM generate_series(1, :dimension))::vector
+                FROM generate_series(1, :rows) AS g
+            """), {"rows": args.rows, "dimension": args.dimension})
+            print(f"  {time.perf_counter() - started:.1f}s")
+
+            ddl = vector_index_ddl(f"{TABLE}_embedding_idx", args.rows, table=TABLE, concurrently=False)
+            print(ddl)
+            started = time.perf_counter()
+            await conn.execute(text(ddl))
+            await conn.execute(text(f"ANALYZE {TABLE}"))
+            print(f"  built in {time.perf_counter() - started:.1f}s\n")
+
+            try:
+                # Searches need real transactions for SET LOCAL, so they use
+                # their own connection
+                async with engine.connect() as search_conn:
+                    queries = [_random_vector(args.dimension) for _ in range(args.queries)]
+                    exact = []
+                    for query in queries:
+                        ids, _ = await _nearest(search_conn, query, args.k, ["SET LOCAL enable_indexscan = off"])
+                        exact.append(ids)
+
+                    print(f"{knob:>10}  recall@{args.k:<3}  median ms  p95 ms")
+                    for value in values:
+                        statements = vector_search_settings(
+                            probes=None if hnsw else value,
+                            ef_search=value if hnsw else None,
+                        )
+                        recalls, latencies = [], []
+                        for query, truth in zip(queries, exact):
+                            ids, elapsed = await _nearest(search_conn, query, args.k, statements)
+                            recalls.append(len(ids & truth) / len(truth))
+                            latencies.append(elapsed)
+                        latencies.sort()
+                        print(
+                            f"{value:>10}  {statistics.mean(recalls):>9.3f}  "
+                            f"{statistics.median(latencies):>9.2f}  {latencies[int(len(latencies) * 0.95)]:>6.2f}"
+                        )
+            finally:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    finally:
+        await engine.dispose()
+
+
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,259 @@
+"""
+Query-plan regression check for the service layer.
+
+Seeds a local Postgres (migrated to head) with synthetic users, projects,
+sessions, messages, files and vector chunks inside a transaction, runs
+ANALYZE, then calls the real service methods while capturing every SQL
+statement they emit. Each call starts with its cache namespaces invalidated,
+so cached paths reach the database too, and a call that emits no SQL fails
+the check. Each captured statement is EXPLAINed with its actual parameters,
+and the check fails if any plan falls back to a sequential scan on one of
+the indexed tables. Everything is rolled back at the end.
+
+Usage (from backend/, against a disposable local database):
+    python -m scripts.check_query_plans --users 200 --sessions 50 --messages 40
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import Namespace, cache_invalidate_namespaces, close_redis
+from app.config import settings
+from app.core.context import ContextBuilder, context_budget
+from app.database import engine
+from app.services.message_service import MessageService
+from app.services.project_service import ProjectService
+from app.services.session_service import SessionService
+
+
+# Tables whose service queries must be index-driven
+CHECKED_TABLES = {"sessions", "messages", "projects", "files", "vector_chunks"}
+
+SEED_SQL = [
+    """
+    INSERT INTO users (id, email, username, hashed_password, is_active)
+    SELECT gen_random_uuid(), 'plan-user-' || g || '@example.com', 'plan-user-' || g, 'x', true
+    FROM generate_series(1, :users) AS g
+    """,
+    """
+    INSERT INTO projects (id, user_id, name, tags, settings, updated_at)
+    SELECT gen_random_uuid(), u.id, 'Project ' || g, '{}', '{}', now() - g * interval '1 hour'
+    FROM users AS u CROSS JOIN generate_series(1, :projects) AS g
+    WHERE u.username LIKE 'plan-user-%'
+    """,
+    """
+    INSERT INTO sessions (id, user_id, project_id, title, mode, settings, last_sequence, updated_at)
+    SELECT gen_random_uuid(), u.id,
+           CASE WHEN g % 3 = 0 THEN (
+               SELECT p.id FROM projects AS p WHERE p.user_id = u.id
+               ORDER BY p.updated_at DESC LIMIT 1
+           ) END,
+           'Session ' || g, 'CHAT', '{}', :messages - 1, now() - g * interval '1 minute'
+    FROM users AS u CROSS JOIN generate_series(1, :sessions) AS g
+    WHERE u.username LIKE 'plan-user-%'
+    """,
+    """
+    INSERT INTO messages (id, session_id, role, content, sequence, meta, is_summary)
+    SELECT gen_random_uuid(), s.id,
+           (CASE WHEN g % 2 = 1 THEN 'USER' ELSE 'ASSISTANT' END)::messagerole,
+           repeat('lorem ipsum ', 20), g - 1, '{}', false
+    FROM sessions AS s JOIN users AS u ON u.id = s.user_id
+    CROSS JOIN generate_series(1, :messages) AS g
+    WHERE u.username LIKE 'plan-user-%'
+    """,
+    """
+    INSERT INTO files (id, user_id, filename, original_filename, file_path, file_type,
+                       mime_type, file_size, processing_status, meta, in_library)
+    SELECT gen_random_uuid(), u.id, 'file-' || g, 'file-' || g, '/tmp/file-' || g, 'DOCUMENT',
+           'text/plain', 1, 'COMPLETED', '{}', g % 2 = 0
+    FROM users AS u CROSS JOIN generate_series(1, :files) AS g
+    WHERE u.username LIKE 'plan-user-%'
+    """,
+    """
+    INSERT INTO vector_stores (id, project_id, name, source_type, embedding_model, meta)
+    SELECT gen_random_uuid(), p.id, 'store', 'file', 'text-embedding-ada-002', '{}'
+    FROM projects AS p JOIN users AS u ON u.id = p.user_id
+    WHERE u.username LIKE 'plan-user-%'
+    """,
+    """
+    INSERT INTO vector_chunks (id, vector_store_id, content, embedding, chunk_index, meta)
+    SELECT gen_random_uuid(), vs.id, 'chunk ' || g,
+           array_fill(0.01::real, ARRAY[:dimension])::vector, g, '{}'
+    FROM vector_stores AS vs CROSS JOIN generate_series(1, :chunks) AS g
+    WHERE vs.name = 'store'
+    """,
+]
+
+# Queries for tables that have no service methods yet; kept in the same shape
+# the file library and RAG paths will issue
+DIRECT_QUERIES = [
+    (
+        "files: library listing",
+        "SELECT id FROM files WHERE user_id = :user_id AND in_library = true "
+        "ORDER BY created_at DESC LIMIT 50",
+    ),
+    (
+        "vector_chunks: chunks of a store in order",
+        "SELECT id, chunk_index FROM vector_chunks WHERE vector_store_id = :vector_store_id "
+        "ORDER BY chunk_index LIMIT 100",
+    ),
+]
+
+
+
+
+def _walk(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+
+
+def _seq_scans(explain_output: Any) -> List[str]:
+    if isinstance(explain_output, str):
+        explain_output = json.loads(explain_output)
+    root = explain_output[0]["Plan"]
+    return [
+        node["Relation Name"]
+        for node in _walk(root)
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in CHECKED_TABLES
+    ]
+
+
+
+
+async def _seed(conn, args):
+    params = {
+        "users": args.users,
+        "projects": args.projects,
+        "sessions": args.sessions,
+        "messages": args.messages,
+        "files": args.files,
+        "chunks": args.chunks,
+        "dimension": settings.VECTOR_DIMENSION,
+    }
+    for statement in SEED_SQL:
+        await conn.execute(text(statement), params)
+    for table in ("users", "projects", "sessions", "messages", "files", "vector_stores", "vector_chunks"):
+        await conn.execute(text(f"ANALYZE {table}"))
+
+
+
+
+async def _sample_ids(conn) -> Dict[str, Any]:
+    row = (await conn.execute(text("""
+        SELECT s.user_id, s.id AS session_id, s.project_id, vs.id AS vector_store_id
+        FROM sessions AS s
+        JOIN users AS u ON u.id = s.user_id
+        JOIN vector_stores AS vs ON vs.project_id = s.project_id
+        WHERE u.username LIKE 'plan-user-%' AND s.project_id IS NOT NULL
+        LIMIT 1
+    """))).one()
+    return dict(row._mapping)
+
+
+
+
+def _service_calls(
+    db: AsyncSession,
+    ids: Dict[str, Any]
+) -> List[Tuple[str, Tuple[Namespace, ...], Callable[[], Awaitable[Any]]]]:
+    """Every read path the API uses, with the cache namespaces it reads through"""
+    user_id, session_id, project_id = ids["user_id"], ids["session_id"], ids["project_id"]
+    user, session, project = ("user", user_id), ("session", session_id), ("project", project_id)
+
+    async def build_context():
+        header = await ContextBuilder.load_header(session_id, user_id, db)
+        await ContextBuilder.build(header, "hello", context_budget(settings.LLM_DEFAULT_MODEL), db)
+
+    return [
+        ("sessions: list", (user,), lambda: SessionService.get_user_sessions(user_id, None, db)),
+        ("sessions: list by project", (user,), lambda: SessionService.get_user_sessions(user_id, project_id, db)),
+        ("sessions: get", (), lambda: SessionService.get_session_by_id(session_id, user_id, db)),
+        ("sessions: get cached", (session,), lambda: SessionService.get_session_cached(session_id, user_id, db)),
+        ("messages: list", (), lambda: MessageService.get_session_messages(session_id, user_id, db)),
+        ("projects: list", (user,), lambda: ProjectService.get_user_projects(user_id, db)),
+        ("projects: get", (), lambda: ProjectService.get_project_by_id(project_id, user_id, db)),
+        ("projects: get cached", (project,), lambda: ProjectService.get_project_cached(project_id, user_id, db)),
+        ("context: header and history", (), build_context),
+    ]
+
+
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=5, help="projects per user")
+    parser.add_argument("--sessions", type=int, default=50, help="sessions per user")
+    parser.add_argument("--messages", type=int, default=40, help="messages per session")
+    parser.add_argument("--files", type=int, default=50, help="files per user")
+    parser.add_argument("--chunks", type=int, default=50, help="chunks per vector store")
+    args = parser.parse_args()
+
+    captured: List[Tuple[str, Any]] = []
+    checks: List[Tuple[str, str, Any, bool]] = []
+    capturing = False
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if capturing:
+            captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    failures = 0
+    try:
+        async with engine.connect() as conn:
+            outer = await conn.begin()
+            try:
+                print("Seeding...")
+                await _seed(conn, args)
+                ids = await _sample_ids(conn)
+
+                db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+                for label, namespaces, call in _service_calls(db, ids):
+                    # A warm cache would answer without SQL and hide the plan
+                    await cache_invalidate_namespaces(*namespaces)
+                    emitted = len(captured)
+                    capturing = True
+                    try:
+                        await call()
+                    finally:
+                        capturing = False
+                    if len(captured) == emitted:
+                        failures += 1
+                        print(f"[NO SQL CAPTURED] {label}")
+
+                checks = [(statement.split("\n")[0][:80], statement, parameters, True) for statement, parameters in captured]
+                checks += [(label, sql, ids, False) for label, sql in DIRECT_QUERIES]
+
+                for label, statement, parameters, driver_sql in checks:
+                    explain = f"EXPLAIN (FORMAT JSON) {statement}"
+                    if driver_sql:
+                        result = await conn.exec_driver_sql(explain, parameters)
+                    else:
+                        result = await conn.execute(text(explain), parameters)
+                    scans = _seq_scans(result.scalar())
+                    status = "SEQ SCAN on " + ", ".join(scans) if scans else "ok"
+                    failures += bool(scans)
+                    print(f"[{status}] {label}")
+            finally:
+                await outer.rollback()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+        await close_redis()
+        await engine.dispose()
+
+    print(f"{len(checks)} statements checked, {failures} failures")
+    return 1 if failures else 0
+
+
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
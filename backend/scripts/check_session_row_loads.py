@@ -0,0 +1,117 @@
+"""
+Row-load regression check for the session endpoints.
+
+Seeds one session with a long message history inside a transaction, then
+calls the session endpoints directly and counts the ORM objects each one
+materialises. Metadata reads and writes must load at most the session row
+itself and never its messages. Everything is rolled back at the end.
+
+Usage (from backend/, against a disposable local database migrated to head):
+    python -m scripts.check_session_row_loads --messages 5000
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from collections import Counter
+from typing import Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import chat
+from app.database import Base, engine
+from app.schemas.auth import UserPrincipal
+from app.schemas.chat import SessionRename, SessionUpdate
+
+
+# Most ORM objects each endpoint may load
+EXPECTED_MAX_LOADS = {
+    "get_session": 1,
+    "update_session": 1,
+    "rename_session": 1,
+    "delete_session": 0,
+}
+
+
+
+
+async def _seed(conn, messages: int) -> Tuple[UserPrincipal, uuid.UUID]:
+    user_id, session_id = uuid.uuid4(), uuid.uuid4()
+    await conn.execute(text("""
+        INSERT INTO users (id, email, username, hashed_password, is_active)
+        VALUES (:user_id, 'row-loads@example.com', 'row-loads', 'x', true)
+    """), {"user_id": user_id})
+    await conn.execute(text("""
+        INSERT INTO sessions (id, user_id, title, mode, settings, last_sequence)
+        VALUES (:session_id, :user_id, 'Long session', 'CHAT', '{}', :messages - 1)
+    """), {"session_id": session_id, "user_id": user_id, "messages": messages})
+    await conn.execute(text("""
+        INSERT INTO messages (id, session_id, role, content, sequence, meta, is_summary)
+        SELECT gen_random_uuid(), :session_id,
+               (CASE WHEN g % 2 = 0 THEN 'USER' ELSE 'ASSISTANT' END)::messagerole,
+               repeat('lorem ipsum ', 20), g, '{}', false
+        FROM generate_series(0, :messages - 1) AS g
+    """), {"session_id": session_id, "messages": messages})
+    return UserPrincipal(id=user_id, username="row-loads", is_active=True), session_id
+
+
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+
+    loads: Counter = Counter()
+
+    def count_load(target, context):
+        loads[type(target).__name__] += 1
+
+    event.listen(Base, "load", count_load, propagate=True)
+    failures = 0
+    try:
+        async with engine.connect() as conn:
+            outer = await conn.begin()
+            try:
+                user, session_id = await _seed(conn, args.messages)
+                db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+                calls = {
+                    "get_session": lambda: chat.get_session(session_id=session_id, current_user=user, db=db),
+                    "update_session": lambda: chat.update_session(
+                        session_id=session_id,
+                        session_data=SessionUpdate(settings={"temperature": 0.2}),
+                        current_user=user,
+                        db=db,
+                    ),
+                    "rename_session": lambda: chat.rename_session(
+                        session_id=session_id,
+                        rename_data=SessionRename(title="Renamed"),
+                        current_user=user,
+                        db=db,
+                    ),
+                    "delete_session": lambda: chat.delete_session(session_id=session_id, current_user=user, db=db),
+                }
+                for name, call in calls.items():
+                    loads.clear()
+                    db.expunge_all()
+                    await call()
+                    total = sum(loads.values())
+                    ok = total <= EXPECTED_MAX_LOADS[name] and not loads["Message"]
+                    failures += not ok
+                    detail = ", ".join(f"{model}={count}" for model, count in sorted(loads.items())) or "none"
+                    print(f"[{'ok' if ok else 'FAIL'}] {name}: loaded {detail}")
+            finally:
+                await outer.rollback()
+    finally:
+        event.remove(Base, "load", count_load)
+        await engine.dispose()
+
+    print(f"{args.messages} messages in session, {failures} regressions")
+    return 1 if failures else 0
+
+
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,61 @@
+"""
+Rebuild the vector_chunks ANN index for the current settings.
+
+Run after changing VECTOR_INDEX_TYPE, VECTOR_INDEX_PRECISION or the HNSW
+parameters, or after the table has grown enough that ivfflat lists (derived
+from the row count) should change. The replacement index is built
+CONCURRENTLY and swapped in, so searches and ingestion keep working during
+the rebuild.
+
+Converting a store to half or binary precision is this rebuild alone: the
+reduced-precision index is built on a cast of the stored full-precision
+embeddings, which stay in the table for rescoring. Those precisions need
+the pgvector extension at 0.7.0 or later (ALTER EXTENSION vector UPDATE).
+
+Usage (from backend/):
+    python -m scripts.rebuild_vector_index [--dry-run]
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+from app.utils.vector_utils import vector_index_rebuild_statements
+
+
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="print the statements without running them")
+    args = parser.parse_args()
+
+    try:
+        async with engine.connect() as conn:
+            row_count = (await conn.execute(text("SELECT count(*) FROM vector_chunks"))).scalar()
+            await conn.rollback()
+            version = (await conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))).scalar()
+            await conn.rollback()
+            print(
+                f"{row_count} chunks, index type {settings.VECTOR_INDEX_TYPE}, "
+                f"precision {settings.VECTOR_INDEX_PRECISION}, pgvector {version}"
+            )
+            if settings.VECTOR_INDEX_PRECISION != "full" and tuple(map(int, version.split("."))) < (0, 7, 0):
+                raise SystemExit("half and binary precision need pgvector >= 0.7.0: run ALTER EXTENSION vector UPDATE")
+
+            # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in vector_index_rebuild_statements(row_count):
+                print(statement)
+                if not args.dry_run:
+                    await conn.execute(text(statement))
+    finally:
+        await engine.dispose()
+
+
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""
+Activate or deactivate a user account.
+
+Deactivation takes effect on the user's next request in every worker: the
+cached principal is invalidated through its cache namespace, which also
+broadcasts the change so each worker drops its in-process copy. Existing
+tokens are then rejected with 403 "Inactive user".
+
+Needs the database at DATABASE_URL and Redis at REDIS_URL.
+
+Usage (from backend/):
+    python -m scripts.set_user_active alice@example.com --inactive
+    python -m scripts.set_user_active alice --active
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import or_, select
+
+from app.cache import close_redis
+from app.database import AsyncSessionLocal, engine
+from app.models.user import User
+from app.services.auth_service import AuthService
+
+
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("identifier", help="email address or username")
+    state = parser.add_mutually_exclusive_group(required=True)
+    state.add_argument("--active", dest="is_active", action="store_true")
+    state.add_argument("--inactive", dest="is_active", action="store_false")
+    args = parser.parse_args()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            user_id = (await db.execute(
+                select(User.id).where(or_(User.email == args.identifier, User.username == args.identifier))
+            )).scalar_one_or_none()
+            if user_id is None:
+                raise SystemExit(f"no user matches {args.identifier!r}")
+            user = await AuthService.set_user_active(user_id, args.is_active, db)
+            print(f"{user.username} ({user.id}) is now {'active' if user.is_active else 'inactive'}")
+    finally:
+        await close_redis()
+        await engine.dispose()
+
+
+
+
+if __name__ == "__main__":
+    asyncio.run(main())